@@ -2,13 +2,18 @@ from __future__ import annotations
 
 import argparse
 import json
+import re
+import sys
+import threading
+from typing import Optional
 
 from runtime_utils import (
-    cleanup_sessions,
     create_session,
     ensure_runtime_files,
     load_json,
+    load_run_info,
     portals_path,
+    queue_path,
     selectors_path,
     session_paths,
     update_run_info,
@@ -21,66 +26,280 @@ def log_result(log_path: str, payload: dict[str, str]) -> None:
         log_file.write("\n")
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Run F001 portal automation")
-    parser.add_argument("number", nargs="?", default="UNKNOWN", help="Portal number")
-    parser.add_argument("--portal-key", default="UNKNOWN", help="Portal key")
-    args = parser.parse_args()
+def log_gc_report(report) -> None:
+    if report.removed:
+        print(report.summary(), file=sys.stderr)
 
-    ensure_runtime_files()
-    cleanup_sessions()
-    session_root = create_session(args.portal_key, args.number)
+
+def result_payload(result) -> dict[str, object]:
+    return {
+        "status": result.status,
+        "last_step": result.last_step,
+        "message": result.message,
+        "detail": result.detail,
+        "found": result.found,
+        "screenshot_path": result.screenshot_path,
+    }
+
+
+def log_payload(result) -> dict[str, str]:
+    return {
+        "status": result.status,
+        "last_step": result.last_step,
+        "message": result.message,
+        "detail": result.detail,
+        "found": str(result.found),
+        "screenshot_path": result.screenshot_path or "",
+    }
+
+
+def read_numbers_file(path: str) -> list[str]:
+    """Read GKN numbers: one per line (or separated by , ;), '#' starts a comment."""
+    numbers: list[str] = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.split("#", 1)[0]
+            numbers.extend(item.strip() for item in re.split(r"[,;]", line) if item.strip())
+    return numbers
+
+
+def run_batch(numbers: list[str], portal_key: str, fast: Optional[bool] = None) -> None:
+    from automation.portal_runner import run_portal_batch
+
+    portals = load_json(portals_path(), {})
+    portal_data = portals.get(portal_key, {})
+    selectors = load_json(selectors_path(), {})
+
+    def _on_result(number: str, result, session_info: dict[str, str]) -> None:
+        if session_info.get("log_path"):
+            log_result(session_info["log_path"], log_payload(result))
+        payload = {"number": number, **result_payload(result)}
+        print(json.dumps(payload, ensure_ascii=False), flush=True)
+
+    run_portal_batch(
+        numbers, portal_key, portal_data, selectors, on_result=_on_result, fast=fast
+    )
+
+
+def read_jobs_file(path: str) -> list[tuple[str, str]]:
+    """Read lookup jobs: one 'portal_key;number' per line, '#' starts a comment."""
+    jobs: list[tuple[str, str]] = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            portal_key, _sep, number = line.partition(";")
+            if portal_key.strip() and number.strip():
+                jobs.append((portal_key.strip(), number.strip()))
+    return jobs
+
+
+def run_jobs(
+    jobs: list[tuple[str, str]],
+    max_workers: int,
+    per_portal: int,
+    fast: Optional[bool] = None,
+) -> None:
+    from automation.worker_pool import PortalWorkerPool
+
+    print_lock = threading.Lock()
+
+    def _on_done(job) -> None:
+        if job.session_root and job.result:
+            log_result(session_paths(job.session_root)["log_path"], log_payload(job.result))
+        payload = {"portal_key": job.portal_key, "number": job.number}
+        if job.result:
+            payload.update(result_payload(job.result))
+        with print_lock:
+            print(json.dumps(payload, ensure_ascii=False), flush=True)
+
+    pool = PortalWorkerPool(
+        max_workers=max_workers, per_portal_limit=per_portal, on_done=_on_done, fast=fast
+    )
+    for portal_key, number in jobs:
+        pool.submit(portal_key, number)
+    pool.shutdown(wait=True)
+
+
+def run_daemon(
+    queue_file: str,
+    results_path: Optional[str],
+    max_workers: int,
+    per_portal: int,
+    fast: Optional[bool] = None,
+    once: bool = False,
+) -> None:
+    from automation.job_queue import QueueDaemon
+
+    daemon = QueueDaemon(
+        queue_file,
+        results_path,
+        max_workers=max_workers,
+        per_portal=per_portal,
+        fast=fast,
+    )
+    print(f"F001 daemon: {daemon.queue_file} -> {daemon.results_path} (Ctrl+C kończy)", flush=True)
+    try:
+        daemon.run(once=once)
+    except KeyboardInterrupt:
+        daemon.stop()
+
+
+def run_api(
+    port: int,
+    max_workers: int,
+    per_portal: int,
+    fast: Optional[bool] = None,
+) -> None:
+    from automation.http_api import LookupApi
+    from automation.worker_pool import PortalWorkerPool
+
+    pool = PortalWorkerPool(
+        max_workers=max_workers, per_portal_limit=per_portal, headless=True, fast=fast
+    )
+    api = LookupApi(pool, port=port)
+    print(f"F001 API: {api.url} (Ctrl+C kończy)", flush=True)
+    try:
+        api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+        pool.shutdown(wait=True)
+
+
+def run_cli(args: argparse.Namespace) -> None:
+    if args.serve:
+        run_api(args.port, args.max_workers, args.per_portal, args.fast)
+        return
+
+    if args.daemon:
+        run_daemon(
+            args.queue or queue_path(),
+            args.results,
+            args.max_workers,
+            args.per_portal,
+            args.fast,
+            args.once,
+        )
+        return
+
+    if args.jobs_file:
+        run_jobs(
+            read_jobs_file(args.jobs_file), args.max_workers, args.per_portal, args.fast
+        )
+        return
+
+    numbers = [item for item in args.number if item != "UNKNOWN"]
+    if args.batch_file:
+        numbers.extend(read_numbers_file(args.batch_file))
+    if args.batch_file or len(numbers) > 1:
+        run_batch(numbers, args.portal_key, args.fast)
+        return
+    number = numbers[0] if numbers else "UNKNOWN"
+
+    from automation.checkpoints import resumable_session
+    from automation.portal_runner import run_portal_flow
+
+    session_root = None if args.no_resume else resumable_session(args.portal_key, number)
+    session_root = session_root or create_session(args.portal_key, number)
     session_info = session_paths(session_root)
 
     portals = load_json(portals_path(), {})
     portal_data = portals.get(args.portal_key, {})
 
+    run_count = load_run_info(session_root).get("run_count", 0) + 1
     update_run_info(
         session_root,
         {
             "portal_key": args.portal_key,
-            "last_number": args.number,
-            "run_count": 1,
+            "last_number": number,
+            "run_count": run_count,
         },
     )
 
-    from automation.portal_runner import run_portal_flow
-
     selectors = load_json(selectors_path(), {})
 
-    result = run_portal_flow(args.number, portal_data, selectors, session_info)
+    result = run_portal_flow(number, portal_data, selectors, session_info, fast=args.fast)
 
-    log_result(
-        session_info["log_path"],
-        {
-            "status": result.status,
-            "last_step": result.last_step,
-            "message": result.message,
-            "detail": result.detail,
-            "found": str(result.found),
-            "screenshot_path": result.screenshot_path or "",
-        },
-    )
+    log_result(session_info["log_path"], log_payload(result))
     update_run_info(
         session_root,
         {
             "last_status": result.status,
             "last_step": result.last_step,
         },
+        flush=True,
     )
-    print(
-        json.dumps(
-            {
-                "status": result.status,
-                "last_step": result.last_step,
-                "message": result.message,
-                "detail": result.detail,
-                "found": result.found,
-                "screenshot_path": result.screenshot_path,
-            },
-            ensure_ascii=False,
-        )
+    print(json.dumps(result_payload(result), ensure_ascii=False))
+
+
+def main() -> None:
+    from automation.http_api import DEFAULT_API_PORT
+
+    parser = argparse.ArgumentParser(description="Run F001 portal automation")
+    parser.add_argument(
+        "number",
+        nargs="*",
+        default=["UNKNOWN"],
+        help="Portal number (several numbers run as one batch)",
+    )
+    parser.add_argument("--portal-key", default="UNKNOWN", help="Portal key")
+    parser.add_argument(
+        "--batch-file",
+        help="File with GKN numbers to look up in one logged-in browser",
+    )
+    parser.add_argument(
+        "--jobs-file",
+        help="File with 'portal_key;number' lines run concurrently across portals",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep the browser warm and run jobs appended to the JSONL queue",
+    )
+    parser.add_argument("--queue", help="Daemon queue file (default: queue/requests.jsonl)")
+    parser.add_argument("--results", help="Daemon results file (default: queue/results.jsonl)")
+    parser.add_argument(
+        "--once", action="store_true", help="Daemon exits when the queue is drained"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve the localhost HTTP/JSON API for submitting and polling lookups",
     )
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_API_PORT, help="API port (with --serve)"
+    )
+    parser.add_argument("--max-workers", type=int, default=4, help="Parallel lookups")
+    parser.add_argument(
+        "--per-portal", type=int, default=1, help="Parallel lookups per portal"
+    )
+    parser.add_argument(
+        "--fast",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Headless run without images/fonts/CSS (default: fast_mode in settings.json)",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Start a new session instead of continuing an unfinished one",
+    )
+    args = parser.parse_args()
+
+    ensure_runtime_files()
+    from session_gc import start_session_gc
+
+    # GC overlaps the run, but the process waits for it before exiting: its
+    # daemon thread killed at exit could stop halfway through an rmtree or a
+    # day archive. Only the long-lived panel leaves it running in background.
+    gc_thread = start_session_gc(on_done=log_gc_report)
+    try:
+        run_cli(args)
+    finally:
+        gc_thread.join()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Any
+
+BENCH_PORTAL = "bench"
+
+
+def pick_numbers(config: Any, lookups: int, miss_rate: float, seed: int) -> list[str]:
+    from bench.stand_in_portal import work_numbers
+
+    rng = random.Random(seed)
+    pool = work_numbers(config, "unfinished") + work_numbers(config, "finished")
+    numbers = rng.sample(pool, min(lookups, len(pool)))
+    for index in range(len(numbers)):
+        if rng.random() < miss_rate:
+            numbers[index] = f"GKN.9999.{index + 1}.2000"
+    return numbers
+
+
+def _session_timings(session_roots: list[str]) -> list[tuple[str, dict[str, Any]]]:
+    from runtime_utils import load_run_info
+
+    found = []
+    for session_root in session_roots:
+        timings = load_run_info(session_root).get("timings")
+        if timings:
+            found.append((BENCH_PORTAL, timings))
+    return found
+
+
+def _clear_learned_state() -> None:
+    from runtime_utils import clear_storage_state, login_strategy_path
+
+    clear_storage_state(BENCH_PORTAL)
+    try:
+        os.remove(login_strategy_path())
+    except OSError:
+        pass
+
+
+def run_single(
+    numbers: list[str], portal_data: dict[str, Any], fast: bool, cold: bool
+) -> dict[str, Any]:
+    from automation.portal_runner import run_portal_flow
+    from runtime_utils import create_session, session_paths, update_run_info
+
+    session_roots: list[str] = []
+    found = 0
+    started = time.perf_counter()
+    for number in numbers:
+        if cold:
+            _clear_learned_state()
+        session_root = create_session(BENCH_PORTAL, number)
+        update_run_info(session_root, {"portal_key": BENCH_PORTAL, "last_number": number})
+        result = run_portal_flow(number, portal_data, {}, session_paths(session_root), fast=fast)
+        session_roots.append(session_root)
+        found += int(result.found)
+    return {
+        "wall_s": round(time.perf_counter() - started, 3),
+        "lookups": len(numbers),
+        "found": found,
+        "sessions": session_roots,
+    }
+
+
+def run_batch(
+    numbers: list[str], portal_data: dict[str, Any], fast: bool, cold: bool
+) -> dict[str, Any]:
+    from automation.portal_runner import run_portal_batch
+
+    session_roots: list[str] = []
+
+    def _on_result(_number: str, _result: Any, session_info: dict[str, str]) -> None:
+        if session_info:
+            session_roots.append(session_info["session_root"])
+
+    if cold:
+        _clear_learned_state()
+    started = time.perf_counter()
+    results = run_portal_batch(
+        numbers, BENCH_PORTAL, portal_data, {}, on_result=_on_result, fast=fast
+    )
+    return {
+        "wall_s": round(time.perf_counter() - started, 3),
+        "lookups": len(results),
+        "found": sum(1 for _number, result in results if result.found),
+        "sessions": session_roots,
+    }
+
+
+def summarize(scenario: dict[str, Any]) -> dict[str, Any]:
+    from F001_report import collect, percentile
+
+    samples = collect(_session_timings(scenario["sessions"]))
+    steps = {
+        step: {
+            "n": len(values["total"]),
+            "p50": percentile(values["total"], 0.5),
+            "p95": percentile(values["total"], 0.95),
+            "max": max(values["total"]),
+            "wait_p50": percentile(values["wait"], 0.5),
+        }
+        for (portal, step), values in samples.items()
+        if portal == BENCH_PORTAL
+    }
+    lookups = max(1, scenario["lookups"])
+    return {
+        "wall_s": scenario["wall_s"],
+        "lookups": scenario["lookups"],
+        "found": scenario["found"],
+        "per_lookup_s": round(scenario["wall_s"] / lookups, 3),
+        "lookups_per_hour": round(3600 * lookups / max(scenario["wall_s"], 0.001)),
+        "steps": steps,
+    }
+
+
+def format_summary(name: str, summary: dict[str, Any]) -> str:
+    lines = [
+        f"== {name}: {summary['lookups']} wyszukiwań, znaleziono {summary['found']}, "
+        f"{summary['wall_s']} s ({summary['per_lookup_s']} s/szt., "
+        f"{summary['lookups_per_hour']}/h)",
+        f"{'step':<36} {'n':>5} {'p50':>8} {'p95':>8} {'max':>8} {'wait p50':>9}",
+    ]
+    for step, row in sorted(summary["steps"].items()):
+        lines.append(
+            f"{step:<36} {row['n']:>5} {row['p50']:>8} {row['p95']:>8} "
+            f"{row['max']:>8} {row['wait_p50']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="F001 end-to-end benchmark against the local stand-in portal"
+    )
+    parser.add_argument("--mode", choices=("single", "batch", "both"), default="both")
+    parser.add_argument("--lookups", type=int, default=10, help="Numbers to look up")
+    parser.add_argument("--miss-rate", type=float, default=0.0, help="Share of unknown numbers")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=int, default=50, help="Stand-in delay per request")
+    parser.add_argument("--jitter-ms", type=int, default=0)
+    parser.add_argument("--unfinished", type=int, default=50)
+    parser.add_argument("--finished", type=int, default=200)
+    parser.add_argument("--dialogs", type=int, default=2)
+    parser.add_argument(
+        "--fast",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Headless + resource blocking (--no-fast needs a display)",
+    )
+    parser.add_argument(
+        "--cold", action="store_true", help="Forget saved session/login path before each run"
+    )
+    parser.add_argument("--runtime", help="Runtime folder (default: temporary, removed)")
+    parser.add_argument("--json", help="Write the summary to this JSON file")
+    args = parser.parse_args()
+
+    runtime = args.runtime or tempfile.mkdtemp(prefix="F001_bench_")
+    # Must be set before runtime_utils is imported: sessions of the benchmark
+    # never mix with the real F001_runtime.
+    os.environ["F001_RUNTIME_ROOT"] = runtime
+
+    from bench.stand_in_portal import StandInConfig, StandInPortal
+    from runtime_utils import ensure_runtime_files, portals_path, save_json
+
+    config = StandInConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        unfinished=args.unfinished,
+        finished=args.finished,
+        dialogs=args.dialogs,
+    )
+    numbers = pick_numbers(config, args.lookups, args.miss_rate, args.seed)
+    report: dict[str, Any] = {
+        "config": {**vars(config), "fast": args.fast, "cold": args.cold},
+    }
+    try:
+        with StandInPortal(config) as portal:
+            ensure_runtime_files()
+            portal_data = {"url": portal.url, "login": "bench", "password": "bench"}
+            save_json(portals_path(), {BENCH_PORTAL: portal_data})
+            scenarios = ("single", "batch") if args.mode == "both" else (args.mode,)
+            for name in scenarios:
+                runner = run_single if name == "single" else run_batch
+                summary = summarize(runner(numbers, portal_data, args.fast, args.cold))
+                report[name] = summary
+                print(format_summary(name, summary))
+    finally:
+        if not args.runtime:
+            shutil.rmtree(runtime, ignore_errors=True)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import io
+import json
+import os
+import sys
+import zipfile
+from datetime import datetime, timedelta
+from typing import IO, Any, Iterator, Optional
+
+from automation.event_log import EVENTS_FILE
+from F001_report import percentile
+from runtime_utils import SESSIONS_DIR
+from session_archive import archive_path, archived_dates
+
+
+class EventFilter:
+    """Filters of one query; cheap checks on folder names and raw lines first."""
+
+    def __init__(
+        self,
+        since: Optional[str] = None,
+        portal_key: Optional[str] = None,
+        step: Optional[str] = None,
+        level: Optional[str] = None,
+        number: Optional[str] = None,
+        text: Optional[str] = None,
+    ) -> None:
+        self.since = since
+        self.portal = (portal_key or "").lower() or None
+        self.step = step
+        self.step_glob = bool(step) and any(char in step for char in "*?[")
+        self.level = level
+        self.number = number
+        self.text = text
+
+    def date_ok(self, date_name: str) -> bool:
+        return not self.since or date_name >= self.since
+
+    def session_ok(self, session_name: str) -> bool:
+        # Session folders are HHMMSS_PORTAL_GKN.
+        return not self.portal or session_name[7:].lower().startswith(f"{self.portal}_")
+
+    def line_ok(self, line: str) -> bool:
+        if self.step and not self.step_glob and f'"{self.step}"' not in line:
+            return False
+        if self.level and f'"{self.level}"' not in line:
+            return False
+        return not self.text or self.text in line
+
+    def event_ok(self, event: dict[str, Any]) -> bool:
+        if self.step:
+            step = event.get("step") or ""
+            if self.step_glob and not fnmatch.fnmatchcase(step, self.step):
+                return False
+            if not self.step_glob and step != self.step:
+                return False
+        if self.level and event.get("level") != self.level:
+            return False
+        if self.portal and event.get("portal") != self.portal:
+            return False
+        if self.number and event.get("number") != self.number:
+            return False
+        return True
+
+
+def _read_events(handle: IO[str], query: EventFilter) -> Iterator[dict[str, Any]]:
+    for line in handle:
+        if not query.line_ok(line):
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if query.event_ok(event):
+            yield event
+
+
+def iter_events(query: EventFilter, archived: bool = True) -> Iterator[dict[str, Any]]:
+    """Matching events of sessions/*/*/logs/events.jsonl and of the day archives."""
+    live_dates: set[str] = set()
+    if os.path.isdir(SESSIONS_DIR):
+        for date_name in sorted(os.listdir(SESSIONS_DIR)):
+            date_dir = os.path.join(SESSIONS_DIR, date_name)
+            if not query.date_ok(date_name) or not os.path.isdir(date_dir):
+                continue
+            live_dates.add(date_name)
+            for session_name in sorted(os.listdir(date_dir)):
+                if not query.session_ok(session_name):
+                    continue
+                path = os.path.join(date_dir, session_name, "logs", EVENTS_FILE)
+                try:
+                    with open(path, "r", encoding="utf-8") as handle:
+                        yield from _read_events(handle, query)
+                except OSError:
+                    continue
+    if not archived:
+        return
+    for date_name in archived_dates():
+        if not query.date_ok(date_name):
+            continue
+        try:
+            archive = zipfile.ZipFile(archive_path(date_name))
+        except (OSError, zipfile.BadZipFile):
+            continue
+        with archive:
+            for name in archive.namelist():
+                session_name = name.split("/", 1)[0]
+                if not name.endswith(f"/logs/{EVENTS_FILE}") or not query.session_ok(session_name):
+                    continue
+                if date_name in live_dates and os.path.isdir(
+                    os.path.join(SESSIONS_DIR, date_name, session_name)
+                ):
+                    continue
+                with archive.open(name) as raw:
+                    yield from _read_events(io.TextIOWrapper(raw, encoding="utf-8"), query)
+
+
+def _field(event: dict[str, Any], name: str) -> str:
+    if name == "day":
+        return (event.get("ts") or "")[:10]
+    value = event.get(name)
+    if value is None:
+        value = (event.get("payload") or {}).get(name)
+    return "-" if value is None else str(value)
+
+
+def aggregate(events: Iterator[dict[str, Any]], fields: list[str]) -> dict[tuple[str, ...], Any]:
+    """Per key: event count and the ``duration_ms`` values of events that have one."""
+    groups: dict[tuple[str, ...], dict[str, Any]] = {}
+    for event in events:
+        key = tuple(_field(event, name) for name in fields)
+        group = groups.setdefault(key, {"n": 0, "ms": []})
+        group["n"] += 1
+        if isinstance(event.get("duration_ms"), int):
+            group["ms"].append(event["duration_ms"])
+    return groups
+
+
+def format_groups(groups: dict[tuple[str, ...], Any], fields: list[str]) -> str:
+    lines = ["\t".join([*fields, "n", "p50_ms", "p95_ms"])]
+    for key, group in sorted(groups.items(), key=lambda item: (-item[1]["n"], item[0])):
+        durations = group["ms"]
+        p50 = str(percentile(durations, 0.5)) if durations else "-"
+        p95 = str(percentile(durations, 0.95)) if durations else "-"
+        lines.append("\t".join([*key, str(group["n"]), p50, p95]))
+    return "\n".join(lines)
+
+
+def format_event(event: dict[str, Any]) -> str:
+    duration = event.get("duration_ms")
+    return "\t".join(
+        [
+            event.get("ts") or "",
+            event.get("session") or "",
+            event.get("level") or "",
+            event.get("step") or "-",
+            f"{duration}ms" if duration is not None else "-",
+            event.get("message") or "",
+        ]
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Query F001 session events (sessions/*/*/logs/events.jsonl and archives)"
+    )
+    parser.add_argument("--days", type=int, help="Only sessions from the last N days")
+    parser.add_argument("--since", help="Only sessions from YYYY-MM-DD on")
+    parser.add_argument("--portal-key", help="Only one portal")
+    parser.add_argument("--step", help="Step name, glob allowed (STEP_05_*)")
+    parser.add_argument("--level", help="debug, info, error, timing or result")
+    parser.add_argument("--number", help="Only one GKN number")
+    parser.add_argument("--grep", help="Substring of the raw event line")
+    parser.add_argument(
+        "--count-by",
+        help="Aggregate instead of listing, e.g. step or portal,day (also: status, session)",
+    )
+    parser.add_argument("--limit", type=int, default=0, help="List at most N events")
+    parser.add_argument("--json", action="store_true", help="Print events as JSON lines")
+    parser.add_argument("--no-archive", action="store_true", help="Skip archive/*.zip")
+    args = parser.parse_args(argv)
+
+    since = args.since
+    if args.days is not None:
+        since = max(since or "", (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d"))
+    query = EventFilter(since, args.portal_key, args.step, args.level, args.number, args.grep)
+    events = iter_events(query, archived=not args.no_archive)
+
+    if args.count_by:
+        fields = [name.strip() for name in args.count_by.split(",") if name.strip()]
+        groups = aggregate(events, fields)
+        if not groups:
+            print("Brak zdarzeń.")
+            return 0
+        print(format_groups(groups, fields))
+        return 0
+    shown = 0
+    for event in events:
+        print(json.dumps(event, ensure_ascii=False) if args.json else format_event(event))
+        shown += 1
+        if args.limit and shown >= args.limit:
+            break
+    if not shown:
+        print("Brak zdarzeń.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import re
 import threading
 import tkinter as tk
 from pathlib import Path
@@ -8,18 +9,21 @@ from typing import Optional
 from tkinter import messagebox, ttk
 
 from runtime_utils import (
-    cleanup_sessions,
     clear_sessions,
+    clear_storage_state,
     create_session,
     ensure_runtime_files,
     load_json,
+    load_run_info,
     panel_state_path,
     portals_path,
     read_latest_session,
     save_json,
     selectors_path,
     session_paths,
+    settings_path,
     update_run_info,
+    write_json_atomic,
 )
 
 PORTALS = {
@@ -49,15 +53,27 @@ class F001Panel:
         self.session_info: dict[str, str] = {}
 
         ensure_runtime_files()
-        cleanup_sessions()
 
         self.portals = load_json(portals_path(), {})
         self.selectors = load_json(selectors_path(), {})
+        self.settings = load_json(settings_path(), {})
         self.state_path = panel_state_path()
         self.panel_state = load_json(self.state_path, {})
         self.case_dir_var = tk.StringVar(value=self.panel_state.get("last_case_dir", ""))
+        self.warm_browser = None
+        if self.settings.get("warm_browser", True):
+            from automation.warm_browser import WarmBrowser
+
+            self.warm_browser = WarmBrowser(
+                open_portal=bool(self.settings.get("warm_open_portal", True))
+            )
 
         self._build_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._warm_up()
+        from session_gc import start_session_gc
+
+        start_session_gc(on_done=lambda report: self.root.after(0, self._show_gc_report, report))
 
     def _build_ui(self) -> None:
         header = ttk.Frame(self.root, padding=10)
@@ -110,6 +126,13 @@ class F001Panel:
         ttk.Checkbutton(
             number_frame, text="DEBUG (screenshot po każdym kroku)", variable=self.debug_var
         ).pack(side="left", padx=10)
+        self.fast_var = tk.BooleanVar(value=bool(self.settings.get("fast_mode", False)))
+        ttk.Checkbutton(
+            number_frame,
+            text="Tryb szybki (bez okna, bez obrazków)",
+            variable=self.fast_var,
+            command=self._save_fast_mode,
+        ).pack(side="left", padx=10)
 
         status_frame = ttk.Labelframe(self.root, text="Status", padding=10)
         status_frame.pack(fill="x", padx=10, pady=5)
@@ -138,11 +161,12 @@ class F001Panel:
         ttk.Button(
             actions_frame, text="Otwórz folder sesji", command=self._open_session_folder
         ).pack(side="left", padx=5)
-        ttk.Button(
+        self.clear_button = ttk.Button(
             actions_frame,
             text="Wyczyść tylko logi/screeny",
             command=self._clear_session_data,
-        ).pack(side="left", padx=5)
+        )
+        self.clear_button.pack(side="left", padx=5)
 
         downloads_frame = ttk.Labelframe(self.root, text="Dane pobrane", padding=10)
         downloads_frame.pack(fill="x", padx=10, pady=5)
@@ -185,6 +209,19 @@ class F001Panel:
         if self.session_root:
             update_run_info(self.session_root, {"portal_key": key})
         self._refresh_portal_view()
+        self._warm_up()
+
+    def _warm_up(self, reset: bool = False) -> None:
+        """Start Chromium (and open the selected portal) before START is pressed."""
+        if self.warm_browser is None:
+            return
+        portal_data = self.portals.get(self.portal_key) if self.portal_key else None
+        self.warm_browser.warm(self.portal_key, portal_data, fast=self.fast_var.get(), reset=reset)
+
+    def _on_close(self) -> None:
+        if self.warm_browser is not None:
+            self.warm_browser.close()
+        self.root.destroy()
 
     def _refresh_portal_view(self) -> None:
         if not self.portal_key:
@@ -220,8 +257,10 @@ class F001Panel:
             "password": self.password_var.get().strip(),
         }
         save_json(portals_path(), self.portals)
+        clear_storage_state(self.portal_key)
         self.edit_mode = False
         self._refresh_portal_view()
+        self._warm_up(reset=True)
 
     def _save_and_retry(self) -> None:
         self._save_portal()
@@ -240,11 +279,15 @@ class F001Panel:
             self._refresh_portal_view()
             messagebox.showwarning("F001", "Brak danych portalu. Uzupełnij pola.")
             return
-        number = self.number_var.get().strip()
-        if not number:
+        numbers = [item.strip() for item in re.split(r"[,;\n]", self.number_var.get())]
+        numbers = [item for item in numbers if item]
+        if not numbers:
             messagebox.showwarning("F001", "Wpisz numer GKN.")
             return
-        self._run_flow(number)
+        if len(numbers) > 1:
+            self._run_batch(numbers)
+            return
+        self._run_flow(numbers[0])
 
     def _run_flow(self, number: str, retry: bool = False) -> None:
         self.start_button.state(["disabled"])
@@ -254,9 +297,14 @@ class F001Panel:
         self.screenshot_var.set("")
         self.open_screenshot_button.state(["disabled"])
 
-        self.session_root = create_session(self.portal_key or "UNKNOWN", number)
+        from automation.checkpoints import resumable_session
+
+        resumed = resumable_session(self.portal_key, number)
+        if resumed:
+            self.message_var.set("Wznawianie poprzedniej próby...")
+        self.session_root = resumed or create_session(self.portal_key or "UNKNOWN", number)
         self.session_info = session_paths(self.session_root)
-        run_data = load_json(self.session_info["run_path"], {})
+        run_data = load_run_info(self.session_root)
         run_count = run_data.get("run_count", 0) + 1
         update_run_info(
             self.session_root,
@@ -278,22 +326,105 @@ class F001Panel:
         from automation.portal_runner import run_portal_flow
 
         portal_data = self.portals.get(self.portal_key, {}) if self.portal_key else {}
-        result = run_portal_flow(
-            number,
-            portal_data,
-            self.selectors,
-            self.session_info,
-            debug=self.debug_var.get(),
-        )
+        result = None
+        if self.warm_browser is not None and self.warm_browser.available and self.portal_key:
+            try:
+                result = self.warm_browser.run(
+                    number,
+                    self.portal_key,
+                    portal_data,
+                    self.selectors,
+                    self.session_info,
+                    debug=self.debug_var.get(),
+                    fast=self.fast_var.get(),
+                )
+            except Exception:
+                result = None
+        if result is None:
+            result = run_portal_flow(
+                number,
+                portal_data,
+                self.selectors,
+                self.session_info,
+                debug=self.debug_var.get(),
+                fast=self.fast_var.get(),
+            )
         update_run_info(
             self.session_root,
             {
                 "last_status": result.status,
                 "last_step": result.last_step,
             },
+            flush=True,
         )
         self.root.after(0, lambda: self._handle_result(result, number, retry))
 
+    def _save_fast_mode(self) -> None:
+        # settings.json may have changed since the panel started (GC, archive):
+        # merge into the current file instead of writing the startup snapshot.
+        try:
+            settings = load_json(settings_path(), {})
+        except (OSError, ValueError):
+            settings = dict(self.settings)
+        settings["fast_mode"] = self.fast_var.get()
+        write_json_atomic(settings_path(), settings)
+        self.settings = settings
+        self._warm_up()
+
+    def _run_batch(self, numbers: list[str]) -> None:
+        self.start_button.state(["disabled"])
+        self.message_var.set(f"Batch: 0/{len(numbers)}...")
+        self.last_step_var.set("-")
+        self.found_var.set("-")
+        self.screenshot_var.set("")
+        self.open_screenshot_button.state(["disabled"])
+        thread = threading.Thread(
+            target=self._run_batch_thread,
+            args=(numbers,),
+            daemon=True,
+        )
+        thread.start()
+
+    def _run_batch_thread(self, numbers: list[str]) -> None:
+        from automation.portal_runner import run_portal_batch
+
+        portal_key = self.portal_key or "UNKNOWN"
+        portal_data = self.portals.get(portal_key, {})
+        done: list[str] = []
+
+        def _on_result(number: str, result, session_info: dict[str, str]) -> None:
+            done.append(number)
+            if session_info:
+                self.session_root = session_info["session_root"]
+                self.session_info = session_info
+            progress = f"Batch: {len(done)}/{len(numbers)} ({number}: {result.last_step})"
+            self.root.after(0, lambda: self.message_var.set(progress))
+
+        results = run_portal_batch(
+            numbers,
+            portal_key,
+            portal_data,
+            self.selectors,
+            debug=self.debug_var.get(),
+            on_result=_on_result,
+            fast=self.fast_var.get(),
+        )
+        self.root.after(0, lambda: self._handle_batch_result(results))
+
+    def _handle_batch_result(self, results) -> None:
+        self.start_button.state(["!disabled"])
+        if not results:
+            return
+        found = [result for _number, result in results if result.found]
+        _last_number, last_result = results[-1]
+        self.last_step_var.set(last_result.last_step)
+        self.found_var.set(f"ZNALEZIONO {len(found)}/{len(results)}")
+        self.message_var.set(f"Batch zakończony: {len(found)}/{len(results)} znalezionych")
+        for result in reversed(found):
+            if result.case_dir:
+                self._set_case_dir(result.case_dir, result.case_files or [])
+                break
+
     def _handle_result(self, result, number: str, retry: bool) -> None:
         self.start_button.state(["!disabled"])
         self.last_step_var.set(result.last_step)
@@ -356,11 +487,43 @@ class F001Panel:
         self.panel_state["last_case_files"] = files
         save_json(self.state_path, self.panel_state)
 
+    def _show_gc_report(self, report) -> None:
+        # Do not overwrite the status of a lookup started in the meantime.
+        if report.removed and self.message_var.get() == "-":
+            self.message_var.set(report.summary())
+
     def _clear_session_data(self) -> None:
         if not messagebox.askyesno("F001", "Usunąć tylko logi i screeny z sesji?"):
             return
-        clear_sessions()
-        messagebox.showinfo("F001", "Sesje wyczyszczone.")
+        self.clear_button.state(["disabled"])
+        self.message_var.set("Czyszczenie sesji...")
+        # Packing the archives can take minutes: off the Tk thread. Not a
+        # daemon, so closing the panel waits instead of cutting a zip short.
+        thread = threading.Thread(target=self._clear_session_data_thread)
+        thread.start()
+
+    def _clear_session_data_thread(self) -> None:
+        from session_archive import archive_all_sessions, archive_enabled
+
+        error = None
+        if archive_enabled():
+            packed, total = archive_all_sessions()
+            if packed < total:
+                error = f"Spakowano {packed} z {total} sesji — sesje nie zostały usunięte."
+        if error is None:
+            clear_sessions()
+        try:
+            self.root.after(0, lambda: self._handle_sessions_cleared(error))
+        except (RuntimeError, tk.TclError):
+            pass  # Panel closed meanwhile.
+
+    def _handle_sessions_cleared(self, error: Optional[str]) -> None:
+        self.clear_button.state(["!disabled"])
+        self.message_var.set("-")
+        if error:
+            messagebox.showerror("F001", error)
+        else:
+            messagebox.showinfo("F001", "Sesje wyczyszczone.")
 
 
 def main() -> None:
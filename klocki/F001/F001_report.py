@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from runtime_utils import SESSIONS_DIR, load_json
+
+ALL_PORTALS = "*"
+
+
+def percentile(values: list[int], fraction: float) -> int:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def iter_session_timings(
+    days: Optional[int] = None,
+    portal_key: Optional[str] = None,
+) -> list[tuple[str, dict[str, Any]]]:
+    """(portal_key, timings) of every session under sessions/*/* with timings."""
+    found: list[tuple[str, dict[str, Any]]] = []
+    if not os.path.isdir(SESSIONS_DIR):
+        return found
+    cutoff = None
+    if days is not None:
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    for date_name in sorted(os.listdir(SESSIONS_DIR)):
+        if cutoff and date_name < cutoff:
+            continue
+        date_dir = os.path.join(SESSIONS_DIR, date_name)
+        if not os.path.isdir(date_dir):
+            continue
+        for session_name in sorted(os.listdir(date_dir)):
+            run_path = os.path.join(date_dir, session_name, "run.json")
+            try:
+                run_info = load_json(run_path, {})
+            except (OSError, ValueError):
+                continue
+            timings = run_info.get("timings")
+            if not timings:
+                continue
+            portal = (run_info.get("portal_key") or "UNKNOWN").lower()
+            if portal_key and portal != portal_key.lower():
+                continue
+            found.append((portal, timings))
+    return found
+
+
+def collect(
+    sessions: list[tuple[str, dict[str, Any]]],
+) -> dict[tuple[str, str], dict[str, list[int]]]:
+    """Durations per (portal, step); portal ``*`` aggregates all portals."""
+    samples: dict[tuple[str, str], dict[str, list[int]]] = {}
+
+    def _add(portal: str, step: str, total: int, wait: int) -> None:
+        entry = samples.setdefault((portal, step), {"total": [], "wait": []})
+        entry["total"].append(total)
+        entry["wait"].append(wait)
+
+    for portal, timings in sessions:
+        per_step: dict[str, list[int]] = {}
+        for item in timings.get("steps", []):
+            durations = per_step.setdefault(item["step"], [0, 0])
+            durations[0] += item.get("duration_ms", 0)
+            durations[1] += item.get("wait_ms", 0)
+        per_step["TOTAL"] = [timings.get("total_ms", 0), sum(d[1] for d in per_step.values())]
+        for step, (total, wait) in per_step.items():
+            _add(portal, step, total, wait)
+            _add(ALL_PORTALS, step, total, wait)
+    return samples
+
+
+def format_report(samples: dict[tuple[str, str], dict[str, list[int]]]) -> str:
+    header = f"{'portal':<14} {'step':<36} {'n':>5} {'p50':>8} {'p95':>8} {'max':>8} {'wait p50':>9}"
+    lines = [header, "-" * len(header)]
+    for portal, step in sorted(samples, key=lambda key: (key[0] != ALL_PORTALS, key)):
+        totals = samples[(portal, step)]["total"]
+        waits = samples[(portal, step)]["wait"]
+        lines.append(
+            f"{portal:<14} {step:<36} {len(totals):>5} "
+            f"{percentile(totals, 0.5):>8} {percentile(totals, 0.95):>8} {max(totals):>8} "
+            f"{percentile(waits, 0.5):>9}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="F001 step latency report (ms) from sessions/*/*/run.json"
+    )
+    parser.add_argument("--days", type=int, help="Only sessions from the last N days")
+    parser.add_argument("--portal-key", help="Only one portal")
+    args = parser.parse_args()
+
+    sessions = iter_session_timings(args.days, args.portal_key)
+    if not sessions:
+        print("Brak sesji z pomiarami czasu.")
+        return
+    print(f"Sesje: {len(sessions)}")
+    print(format_report(collect(sessions)))
+
+
+if __name__ == "__main__":
+    main()
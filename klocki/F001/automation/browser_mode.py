@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from runtime_utils import load_json, settings_path
+
+FAST_BLOCKED_TYPES = ("image", "font", "stylesheet", "media")
+CAPTURE_LOAD_TIMEOUT_MS = 5_000
+
+# Re-requests what the fast mode blocked (stylesheets, images) so a capture
+# shows the real page; resolves once everything loaded or the budget ran out.
+_RESTORE_SCRIPT = """
+(timeoutMs) => {
+  const pending = [];
+  const track = (el) => pending.push(new Promise((resolve) => {
+    el.addEventListener("load", resolve, { once: true });
+    el.addEventListener("error", resolve, { once: true });
+  }));
+  document.querySelectorAll('link[rel~="stylesheet"]').forEach((link) => {
+    const copy = link.cloneNode(true);
+    track(copy);
+    link.replaceWith(copy);
+  });
+  document.querySelectorAll("img[src]").forEach((img) => {
+    const src = img.getAttribute("src");
+    track(img);
+    img.setAttribute("src", src);
+  });
+  const deadline = new Promise((resolve) => setTimeout(resolve, timeoutMs));
+  return Promise.race([Promise.all(pending), deadline])
+    .then(() => (document.fonts ? document.fonts.ready : null))
+    .then(() => pending.length);
+}
+"""
+
+
+@dataclass(frozen=True)
+class BrowserMode:
+    headless: bool = False
+    blocked: frozenset[str] = frozenset()
+
+
+def resolve_browser_mode(fast: Optional[bool] = None, debug: bool = False) -> BrowserMode:
+    """Browser settings for a run; ``fast=None`` reads ``fast_mode`` from settings.json."""
+    settings = load_json(settings_path(), {})
+    if fast is None:
+        fast = bool(settings.get("fast_mode", False))
+    if not fast:
+        return BrowserMode()
+    if debug:
+        # DEBUG screenshots after every step must show the real page.
+        return BrowserMode(headless=True)
+    blocked = settings.get("fast_block_resources") or FAST_BLOCKED_TYPES
+    return BrowserMode(headless=True, blocked=frozenset(blocked))
+
+
+_BLOCKING: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+
+async def install_blocking(context: Any, mode: BrowserMode) -> None:
+    if not mode.blocked:
+        return
+
+    async def _route(route: Any) -> None:
+        if route.request.resource_type in mode.blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", _route)
+    _BLOCKING[context] = _route
+
+
+@asynccontextmanager
+async def faithful_capture(page: Any) -> AsyncIterator[None]:
+    """Lift resource blocking (and reload what it skipped) for a screenshot."""
+    context = page.context
+    handler = _BLOCKING.get(context)
+    if handler is None:
+        yield
+        return
+    try:
+        await context.unroute("**/*", handler)
+        for frame in page.frames:
+            try:
+                await frame.evaluate(_RESTORE_SCRIPT, CAPTURE_LOAD_TIMEOUT_MS)
+            except Exception:
+                pass
+    except Exception:
+        pass
+    try:
+        yield
+    finally:
+        try:
+            await context.route("**/*", handler)
+        except Exception:
+            pass
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from runtime_utils import SESSIONS_DIR, flush_sessions, load_json, load_run_info, update_run_info
+
+# Steps of one lookup in order; each stores its output in run.json so a
+# retry of the same number continues after the last one that succeeded.
+STEP_LOGIN = "login"
+STEP_LOOKUP = "lookup"
+STEP_EXPORT = "export"
+STEP_POSTPROCESS = "postprocess"
+CHECKPOINT_STEPS = (STEP_LOGIN, STEP_LOOKUP, STEP_EXPORT, STEP_POSTPROCESS)
+
+# Older checkpoints are not trusted (portal session and work URL expire).
+RESUME_MAX_AGE = timedelta(hours=1)
+
+
+def load_checkpoints(session_info: dict[str, str], number: str) -> dict[str, dict[str, Any]]:
+    """Completed steps of ``number`` in this session: step -> saved output."""
+    try:
+        data = load_run_info(session_info["session_root"]).get("checkpoints") or {}
+    except (OSError, ValueError):
+        return {}
+    if data.get("number") != number:
+        return {}
+    return data.get("steps") or {}
+
+
+def save_checkpoint(
+    session_info: dict[str, str],
+    number: str,
+    step: str,
+    output: Optional[dict[str, Any]] = None,
+) -> None:
+    """Mark ``step`` done; later steps of an earlier attempt are dropped."""
+    steps = load_checkpoints(session_info, number)
+    order = CHECKPOINT_STEPS.index(step)
+    steps = {name: value for name, value in steps.items() if CHECKPOINT_STEPS.index(name) < order}
+    steps[step] = {"at": datetime.now().isoformat(timespec="seconds"), **(output or {})}
+    update_run_info(
+        session_info["session_root"],
+        {"checkpoints": {"number": number, "steps": steps}},
+        flush=True,
+    )
+
+
+def last_checkpoint(steps: dict[str, dict[str, Any]]) -> Optional[str]:
+    done = [name for name in CHECKPOINT_STEPS if name in steps]
+    return done[-1] if done else None
+
+
+def _fresh(steps: dict[str, dict[str, Any]]) -> bool:
+    stamps = [item.get("at") for item in steps.values() if item.get("at")]
+    if not stamps:
+        return False
+    try:
+        newest = max(datetime.fromisoformat(stamp) for stamp in stamps)
+    except ValueError:
+        return False
+    return datetime.now() - newest <= RESUME_MAX_AGE
+
+
+def resumable_session(portal_key: Optional[str], number: str) -> Optional[str]:
+    """Newest session of ``portal_key``/``number`` that stopped before postprocess.
+
+    Only today's sessions with checkpoints younger than ``RESUME_MAX_AGE``
+    are considered; a finished (postprocessed) lookup is never resumed.
+    The session is reused in place: its exports, screenshots and downloads
+    may be hardlinks shared through blobs/, so every writer replaces files
+    (``write_text_atomic``, ``break_hardlink``) instead of rewriting them.
+    """
+    date_dir = os.path.join(SESSIONS_DIR, datetime.now().strftime("%Y-%m-%d"))
+    if not portal_key or not os.path.isdir(date_dir):
+        return None
+    # Sessions are scanned on disk; unsaved state of this process goes first.
+    flush_sessions()
+    for name in sorted(os.listdir(date_dir), reverse=True):
+        session_root = os.path.join(date_dir, name)
+        try:
+            run_info = load_json(os.path.join(session_root, "run.json"), {})
+        except (OSError, ValueError):
+            continue
+        if (run_info.get("portal_key") or "").lower() != portal_key.lower():
+            continue
+        if run_info.get("last_number") != number:
+            continue
+        checkpoints = run_info.get("checkpoints") or {}
+        steps = checkpoints.get("steps") or {}
+        if checkpoints.get("number") != number or STEP_POSTPROCESS in steps:
+            return None
+        return session_root if steps and _fresh(steps) else None
+    return None
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable, Optional
+
+PID_ATTR = "data-f001-pid"
+
+# One evaluate per frame: tags inputs/buttons with a probe id and returns
+# everything the detection helpers need, so they decide in Python without
+# a Playwright roundtrip per count()/nth()/is_visible()/get_attribute().
+_PROBE_SCRIPT = """
+(opts) => {
+  const attr = opts.attr;
+  const norm = (text) => (text || "").replace(/\\s+/g, " ").trim();
+  const visible = (el) => {
+    if (!el || !el.isConnected) return false;
+    const rect = el.getBoundingClientRect();
+    if (rect.width <= 0 || rect.height <= 0) return false;
+    return getComputedStyle(el).visibility !== "hidden";
+  };
+  document.querySelectorAll("[" + attr + "]").forEach((el) => el.removeAttribute(attr));
+  let nextPid = 0;
+  const mark = (el) => {
+    el.setAttribute(attr, String(nextPid));
+    return nextPid++;
+  };
+  const pidOf = (el) => Number(el.getAttribute(attr));
+
+  const inputEls = Array.from(document.querySelectorAll("input"));
+  const inputs = inputEls.map((el) => ({
+    pid: mark(el),
+    type: el.getAttribute("type"),
+    id: el.getAttribute("id"),
+    name: el.getAttribute("name"),
+    placeholder: el.getAttribute("placeholder"),
+    ariaLabel: el.getAttribute("aria-label"),
+    value: el.getAttribute("value"),
+    disabled: el.hasAttribute("disabled"),
+    visible: visible(el),
+  }));
+  const buttons = Array.from(document.querySelectorAll("button")).map((el) => ({
+    pid: mark(el),
+    text: norm(el.textContent),
+    visible: visible(el),
+  }));
+  const dialogs = Array.from(document.querySelectorAll("div.ui-dialog")).map((el) => ({
+    visible: visible(el),
+    buttons: Array.from(el.querySelectorAll("div.ui-dialog-buttonpane button")).map(pidOf),
+  }));
+
+  const listSubmit = (formId) => {
+    const found = Array.from(
+      document.querySelectorAll("form#" + formId + " input[type=submit]")
+    ).find(visible);
+    return found ? pidOf(found) : null;
+  };
+
+  const allText = document.documentElement ? document.documentElement.textContent || "" : "";
+  const shownText = document.body ? document.body.innerText || "" : "";
+  const lower = allText.toLowerCase();
+  const shownLower = shownText.toLowerCase();
+
+  const labelInputs = {};
+  for (const label of opts.labels || []) {
+    const pids = [];
+    if (document.body && allText.includes(label)) {
+      const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+      while (walker.nextNode()) {
+        const owner = walker.currentNode.parentElement;
+        if (!owner || !norm(walker.currentNode.data).includes(label)) continue;
+        const next = inputEls.find(
+          (input) =>
+            (owner.compareDocumentPosition(input) & Node.DOCUMENT_POSITION_FOLLOWING) &&
+            !owner.contains(input) &&
+            input.getAttribute("type") !== "hidden" &&
+            !input.hasAttribute("disabled")
+        );
+        if (next) pids.push(pidOf(next));
+      }
+    }
+    labelInputs[label] = pids;
+  }
+
+  return {
+    url: location.href,
+    inputs,
+    buttons,
+    dialogs,
+    labelInputs,
+    inputCount: inputs.length,
+    passwordCount: inputs.filter((item) => (item.type || "").toLowerCase() === "password").length,
+    hasUserText: lower.includes("użytkownik"),
+    hasHasloText: lower.includes("hasło"),
+    userTextVisible: shownLower.includes("użytkownik"),
+    hasloTextVisible: shownLower.includes("hasło"),
+    lists: {
+      unfinished: listSubmit("form_kerglista"),
+      finished: listSubmit("form_kerglistaz"),
+    },
+  };
+}
+"""
+
+
+async def probe_frame(
+    frame: Any,
+    labels: Iterable[str] = (),
+) -> Optional[dict[str, Any]]:
+    """Snapshot a frame in one browser roundtrip; ``None`` if it cannot run."""
+    try:
+        return await frame.evaluate(
+            _PROBE_SCRIPT,
+            {"attr": PID_ATTR, "labels": list(labels)},
+        )
+    except Exception:
+        return None
+
+
+def pid_locator(frame: Any, pid: int) -> Any:
+    return frame.locator(f"[{PID_ATTR}='{pid}']")
+
+
+def first_pid(
+    records: Iterable[dict[str, Any]],
+    predicate: Callable[[dict[str, Any]], bool] = lambda item: True,
+) -> Optional[int]:
+    for item in records:
+        if item.get("visible") and predicate(item):
+            return item["pid"]
+    return None
+
+
+def input_type(item: dict[str, Any]) -> str:
+    return (item.get("type") or "").lower()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Optional
+
+EVENTS_FILE = "events.jsonl"
+# Buffered events are written at this size, on errors and when the lookup ends.
+FLUSH_EVENTS = 64
+
+LEVEL_DEBUG = "debug"
+LEVEL_INFO = "info"
+LEVEL_ERROR = "error"
+LEVEL_TIMING = "timing"
+LEVEL_RESULT = "result"
+
+_STEP_MESSAGE = re.compile(r"^(STEP_\w+):\s*(.*)$", re.S)
+
+
+def events_path(logs_dir: str) -> str:
+    return os.path.join(logs_dir, EVENTS_FILE)
+
+
+def session_id(session_root: str) -> str:
+    """``YYYY-MM-DD/<session folder>``: the session path under sessions/."""
+    session_root = os.path.abspath(session_root)
+    return f"{os.path.basename(os.path.dirname(session_root))}/{os.path.basename(session_root)}"
+
+
+def split_step(message: str) -> tuple[Optional[str], str]:
+    """``"STEP_05_X: text"`` -> ``("STEP_05_X", "text")``."""
+    match = _STEP_MESSAGE.match(message)
+    if match:
+        return match.group(1), match.group(2)
+    return None, message
+
+
+def _append(path: str, lines: list[str]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write("".join(lines))
+
+
+class EventLog:
+    """Append-only JSONL events of one lookup (``logs/events.jsonl``).
+
+    Every event carries the session, portal and number, so queries across
+    sessions need no other file. Lines are buffered and appended in one
+    write; :meth:`flush` runs on errors, every ``FLUSH_EVENTS`` events and
+    at the end of the lookup.
+    """
+
+    def __init__(self, logs_dir: str, session: str, portal_key: str, number: str) -> None:
+        self.path = events_path(logs_dir)
+        self.base = {"session": session, "portal": (portal_key or "").lower(), "number": number}
+        self._buffer: list[str] = []
+
+    def emit(
+        self,
+        step: Optional[str],
+        level: str = LEVEL_INFO,
+        message: str = "",
+        duration_ms: Optional[int] = None,
+        payload: Optional[dict[str, Any]] = None,
+    ) -> None:
+        event = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            **self.base,
+            "step": step,
+            "level": level,
+            "message": message,
+        }
+        if duration_ms is not None:
+            event["duration_ms"] = duration_ms
+        if payload:
+            event["payload"] = payload
+        self._buffer.append(json.dumps(event, ensure_ascii=False) + "\n")
+        if level == LEVEL_ERROR or len(self._buffer) >= FLUSH_EVENTS:
+            self.flush()
+
+    def flush(self) -> None:
+        lines, self._buffer = self._buffer, []
+        if lines:
+            try:
+                _append(self.path, lines)
+            except OSError:
+                pass
+
+
+_EVENTS: ContextVar[Optional[EventLog]] = ContextVar("f001_event_log", default=None)
+
+
+def begin_events(logs_dir: str, session: str, portal_key: str, number: str) -> EventLog:
+    """Start the event log of a lookup in the current task."""
+    log = EventLog(logs_dir, session, portal_key, number)
+    _EVENTS.set(log)
+    return log
+
+
+def finish_events() -> None:
+    log = _EVENTS.get()
+    if log is not None:
+        _EVENTS.set(None)
+        log.flush()
+
+
+def emit_event(
+    logs_dir: str,
+    step: Optional[str],
+    level: str = LEVEL_INFO,
+    message: str = "",
+    duration_ms: Optional[int] = None,
+    payload: Optional[dict[str, Any]] = None,
+) -> None:
+    """Event for the running lookup; outside one it is appended right away."""
+    log = _EVENTS.get()
+    if log is None or log.path != events_path(logs_dir):
+        session_root = os.path.dirname(logs_dir)
+        log = EventLog(logs_dir, session_id(session_root), "", "")
+        log.emit(step, level, message, duration_ms, payload)
+        log.flush()
+        return
+    log.emit(step, level, message, duration_ms, payload)
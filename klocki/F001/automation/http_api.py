@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import ipaddress
+import json
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from automation.worker_pool import PortalJob, PortalWorkerPool
+
+DEFAULT_API_PORT = 8766
+MAX_WAIT_SECONDS = 30
+# Requests parked in ``?wait=`` at once; more are answered without waiting.
+MAX_WAITING_REQUESTS = 8
+LOCAL_HOST_NAMES = ("localhost", "127.0.0.1", "::1")
+# Finished jobs kept for polling; the oldest are forgotten first.
+MAX_KEPT_JOBS = 1000
+
+
+def job_payload(job: PortalJob) -> dict[str, Any]:
+    return {
+        "job_id": job.job_id,
+        "portal_key": job.portal_key,
+        "number": job.number,
+        "status": job.status,
+        "submitted_at": job.submitted_at,
+        "session_root": job.session_root,
+        "result": asdict(job.result) if job.result else None,
+    }
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _wait_seconds(query: str) -> float:
+    try:
+        wait = float(parse_qs(query).get("wait", ["0"])[0])
+    except ValueError:
+        return 0.0
+    if not math.isfinite(wait):
+        return 0.0
+    return min(max(wait, 0.0), MAX_WAIT_SECONDS)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_ApiServer"
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _send(self, status: int, payload: Any) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, {"error": message})
+
+    def _allowed(self) -> bool:
+        """Loopback client and a ``Host`` naming this server (no DNS rebinding)."""
+        if not _is_loopback(self.client_address[0]):
+            self._error(403, "localhost only")
+            return False
+        try:
+            host = urlsplit("//" + (self.headers.get("Host") or ""))
+            port = host.port or 80
+        except ValueError:
+            host, port = None, 0
+        if host is None or host.hostname not in LOCAL_HOST_NAMES or port != self.server.port:
+            self._error(403, "invalid Host header")
+            return False
+        return True
+
+    def do_GET(self) -> None:
+        if not self._allowed():
+            return
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["health"]:
+            self._send(200, self.server.api.health())
+        elif parts == ["jobs"]:
+            self._send(200, {"jobs": [job_payload(job) for job in self.server.api.jobs()]})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self.server.api.get(parts[1], _wait_seconds(url.query))
+            if job is None:
+                self._error(404, "unknown job_id")
+            else:
+                self._send(200, job_payload(job))
+        else:
+            self._error(404, "not found")
+
+    def do_POST(self) -> None:
+        if not self._allowed():
+            return
+        if urlsplit(self.path).path.rstrip("/") != "/jobs":
+            self._error(404, "not found")
+            return
+        # Browsers send text/plain and form posts cross-site without asking.
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+        if content_type.lower() != "application/json":
+            self._error(415, "Content-Type must be application/json")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._error(400, "invalid JSON")
+            return
+        requests = body.get("jobs") if isinstance(body, dict) and "jobs" in body else [body]
+        if not isinstance(requests, list) or not all(isinstance(item, dict) for item in requests):
+            self._error(400, "expected {portal_key, number} or {jobs: [...]}")
+            return
+        missing = [
+            item for item in requests if not item.get("portal_key") or not item.get("number")
+        ]
+        if missing:
+            self._error(400, "portal_key and number are required")
+            return
+        try:
+            jobs = [
+                self.server.api.submit(
+                    str(item["portal_key"]), str(item["number"]), bool(item.get("debug", False))
+                )
+                for item in requests
+            ]
+        except RuntimeError as exc:
+            self._error(503, str(exc))
+            return
+        self._send(202, {"jobs": [job_payload(job) for job in jobs]})
+
+
+class _ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], api: "LookupApi") -> None:
+        super().__init__(address, _Handler)
+        self.api = api
+        self.port = self.server_address[1]
+
+
+class LookupApi:
+    """Localhost HTTP/JSON front of a :class:`PortalWorkerPool`.
+
+    ``POST /jobs`` with ``{"portal_key", "number", "debug"}`` (or
+    ``{"jobs": [...]}`` for several) queues lookups and answers 202 with their
+    ``job_id``; ``GET /jobs/<job_id>?wait=<s>`` returns status, session and the
+    ``PortalRunResult`` (including ``case_files``), optionally waiting up to
+    ``MAX_WAIT_SECONDS`` for the job to finish; ``GET /jobs`` lists known jobs
+    and ``GET /health`` the pool state. Only loopback addresses may bind and
+    connect, the ``Host`` header must name localhost on the bound port and
+    ``POST`` bodies must be ``application/json``, so web pages open in the
+    operator's browser can neither start lookups nor read results.
+    """
+
+    def __init__(
+        self,
+        pool: PortalWorkerPool,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_API_PORT,
+    ) -> None:
+        if not _is_loopback(host):
+            raise ValueError(f"LookupApi listens on localhost only, not {host}")
+        self.pool = pool
+        self._jobs: OrderedDict[str, PortalJob] = OrderedDict()
+        self._lock = threading.Lock()
+        self._waiting = threading.BoundedSemaphore(MAX_WAITING_REQUESTS)
+        self._server = _ApiServer((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def submit(self, portal_key: str, number: str, debug: bool = False) -> PortalJob:
+        job = self.pool.submit(portal_key, number, debug=debug)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > MAX_KEPT_JOBS:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.done.is_set():
+                    break
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str, wait: float = 0) -> Optional[PortalJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and wait > 0 and self._waiting.acquire(blocking=False):
+            try:
+                job.done.wait(min(wait, MAX_WAIT_SECONDS))
+            finally:
+                self._waiting.release()
+        return job
+
+    def jobs(self) -> list[PortalJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def health(self) -> dict[str, Any]:
+        jobs = self.jobs()
+        counts: dict[str, int] = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"ok": True, "max_workers": self.pool.max_workers, "jobs": counts}
+
+    def start(self) -> "LookupApi":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="F001-api", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread (stopped with Ctrl+C or :meth:`stop`)."""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from runtime_utils import load_json, queue_results_path, queue_status_path, write_json_atomic
+
+from automation.worker_pool import DEFAULT_MAX_WORKERS, DEFAULT_PORTAL_LIMIT, PortalWorkerPool
+
+DEFAULT_POLL_SECONDS = 1.0
+
+
+@dataclass
+class QueueEntry:
+    """One line of the queue file; ``offset``/``end`` are its byte range."""
+
+    offset: int
+    end: int
+    job_id: str
+    portal_key: str = ""
+    number: str = ""
+    debug: bool = False
+    error: Optional[str] = None
+
+
+def parse_queue_line(offset: int, end: int, raw: bytes) -> Optional[QueueEntry]:
+    """``None`` for blank lines; a line that is not a valid job gets ``error``."""
+    text = raw.decode("utf-8", errors="replace").strip()
+    if not text:
+        return None
+    entry = QueueEntry(offset=offset, end=end, job_id=str(offset))
+    try:
+        data = json.loads(text)
+    except ValueError as exc:
+        entry.error = f"invalid JSON ({exc})"
+        return entry
+    if not isinstance(data, dict):
+        entry.error = "not a JSON object"
+        return entry
+    entry.job_id = str(data.get("id") or offset)
+    entry.portal_key = str(data.get("portal_key") or "").strip()
+    entry.number = str(data.get("number") or "").strip()
+    entry.debug = bool(data.get("debug", False))
+    if not entry.portal_key or not entry.number:
+        entry.error = "portal_key and number are required"
+    return entry
+
+
+class QueueDaemon:
+    """Run lookups appended to a JSONL queue file on one warm worker pool.
+
+    Each queue line is ``{"portal_key": ..., "number": ..., "debug": false,
+    "id": optional}``. Results are appended to ``results_path`` (one JSON
+    line per job, fsynced), progress goes to ``status_path``. The byte offset
+    of the first unfinished line is kept in ``<queue>.offset``: after a crash
+    only unfinished lines are read again, and lines whose result was already
+    written are skipped. At most ``max_workers`` jobs run at once (and
+    ``per_portal`` per powiat); Playwright and Chromium stay up between jobs.
+    """
+
+    def __init__(
+        self,
+        queue_file: str,
+        results_path: Optional[str] = None,
+        status_path: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        per_portal: int = DEFAULT_PORTAL_LIMIT,
+        fast: Optional[bool] = None,
+        poll_interval: float = DEFAULT_POLL_SECONDS,
+    ) -> None:
+        self.queue_file = os.path.abspath(queue_file)
+        self.results_path = results_path or queue_results_path()
+        self.status_path = status_path or queue_status_path()
+        self.offset_path = f"{self.queue_file}.offset"
+        self.max_workers = max(1, max_workers)
+        self.per_portal = per_portal
+        self.fast = fast
+        self.poll_interval = poll_interval
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._inflight: dict[str, QueueEntry] = {}
+        self._pending: list[QueueEntry] = []
+        self._finished: set[int] = set()
+        self._read_pos = 0
+        self._committed = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def _load_offset(self) -> None:
+        try:
+            offset = int(load_json(self.offset_path, {}).get("offset", 0))
+        except (OSError, ValueError, TypeError):
+            offset = 0
+        size = os.path.getsize(self.queue_file) if os.path.exists(self.queue_file) else 0
+        if offset > size:
+            # Queue file was truncated or replaced: start over.
+            offset = 0
+        self._read_pos = self._committed = offset
+        self._finished = self._finished_offsets(offset)
+
+    def _finished_offsets(self, offset: int) -> set[int]:
+        """Lines past ``offset`` that already have a result (finished before a crash)."""
+        finished: set[int] = set()
+        if not os.path.exists(self.results_path):
+            return finished
+        with open(self.results_path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    continue
+                if data.get("queue") == self.queue_file and data.get("offset", -1) >= offset:
+                    finished.add(data["offset"])
+        return finished
+
+    def _read_new(self, limit: int) -> list[QueueEntry]:
+        entries: list[QueueEntry] = []
+        if limit <= 0 or not os.path.exists(self.queue_file):
+            return entries
+        if os.path.getsize(self.queue_file) < self._read_pos:
+            with self._lock:
+                self._read_pos = self._committed = 0
+                self._finished.clear()
+        with open(self.queue_file, "rb") as handle:
+            handle.seek(self._read_pos)
+            while len(entries) < limit:
+                raw = handle.readline()
+                if not raw.endswith(b"\n"):
+                    # Nothing more, or a line still being appended.
+                    break
+                offset, self._read_pos = self._read_pos, self._read_pos + len(raw)
+                entry = parse_queue_line(offset, self._read_pos, raw)
+                if entry is not None:
+                    entries.append(entry)
+        return entries
+
+    def _commit_offset(self) -> None:
+        unfinished = [*self._pending, *self._inflight.values()]
+        committed = min((entry.offset for entry in unfinished), default=self._read_pos)
+        if committed == self._committed:
+            return
+        self._committed = committed
+        self._finished = {offset for offset in self._finished if offset >= committed}
+        write_json_atomic(
+            self.offset_path,
+            {"offset": committed, "updated_at": datetime.now().isoformat(timespec="seconds")},
+            fsync=True,
+        )
+
+    def _append_result(self, entry: QueueEntry, payload: dict[str, Any]) -> None:
+        record = {
+            "id": entry.job_id,
+            "queue": self.queue_file,
+            "offset": entry.offset,
+            "portal_key": entry.portal_key,
+            "number": entry.number,
+            **payload,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        os.makedirs(os.path.dirname(self.results_path), exist_ok=True)
+        with open(self.results_path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, ensure_ascii=False))
+            handle.write("\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        if payload.get("status") == "success":
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def _dispatch(self, pool: PortalWorkerPool) -> None:
+        with self._lock:
+            entry = self._pending.pop(0)
+            if entry.offset in self._finished:
+                self._commit_offset()
+                return
+            if entry.error:
+                self._append_result(
+                    entry,
+                    {"status": "invalid", "message": "Błędny wpis kolejki", "detail": entry.error},
+                )
+                self._commit_offset()
+                return
+            job = pool.submit(entry.portal_key, entry.number, debug=entry.debug)
+            self._inflight[job.job_id] = entry
+
+    def _on_done(self, job: Any) -> None:
+        with self._lock:
+            entry = self._inflight.pop(job.job_id, None)
+            if entry is None:
+                return
+            result = job.result
+            payload: dict[str, Any] = {"status": job.status, "session_root": job.session_root}
+            if result is not None:
+                payload.update(
+                    {
+                        "status": result.status,
+                        "last_step": result.last_step,
+                        "message": result.message,
+                        "detail": result.detail,
+                        "found": result.found,
+                        "screenshot_path": result.screenshot_path,
+                        "case_dir": result.case_dir,
+                        "case_files": result.case_files,
+                    }
+                )
+            self._append_result(entry, payload)
+            self._commit_offset()
+        self._wake.set()
+
+    def _write_status(self, state: str) -> None:
+        with self._lock:
+            running = [
+                {"id": entry.job_id, "portal_key": entry.portal_key, "number": entry.number}
+                for entry in self._inflight.values()
+            ]
+            payload = {
+                "state": state,
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "heartbeat": datetime.now().isoformat(timespec="seconds"),
+                "queue": self.queue_file,
+                "results": self.results_path,
+                "offset": self._committed,
+                "running": running,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+            }
+        try:
+            write_json_atomic(self.status_path, payload, fsync=True)
+        except OSError:
+            pass
+
+    def run(self, once: bool = False) -> None:
+        """Serve the queue until :meth:`stop` (``once``: until it is drained)."""
+        self._load_offset()
+        pool = PortalWorkerPool(
+            max_workers=self.max_workers,
+            per_portal_limit=self.per_portal,
+            headless=True,
+            on_done=self._on_done,
+            fast=self.fast,
+        )
+        # Read ahead a little so per-portal limits do not starve other portals.
+        capacity = self.max_workers * 2
+        try:
+            while not self.stop_event.is_set():
+                self._wake.clear()
+                with self._lock:
+                    free = capacity - len(self._inflight)
+                entries = self._read_new(free)
+                with self._lock:
+                    self._pending.extend(entries)
+                for _entry in entries:
+                    self._dispatch(pool)
+                self._write_status("running")
+                with self._lock:
+                    idle = not self._inflight
+                if once and idle and not entries:
+                    break
+                self._wake.wait(self.poll_interval)
+        finally:
+            pool.shutdown(wait=True)
+            self._write_status("stopped")
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self._wake.set()
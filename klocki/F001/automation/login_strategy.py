@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from runtime_utils import load_json, login_strategy_path, write_json_atomic
+
+STRATEGY_SELECTORS = "selectors"
+STRATEGY_FRAME = "frame_probe"
+STRATEGY_AUTO = "auto"
+
+
+def _url_key(url: str) -> str:
+    """Frame URL without query/fragment (session tokens change per run)."""
+    parts = urlsplit(url or "")
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def _load_strategies(path: str) -> dict[str, Any]:
+    """Saved strategies; an unreadable or torn file counts as nothing learned."""
+    try:
+        payload = load_json(path, {})
+    except (OSError, ValueError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def learned_login(portal_key: Optional[str]) -> Optional[dict[str, Any]]:
+    """Strategy that last logged in to ``portal_key`` successfully, if any."""
+    if not portal_key:
+        return None
+    entry = _load_strategies(login_strategy_path()).get(portal_key.lower()) or {}
+    return entry.get("learned")
+
+
+def frame_matches(frame: Any, learned: dict[str, Any]) -> bool:
+    name = learned.get("frame_name")
+    if name and frame.name == name:
+        return True
+    url = learned.get("frame_url")
+    return bool(url) and _url_key(frame.url) == url
+
+
+def record_login(
+    portal_key: Optional[str],
+    strategy: str,
+    hit: bool,
+    frame: Any = None,
+) -> None:
+    """Count a hit/miss of ``strategy``; a hit also makes it the learned path."""
+    if not portal_key:
+        return
+    path = login_strategy_path()
+    payload = _load_strategies(path)
+    entry = payload.setdefault(portal_key.lower(), {})
+    stats = entry.setdefault("stats", {}).setdefault(strategy, {"hits": 0, "misses": 0})
+    stats["hits" if hit else "misses"] += 1
+    now = datetime.now().isoformat(timespec="seconds")
+    if hit:
+        entry["learned"] = {
+            "strategy": strategy,
+            "frame_name": frame.name if frame is not None else "",
+            "frame_url": _url_key(frame.url) if frame is not None else "",
+        }
+        entry["last_success"] = now
+    else:
+        entry["last_miss"] = now
+    write_json_atomic(path, payload)
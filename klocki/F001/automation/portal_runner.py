@@ -1,24 +1,99 @@
 from __future__ import annotations
 
+import asyncio
 import importlib.util
 import json
 import os
 import re
-import random
-import shutil
-import time
+import weakref
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
+from automation.browser_mode import (
+    BrowserMode,
+    faithful_capture,
+    install_blocking,
+    resolve_browser_mode,
+)
+from automation.checkpoints import (
+    STEP_EXPORT,
+    STEP_LOGIN,
+    STEP_LOOKUP,
+    STEP_POSTPROCESS,
+    last_checkpoint,
+    load_checkpoints,
+    save_checkpoint,
+)
+from automation.event_log import (
+    LEVEL_DEBUG,
+    LEVEL_ERROR,
+    LEVEL_INFO,
+    LEVEL_RESULT,
+    LEVEL_TIMING,
+    begin_events,
+    emit_event,
+    finish_events,
+    session_id,
+    split_step,
+)
+from automation.dom_probe import first_pid, input_type, pid_locator, probe_frame
+from automation.login_strategy import (
+    STRATEGY_AUTO,
+    STRATEGY_FRAME,
+    STRATEGY_SELECTORS,
+    frame_matches,
+    learned_login,
+    record_login,
+)
+from automation.step_timing import begin_timing, finish_timing, mark_step, step_totals, waiting
+from automation.waits import (
+    DIALOG_CLOSE_TIMEOUT_MS,
+    DIALOG_DEADLINE_MS,
+    DIALOG_SETTLE_MS,
+    FRAME_TIMEOUT_MS,
+    LEARNED_LOGIN_TIMEOUT_MS,
+    LOGIN_DETECT_TIMEOUT_MS,
+    LOGIN_SUBMIT_TIMEOUT_MS,
+    frame_list,
+    wait_for_named_frame,
+    wait_hidden,
+    wait_in_any_frame,
+)
+from automation.work_details import WORK_VIEW_SELECTOR, WorkDetails, extract_work_details
+from automation.work_lists import work_lists
+from blob_store import (
+    blob_path,
+    compress_session_files,
+    intern_file,
+    link_blob,
+    record_blobs,
+    runtime_relpath,
+)
 from runtime_utils import (
+    break_hardlink,
     case_root,
+    catalog,
+    clear_storage_state,
+    create_session,
+    link_or_copy,
     load_json,
+    load_manifest,
+    load_run_info,
     portals_path,
     sanitize_gkn,
+    session_paths,
+    storage_state_path,
     update_manifest,
+    update_run_info,
+    valid_storage_state,
+    write_text_atomic,
 )
 
+# After runtime_utils, which puts klocki/ on sys.path.
+from _shared.geometry import parse_polygon_text, write_polygon_json
+
 
 @dataclass
 class PortalRunResult:
@@ -32,10 +107,14 @@ class PortalRunResult:
     case_files: Optional[list[str]] = None
 
 
-def _log_event(log_path: str, message: str) -> None:
+def _log_event(log_path: str, message: str, level: str = LEVEL_INFO) -> None:
+    step, text = split_step(message)
+    if step:
+        mark_step(step)
     os.makedirs(os.path.dirname(log_path), exist_ok=True)
     with open(log_path, "a", encoding="utf-8") as log_file:
         log_file.write(f"{message}\n")
+    emit_event(os.path.dirname(log_path), step, level, text)
 
 
 def _log_critical(critical_path: str, message: str) -> None:
@@ -44,7 +123,7 @@ def _log_critical(critical_path: str, message: str) -> None:
         log_file.write(f"- {message}\n")
 
 
-def _take_screenshot(page: Any, screens_dir: str, step: str) -> Optional[str]:
+async def _take_screenshot(page: Any, screens_dir: str, step: str) -> Optional[str]:
     if page is None:
         return None
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -52,22 +131,30 @@ def _take_screenshot(page: Any, screens_dir: str, step: str) -> Optional[str]:
     os.makedirs(screens_dir, exist_ok=True)
     screenshot_path = os.path.join(screens_dir, filename)
     try:
-        page.screenshot(path=screenshot_path, full_page=True)
-        return screenshot_path
+        break_hardlink(screenshot_path)
+        async with faithful_capture(page):
+            await page.screenshot(path=screenshot_path, full_page=True)
     except Exception:
         return None
+    _store_blob(os.path.dirname(screens_dir), screenshot_path)
+    return screenshot_path
 
 
-def _load_portal_key(session_info: dict[str, str]) -> Optional[str]:
-    run_path = session_info.get("run_path")
-    if not run_path or not os.path.exists(run_path):
-        return None
+def _store_blob(session_root: str, path: str, compress: bool = False) -> Optional[str]:
+    """Move ``path`` into blobs/ and list its hash in the session manifest."""
     try:
-        with open(run_path, "r", encoding="utf-8") as handle:
-            data = json.load(handle)
-        return data.get("portal_key")
-    except Exception:
+        digest = intern_file(path, compress=compress)
+    except OSError:
+        return None
+    record_blobs(session_root, {runtime_relpath(path): digest})
+    return digest
+
+
+def _load_portal_key(session_info: dict[str, str]) -> Optional[str]:
+    session_root = session_info.get("session_root")
+    if not session_root:
         return None
+    return load_run_info(session_root).get("portal_key")
 
 
 def _resolve_portal_data(portal_data: dict[str, Any], portal_key: Optional[str]) -> dict[str, Any]:
@@ -89,34 +176,34 @@ def _resolve_portal_data(portal_data: dict[str, Any], portal_key: Optional[str])
     return {}
 
 
-def _first_visible(locator: Any) -> Any:
+async def _first_visible(locator: Any) -> Any:
     try:
-        count = locator.count()
+        count = await locator.count()
     except Exception:
         return None
     for index in range(count):
         item = locator.nth(index)
         try:
-            if item.is_visible():
+            if await item.is_visible():
                 return item
         except Exception:
             continue
     return None
 
 
-def _locator_from_selector(page: Any, selector: Optional[str]) -> Any:
+async def _locator_from_selector(page: Any, selector: Optional[str]) -> Any:
     if not selector:
         return None
-    return _first_visible(page.locator(selector))
+    return await _first_visible(page.locator(selector))
 
 
-def _auto_detect_username(page: Any) -> Any:
+async def _auto_detect_username(page: Any) -> Any:
     for label in ("Użytkownik", "Uzytkownik"):
-        locator = _first_visible(page.get_by_label(label, exact=False))
+        locator = await _first_visible(page.get_by_label(label, exact=False))
         if locator:
             return locator
     for label in ("Użytkownik", "Uzytkownik"):
-        locator = _first_visible(
+        locator = await _first_visible(
             page.locator(
                 "xpath=//*[contains(normalize-space(.),"
                 f" '{label}')]/following::input[not(@type='hidden')"
@@ -125,19 +212,19 @@ def _auto_detect_username(page: Any) -> Any:
         )
         if locator:
             return locator
-    return _first_visible(
+    return await _first_visible(
         page.locator(
             "input:not([type='hidden']):not([type='password']):not([disabled])"
         )
     )
 
 
-def _auto_detect_password(page: Any) -> Any:
-    locator = _first_visible(page.locator("input[type='password']"))
+async def _auto_detect_password(page: Any) -> Any:
+    locator = await _first_visible(page.locator("input[type='password']"))
     if locator:
         return locator
     for label in ("Hasło", "Haslo"):
-        locator = _first_visible(
+        locator = await _first_visible(
             page.locator(
                 "xpath=//*[contains(normalize-space(.),"
                 f" '{label}')]/following::input[not(@type='hidden')"
@@ -149,48 +236,48 @@ def _auto_detect_password(page: Any) -> Any:
     return None
 
 
-def _auto_detect_submit(page: Any) -> Any:
-    locator = _first_visible(
+async def _auto_detect_submit(page: Any) -> Any:
+    locator = await _first_visible(
         page.get_by_role("button", name=re.compile("Zaloguj|Loguj", re.I))
     )
     if locator:
         return locator
-    return _first_visible(page.get_by_text("Zaloguj", exact=False))
+    return await _first_visible(page.get_by_text("Zaloguj", exact=False))
 
 
-def _locator_frame(locator: Any, fallback: Any) -> Any:
+async def _locator_frame(locator: Any, fallback: Any) -> Any:
     if not locator:
         return fallback
     try:
-        handle = locator.element_handle()
+        handle = await locator.element_handle()
     except Exception:
         return fallback
     if not handle:
         return fallback
     try:
-        return handle.owner_frame() or fallback
+        return await handle.owner_frame() or fallback
     except Exception:
         return fallback
 
 
-def _same_element(first: Any, second: Any) -> bool:
+async def _same_element(first: Any, second: Any) -> bool:
     if not first or not second:
         return False
     try:
-        first_handle = first.element_handle()
-        second_handle = second.element_handle()
+        first_handle = await first.element_handle()
+        second_handle = await second.element_handle()
     except Exception:
         return False
     if not first_handle or not second_handle:
         return False
     try:
-        return first_handle.evaluate("(el, other) => el === other", second_handle)
+        return await first_handle.evaluate("(el, other) => el === other", second_handle)
     except Exception:
         return False
 
 
-def _visible_input_from_label(frame: Any, label: str) -> Any:
-    return _first_visible(
+async def _visible_input_from_label(frame: Any, label: str) -> Any:
+    return await _first_visible(
         frame.locator(
             "xpath=//*[contains(normalize-space(),"
             f" '{label}')]/following::input[not(@type='hidden') and not(@disabled)][1]"
@@ -198,198 +285,247 @@ def _visible_input_from_label(frame: Any, label: str) -> Any:
     )
 
 
-def find_login_in_any_frame(page: Any) -> Optional[tuple[Any, Any, Any, Any]]:
-    frames = [page.main_frame]
-    frames.extend(frame for frame in page.frames if frame != page.main_frame)
-    for _ in range(30):
-        for frame in frames:
-            try:
-                has_login_text = frame.locator("text=Użytkownik").count() > 0
-                has_password = frame.locator("input[type='password']").count() > 0
-            except Exception:
-                continue
-            if not (has_login_text or has_password):
-                continue
+def _login_hint(frame: Any) -> Any:
+    return frame.locator("input[type='password']").or_(frame.locator("text=Użytkownik"))
 
-            user_locator = _visible_input_from_label(frame, "Użytkownik")
-            if not user_locator:
-                user_locator = _visible_input_from_label(frame, "Uzytkownik")
-            if not user_locator:
-                user_locator = _first_visible(
-                    frame.locator(
-                        "input:not([type='hidden']):not([type='password']):not([type='submit']):not([type='button']):not([disabled])"
-                    )
-                )
 
-            pass_locator = _first_visible(frame.locator("input[type='password']"))
-            if not pass_locator:
-                pass_locator = _visible_input_from_label(frame, "Hasło")
-            if not pass_locator:
-                pass_locator = _visible_input_from_label(frame, "Haslo")
-            if not pass_locator:
-                pass_locator = None
+LOGIN_LABELS = ("Użytkownik", "Uzytkownik", "Hasło", "Haslo")
 
-            submit_locator = _first_visible(frame.locator("button:has-text('Zaloguj')"))
-            if not submit_locator:
-                submit_locator = _first_visible(
-                    frame.locator("input[type='submit'][value*='Zaloguj']")
-                )
-            if not submit_locator:
-                submit_locator = _first_visible(
-                    frame.locator("input[type='button'][value*='Zaloguj']")
-                )
 
-            if user_locator and pass_locator and not _same_element(user_locator, pass_locator):
-                return frame, user_locator, pass_locator, submit_locator
-        time.sleep(0.5)
+def _login_pids(snapshot: dict[str, Any]) -> tuple[Optional[int], Optional[int], Optional[int]]:
+    """Pick user/password/submit probe ids the same way the locator cascade did."""
+    inputs = snapshot["inputs"]
+    visible_inputs = {item["pid"] for item in inputs if item["visible"]}
+
+    def _after_label(label: str) -> Optional[int]:
+        candidates = [pid for pid in snapshot["labelInputs"].get(label, []) if pid in visible_inputs]
+        return min(candidates) if candidates else None
+
+    user_pid = _after_label("Użytkownik")
+    if user_pid is None:
+        user_pid = _after_label("Uzytkownik")
+    if user_pid is None:
+        user_pid = first_pid(
+            inputs,
+            lambda item: input_type(item) not in ("hidden", "password", "submit", "button")
+            and not item["disabled"],
+        )
+
+    pass_pid = first_pid(inputs, lambda item: input_type(item) == "password")
+    if pass_pid is None:
+        pass_pid = _after_label("Hasło")
+    if pass_pid is None:
+        pass_pid = _after_label("Haslo")
+
+    submit_pid = first_pid(snapshot["buttons"], lambda item: "zaloguj" in item["text"].lower())
+    for kind in ("submit", "button"):
+        if submit_pid is None:
+            submit_pid = first_pid(
+                inputs,
+                lambda item: input_type(item) == kind and "Zaloguj" in (item["value"] or ""),
+            )
+    return user_pid, pass_pid, submit_pid
+
+
+async def _detect_login_in_frame(frame: Any) -> Optional[tuple[Any, Any, Any]]:
+    snapshot = await probe_frame(frame, labels=LOGIN_LABELS)
+    if not snapshot or not (snapshot["hasUserText"] or snapshot["passwordCount"]):
+        return None
+    user_pid, pass_pid, submit_pid = _login_pids(snapshot)
+    if user_pid is None or pass_pid is None or user_pid == pass_pid:
+        return None
+    submit_locator = pid_locator(frame, submit_pid) if submit_pid is not None else None
+    return pid_locator(frame, user_pid), pid_locator(frame, pass_pid), submit_locator
+
+
+async def find_login_in_any_frame(
+    page: Any, timeout_ms: int = LOGIN_DETECT_TIMEOUT_MS
+) -> Optional[tuple[Any, Any, Any, Any]]:
+    """Wait for the login form to show up in any frame and locate its fields.
+
+    The first pass starts as soon as a password field or the "Użytkownik"
+    label is visible; when fields are still missing, a second pass runs once
+    a password field is visible.
+    """
+    hint_locators = (_login_hint, lambda frame: frame.locator("input[type='password']"))
+    for make_locator in hint_locators:
+        hinted = await wait_in_any_frame(page, make_locator, timeout_ms)
+        if hinted is None:
+            return None
+        frames = [hinted, *(frame for frame in _all_frames(page) if frame != hinted)]
+        for frame in frames:
+            detected = await _detect_login_in_frame(frame)
+            if detected:
+                return (frame, *detected)
     return None
 
 
-def _login_form_visible(frame: Any) -> bool:
-    if not frame:
-        return False
+async def _login_from_learned(
+    page: Any, learned: dict[str, Any]
+) -> Optional[tuple[Any, Any, Any, Any]]:
+    """Locate the login form the way that worked last time for this portal.
+
+    Bounded by ``LEARNED_LOGIN_TIMEOUT_MS`` so a stale entry costs little
+    before the full cascade runs.
+    """
+    if learned.get("strategy") == STRATEGY_FRAME:
+        frame = await wait_in_any_frame(
+            page,
+            _login_hint,
+            LEARNED_LOGIN_TIMEOUT_MS,
+            accept=lambda candidate: frame_matches(candidate, learned),
+        )
+        detected = await _detect_login_in_frame(frame) if frame else None
+        return (frame, *detected) if detected else None
     try:
-        user_label = _first_visible(frame.locator("text=Użytkownik"))
-        pass_label = _first_visible(frame.locator("text=Hasło"))
-        submit = _first_visible(frame.get_by_role("button", name=re.compile("Zaloguj", re.I)))
-        if not submit:
-            submit = _first_visible(frame.locator("button:has-text('Zaloguj')"))
-        return bool(user_label and pass_label and submit)
+        with waiting():
+            await page.locator("input:not([type='hidden'])").first.wait_for(
+                state="visible", timeout=LEARNED_LOGIN_TIMEOUT_MS
+            )
     except Exception:
+        return None
+    username_locator = await _auto_detect_username(page)
+    password_locator = await _auto_detect_password(page)
+    if not username_locator or not password_locator:
+        return None
+    if await _same_element(username_locator, password_locator):
+        return None
+    return page.main_frame, username_locator, password_locator, await _auto_detect_submit(page)
+
+
+async def _login_form_visible(frame: Any) -> bool:
+    if not frame:
         return False
+    snapshot = await probe_frame(frame)
+    if not snapshot:
+        return False
+    submit_pid = first_pid(snapshot["buttons"], lambda item: "zaloguj" in item["text"].lower())
+    if submit_pid is None:
+        submit_pid = first_pid(
+            snapshot["inputs"],
+            lambda item: input_type(item) in ("submit", "button")
+            and "zaloguj" in (item["value"] or "").lower(),
+        )
+    return bool(
+        snapshot["userTextVisible"] and snapshot["hasloTextVisible"] and submit_pid is not None
+    )
 
 
 def _all_frames(page: Any) -> list[Any]:
-    frames = [page.main_frame]
-    frames.extend(frame for frame in page.frames if frame != page.main_frame)
-    return frames
+    return frame_list(page)
+
 
+async def dismiss_ok_dialogs(page: Any, settle_ms: int = DIALOG_SETTLE_MS) -> None:
+    """Click OK-like buttons of jQuery UI dialogs until none shows up.
 
-def dismiss_ok_dialogs(page: Any) -> None:
+    Returns once no dialog becomes visible within ``settle_ms``; after each
+    click it waits for that dialog to close instead of sleeping.
+    """
     okish_regex = re.compile(
         r"^\s*(OK|Dalej|Kontynuuj|Zamknij|Akceptuj|Zgadzam|Rozumiem)\s*$",
         re.I,
     )
-    try:
-        page.on("dialog", lambda dialog: dialog.accept())
-    except Exception:
-        pass
-
-    try:
-        page.wait_for_timeout(600)
-    except Exception:
-        pass
-
-    deadline = time.time() + 8
-    last_seen = time.time()
-    while time.time() < deadline:
-        clicked_any = False
-        saw_dialog = False
+    # Native JS dialogs are accepted by the handler of _new_portal_page
+    # (registered once per page; the page lives across batch lookups).
+    visible_dialogs = page.locator("div.ui-dialog:visible")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + DIALOG_DEADLINE_MS / 1000
+    while loop.time() < deadline:
         try:
-            dialog_locator = page.locator("div.ui-dialog")
-            dialog_count = dialog_locator.count()
+            with waiting():
+                await visible_dialogs.first.wait_for(state="visible", timeout=settle_ms)
         except Exception:
-            dialog_count = 0
-
-        for idx in range(dialog_count):
-            dialog = dialog_locator.nth(idx)
-            try:
-                if not dialog.is_visible():
-                    continue
-            except Exception:
-                continue
-            saw_dialog = True
-            try:
-                button_locator = dialog.locator("div.ui-dialog-buttonpane button")
-                button_count = button_locator.count()
-            except Exception:
+            break
+        snapshot = await probe_frame(page.main_frame)
+        if not snapshot:
+            break
+        buttons = {item["pid"]: item for item in snapshot["buttons"]}
+        ok_pid = None
+        for dialog in snapshot["dialogs"]:
+            if not dialog["visible"]:
                 continue
-            for button_idx in range(button_count):
-                button = button_locator.nth(button_idx)
-                try:
-                    if not button.is_visible():
-                        continue
-                    text = (button.text_content() or "").strip()
-                except Exception:
-                    continue
-                if not okish_regex.match(text):
-                    continue
-                try:
-                    button.scroll_into_view_if_needed()
-                    button.click(force=True, timeout=1500)
-                except Exception:
-                    continue
-                clicked_any = True
-                last_seen = time.time()
-                try:
-                    page.wait_for_timeout(int(random.uniform(300, 700)))
-                except Exception:
-                    pass
+            ok_pid = first_pid(
+                (buttons[pid] for pid in dialog["buttons"] if pid in buttons),
+                lambda item: bool(okish_regex.match(item["text"])),
+            )
+            if ok_pid is not None:
                 break
-
-        if clicked_any:
-            continue
-        if not saw_dialog and time.time() - last_seen >= 1.0:
+        if ok_pid is None:
             break
+        button = pid_locator(page.main_frame, ok_pid)
         try:
-            page.wait_for_timeout(250)
+            await button.click(force=True, timeout=1500)
         except Exception:
             break
+        await wait_hidden(button, DIALOG_CLOSE_TIMEOUT_MS)
 
 
-def get_frame_centr(page: Any) -> Any:
-    deadline = time.time() + 8
-    frame = None
-    while time.time() < deadline:
-        try:
-            frame = page.frame(name="frame_centr")
-        except Exception:
-            frame = None
-        if frame is not None:
-            return frame
-        try:
-            page.wait_for_timeout(250)
-        except Exception:
-            break
-    return frame
+async def get_frame_centr(page: Any) -> Any:
+    return await wait_for_named_frame(page, "frame_centr")
 
 
-def open_list(page: Any, kind: str) -> bool:
-    if kind == "unfinished":
-        selector = "form#form_kerglista input[type=submit]"
-    else:
-        selector = "form#form_kerglistaz input[type=submit]"
-    locator = _first_visible(page.locator(selector))
-    if not locator:
+def _is_frame_centr(frame: Any) -> bool:
+    return frame.name == "frame_centr"
+
+
+async def open_list(page: Any, kind: str) -> bool:
+    snapshot = await probe_frame(page.main_frame)
+    pid = snapshot["lists"].get(kind) if snapshot else None
+    if pid is None:
         return False
+    locator = pid_locator(page.main_frame, pid)
+    clicked = False
     try:
-        locator.click()
+        with waiting():
+            async with page.expect_event(
+                "framenavigated", predicate=_is_frame_centr, timeout=FRAME_TIMEOUT_MS
+            ):
+                await locator.click()
+                clicked = True
     except Exception:
-        return False
-    frame = get_frame_centr(page)
+        if not clicked:
+            return False
+    frame = await get_frame_centr(page)
     if frame:
         try:
-            frame.wait_for_load_state("domcontentloaded")
+            with waiting():
+                await frame.wait_for_load_state("domcontentloaded")
         except Exception:
             pass
-    dismiss_ok_dialogs(page)
+    await dismiss_ok_dialogs(page)
     return True
 
 
-def find_number_in_frame(frame: Any, number: str) -> Any:
+_LIST_STEPS = {
+    "unfinished": (
+        "STEP_05_NAV_ROBOTY_NIEZAKONCZONE",
+        "STEP_05_NAV_UNFINISHED_NOT_FOUND",
+        "Nie znalazłem przycisku Lista prac niezakończonych",
+        "form_kerglista",
+    ),
+    "finished": (
+        "STEP_06_NAV_ROBOTY_ZAKONCZONE",
+        "STEP_06_NAV_FINISHED_NOT_FOUND",
+        "Nie znalazłem przycisku Lista prac zakończonych",
+        "form_kerglistaz",
+    ),
+}
+
+
+async def find_number_in_frame(frame: Any, number: str) -> Any:
     if not frame:
         return None
-    locator = _first_visible(frame.get_by_text(number, exact=False))
+    locator = await _first_visible(frame.get_by_text(number, exact=False))
     if locator:
         return locator
     parts = [part for part in re.split(r"\W+", number) if part]
     if not parts:
         return None
     regex = re.compile(r"\W*".join(re.escape(part) for part in parts), re.I)
-    return _first_visible(frame.get_by_text(regex, exact=False))
+    return await _first_visible(frame.get_by_text(regex, exact=False))
 
 
-def _write_login_probe(log_path: str, page: Any) -> None:
+async def _write_login_probe(log_path: str, page: Any) -> None:
     logs_dir = os.path.dirname(log_path)
     os.makedirs(logs_dir, exist_ok=True)
     probe_path = os.path.join(logs_dir, "login_probe.json")
@@ -401,55 +537,39 @@ def _write_login_probe(log_path: str, page: Any) -> None:
 
     frames_payload: list[dict[str, Any]] = []
     for frame in page.frames:
-        inputs_payload: list[dict[str, Optional[str]]] = []
-        try:
-            input_locator = frame.locator("input")
-            input_count = input_locator.count()
-            password_count = frame.locator("input[type='password']").count()
-            has_user_text = frame.locator("text=Użytkownik").count() > 0
-            has_haslo_text = frame.locator("text=Hasło").count() > 0
-        except Exception:
-            input_count = 0
-            password_count = 0
-            has_user_text = False
-            has_haslo_text = False
-
-        for idx in range(input_count):
-            try:
-                item = input_locator.nth(idx)
-                inputs_payload.append(
-                    {
-                        "type": item.get_attribute("type"),
-                        "id": item.get_attribute("id"),
-                        "name": item.get_attribute("name"),
-                        "placeholder": item.get_attribute("placeholder"),
-                        "ariaLabel": item.get_attribute("aria-label"),
-                    }
-                )
-            except Exception:
-                continue
-
+        snapshot = await probe_frame(frame) or {}
+        inputs = snapshot.get("inputs", [])
         frames_payload.append(
             {
                 "url": frame.url,
-                "inputs": inputs_payload,
-                "passwordCount": password_count,
-                "inputCount": input_count,
-                "hasUserText": has_user_text,
-                "hasHasloText": has_haslo_text,
+                "inputs": [
+                    {
+                        "type": item["type"],
+                        "id": item["id"],
+                        "name": item["name"],
+                        "placeholder": item["placeholder"],
+                        "ariaLabel": item["ariaLabel"],
+                    }
+                    for item in inputs
+                ],
+                "passwordCount": snapshot.get("passwordCount", 0),
+                "inputCount": len(inputs),
+                "hasUserText": snapshot.get("hasUserText", False),
+                "hasHasloText": snapshot.get("hasHasloText", False),
             }
         )
 
     payload = {
-        "title": page.title(),
+        "title": await page.title(),
         "url": page.url,
         "frames": frames_payload,
     }
     with open(probe_path, "w", encoding="utf-8") as handle:
         json.dump(payload, handle, ensure_ascii=False, indent=2)
+    emit_event(logs_dir, None, LEVEL_DEBUG, "login_probe", payload=payload)
 
 
-def _login_inputs_not_found(
+async def _login_inputs_not_found(
     log_path: str,
     critical_path: str,
     page: Any,
@@ -457,10 +577,10 @@ def _login_inputs_not_found(
 ) -> PortalRunResult:
     last_step = "STEP_02_LOGIN_INPUTS_NOT_FOUND"
     message = "Nie znalazłem pól logowania automatycznie"
-    _log_event(log_path, f"{last_step}: {message}")
+    _log_event(log_path, f"{last_step}: {message}", level=LEVEL_ERROR)
     _log_critical(critical_path, f"{last_step}: {message}")
-    screenshot_path = _take_screenshot(page, screens_dir, last_step)
-    _write_login_probe(log_path, page)
+    screenshot_path = await _take_screenshot(page, screens_dir, last_step)
+    await _write_login_probe(log_path, page)
     return PortalRunResult(
         status="failed",
         last_step=last_step,
@@ -472,15 +592,15 @@ def _login_inputs_not_found(
 
 
 def _load_playwright():
-    spec = importlib.util.find_spec("playwright.sync_api")
+    spec = importlib.util.find_spec("playwright.async_api")
     if spec is None:
         return None, None
-    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
 
-    return sync_playwright, PlaywrightTimeout
+    return async_playwright, PlaywrightTimeout
 
 
-def _missing_selector_result(
+async def _missing_selector_result(
     step_label: str,
     selector_key: str,
     log_path: str,
@@ -490,9 +610,9 @@ def _missing_selector_result(
 ) -> PortalRunResult:
     last_step = f"{step_label}_MISSING_SELECTOR"
     message = f"Brak selektora: {selector_key}"
-    _log_event(log_path, f"{last_step}: {message}")
+    _log_event(log_path, f"{last_step}: {message}", level=LEVEL_ERROR)
     _log_critical(critical_path, f"{last_step}: {message}")
-    screenshot_path = _take_screenshot(page, screens_dir, last_step)
+    screenshot_path = await _take_screenshot(page, screens_dir, last_step)
     return PortalRunResult(
         status="failed",
         last_step=last_step,
@@ -503,18 +623,18 @@ def _missing_selector_result(
     )
 
 
-def _find_unfinished_link(page: Any, selector: Optional[str]) -> Any:
+async def _find_unfinished_link(page: Any, selector: Optional[str]) -> Any:
     frames = _all_frames(page)
     if selector:
         for frame in frames:
-            locator = _first_visible(frame.locator(selector))
+            locator = await _first_visible(frame.locator(selector))
             if locator:
                 return locator
     for frame in frames:
-        locator = _first_visible(frame.get_by_text("Lista prac nieza", exact=False))
+        locator = await _first_visible(frame.get_by_text("Lista prac nieza", exact=False))
         if locator:
             return locator
-        locator = _first_visible(
+        locator = await _first_visible(
             frame.locator(
                 "a:has-text('Lista prac nieza'),"
                 " button:has-text('Lista prac nieza'),"
@@ -526,10 +646,10 @@ def _find_unfinished_link(page: Any, selector: Optional[str]) -> Any:
     return None
 
 
-def _find_label_input(page: Any, label: str) -> Any:
+async def _find_label_input(page: Any, label: str) -> Any:
     frames = _all_frames(page)
     for frame in frames:
-        locator = _first_visible(
+        locator = await _first_visible(
             frame.locator(
                 "xpath=//*[contains(normalize-space(.),"
                 f" '{label}')]/following::input[1]"
@@ -540,89 +660,96 @@ def _find_label_input(page: Any, label: str) -> Any:
     return None
 
 
-def _find_submit_button(page: Any, label: str) -> Any:
+async def _find_submit_button(page: Any, label: str) -> Any:
     frames = _all_frames(page)
     for frame in frames:
-        locator = _first_visible(frame.get_by_role("button", name=label))
+        locator = await _first_visible(frame.get_by_role("button", name=label))
         if locator:
             return locator
-        locator = _first_visible(frame.get_by_text(label, exact=False))
+        locator = await _first_visible(frame.get_by_text(label, exact=False))
         if locator:
             return locator
     return None
 
 
-def _find_number_match(page: Any, number: str) -> Any:
+async def _find_number_match(page: Any, number: str) -> Any:
     frames = _all_frames(page)
     for frame in frames:
-        locator = _first_visible(frame.get_by_text(number, exact=False))
+        locator = await _first_visible(frame.get_by_text(number, exact=False))
         if locator:
             return locator
     return None
 
 
-def _export_work_artifacts(
+@dataclass
+class PageCapture:
+    """One serialisation of the page and ``frame_centr`` (``None`` = failed)."""
+
+    main_html: Optional[str]
+    main_text: Optional[str]
+    frame_html: Optional[str]
+    frame_text: Optional[str]
+
+
+async def _capture_page(page: Any, frame: Any) -> PageCapture:
+    async def _safe(awaitable: Any) -> Optional[str]:
+        try:
+            return await awaitable
+        except Exception:
+            return None
+
+    calls = [page.content(), page.locator("body").inner_text()]
+    if frame:
+        calls += [frame.content(), frame.locator("body").inner_text()]
+    results = list(await asyncio.gather(*(_safe(call) for call in calls)))
+    if not frame:
+        results += ["", ""]
+    return PageCapture(*results)
+
+
+# exports/ file -> name of its hardlink in the case folder
+EXPORT_CASE_NAMES = {
+    "main.html": "main.html",
+    "main.txt": "main.txt",
+    "frame_centr.html": "work_frame.html",
+    "frame_centr.txt": "work_frame.txt",
+}
+
+
+async def _export_work_artifacts(
     page: Any,
     frame: Any,
     session_root: str,
     screens_dir: str,
     log_path: str,
+    faithful: bool = False,
 ) -> Optional[str]:
     exports_dir = os.path.join(session_root, "exports")
     os.makedirs(exports_dir, exist_ok=True)
-    main_html_path = os.path.join(exports_dir, "main.html")
-    main_text_path = os.path.join(exports_dir, "main.txt")
-    frame_html_path = os.path.join(exports_dir, "frame_centr.html")
-    frame_text_path = os.path.join(exports_dir, "frame_centr.txt")
     screenshot_path = os.path.join(screens_dir, "work_opened.png")
-    try:
-        with open(main_html_path, "w", encoding="utf-8") as handle:
-            handle.write(page.content())
-        _log_event(log_path, f"STEP_08_EXPORT_WORK: saved {main_html_path}")
-    except Exception as exc:
-        _log_event(log_path, f"STEP_08_EXPORT_WORK: failed to save html ({exc})")
-    try:
-        with open(main_text_path, "w", encoding="utf-8") as handle:
-            handle.write(page.locator("body").inner_text())
-        _log_event(log_path, f"STEP_08_EXPORT_WORK: saved {main_text_path}")
-    except Exception as exc:
-        _log_event(log_path, f"STEP_08_EXPORT_WORK: failed to save text ({exc})")
-    if frame:
-        try:
-            with open(frame_html_path, "w", encoding="utf-8") as handle:
-                handle.write(frame.content())
-            _log_event(log_path, f"STEP_08_EXPORT_WORK: saved {frame_html_path}")
-        except Exception as exc:
-            _log_event(
-                log_path, f"STEP_08_EXPORT_WORK: failed to save frame html ({exc})"
-            )
-        try:
-            with open(frame_text_path, "w", encoding="utf-8") as handle:
-                handle.write(frame.locator("body").inner_text())
-            _log_event(log_path, f"STEP_08_EXPORT_WORK: saved {frame_text_path}")
-        except Exception as exc:
-            _log_event(
-                log_path, f"STEP_08_EXPORT_WORK: failed to save frame text ({exc})"
-            )
-    else:
-        try:
-            with open(frame_html_path, "w", encoding="utf-8") as handle:
-                handle.write("")
-            _log_event(log_path, f"STEP_08_EXPORT_WORK: saved {frame_html_path}")
-        except Exception as exc:
-            _log_event(
-                log_path, f"STEP_08_EXPORT_WORK: failed to save frame html ({exc})"
-            )
+    capture = await _capture_page(page, frame)
+    compress = compress_session_files()
+    payloads = (
+        ("main.html", capture.main_html, "html"),
+        ("main.txt", capture.main_text, "text"),
+        ("frame_centr.html", capture.frame_html, "frame html"),
+        ("frame_centr.txt", capture.frame_text, "frame text"),
+    )
+    for filename, content, label in payloads:
+        path = os.path.join(exports_dir, filename)
+        if content is None:
+            _log_event(log_path, f"STEP_08_EXPORT_WORK: failed to capture {label}")
         try:
-            with open(frame_text_path, "w", encoding="utf-8") as handle:
-                handle.write("")
-            _log_event(log_path, f"STEP_08_EXPORT_WORK: saved {frame_text_path}")
+            _write_text(path, content or "")
+            _store_blob(session_root, path, compress=compress)
+            _log_event(log_path, f"STEP_08_EXPORT_WORK: saved {path}")
         except Exception as exc:
-            _log_event(
-                log_path, f"STEP_08_EXPORT_WORK: failed to save frame text ({exc})"
-            )
+            _log_event(log_path, f"STEP_08_EXPORT_WORK: failed to save {label} ({exc})")
     try:
-        page.screenshot(path=screenshot_path, full_page=True)
+        break_hardlink(screenshot_path)
+        async with faithful_capture(page) if faithful else nullcontext():
+            await page.screenshot(path=screenshot_path, full_page=True)
+        _store_blob(session_root, screenshot_path)
         _log_event(log_path, f"STEP_08_EXPORT_WORK: saved {screenshot_path}")
         return screenshot_path
     except Exception as exc:
@@ -630,53 +757,19 @@ def _export_work_artifacts(
     return None
 
 
-def _normalize_label(text: str) -> str:
-    return re.sub(r"\s+", " ", text or "").strip()
-
-
-def _parse_polygon_coords(raw_text: str) -> list[list[list[float]]]:
-    text = (raw_text or "").strip()
-    if not text:
-        return []
-    upper = text.upper()
-    if "POLYGON" in upper:
-        groups = re.findall(r"\(([^()]+)\)", text)
-        polygons: list[list[list[float]]] = []
-        for group in groups:
-            points: list[list[float]] = []
-            for pair in group.split(","):
-                numbers = re.findall(r"-?\d+(?:[.,]\d+)?", pair)
-                if len(numbers) < 2:
-                    continue
-                x = float(numbers[0].replace(",", "."))
-                y = float(numbers[1].replace(",", "."))
-                points.append([x, y])
-            if points:
-                polygons.append(points)
-        if polygons:
-            return polygons
-    numbers = re.findall(r"-?\d+(?:[.,]\d+)?", text)
-    points = []
-    for idx in range(0, len(numbers) - 1, 2):
-        x = float(numbers[idx].replace(",", "."))
-        y = float(numbers[idx + 1].replace(",", "."))
-        points.append([x, y])
-    return [points] if points else []
-
-
 def _write_text(path: str, content: str) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as handle:
-        handle.write(content)
+    # Exports may be interned hardlinks (resumed session): never write in place.
+    write_text_atomic(path, content)
 
 
-def _copy_if_exists(source_path: str, destination_path: str) -> None:
-    if os.path.exists(source_path):
-        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
-        shutil.copyfile(source_path, destination_path)
+def _is_interned(path: str, digest: str) -> bool:
+    try:
+        return os.path.samefile(path, blob_path(digest))
+    except OSError:
+        return False
 
 
-def _postprocess_case(
+async def _postprocess_case(
     page: Any,
     frame: Any,
     number: str,
@@ -689,104 +782,78 @@ def _postprocess_case(
     os.makedirs(case_dir, exist_ok=True)
     os.makedirs(downloads_dir, exist_ok=True)
 
-    main_html_path = os.path.join(dumps_dir, "main.html")
-    main_text_path = os.path.join(dumps_dir, "main.txt")
-    frame_html_path = os.path.join(dumps_dir, "frame_centr.html")
-    frame_text_path = os.path.join(dumps_dir, "frame_centr.txt")
-
-    try:
-        _write_text(main_html_path, page.content())
-    except Exception:
-        _write_text(main_html_path, "")
-    try:
-        _write_text(main_text_path, page.inner_text("body"))
-    except Exception:
-        _write_text(main_text_path, "")
+    # exports/ already holds the captured page as blobs; dumps/ and the case
+    # folder get hardlinks to them instead of a second capture and copy.
+    # Compressed session exports stay listed in the manifest only.
+    session_root = session_info["session_root"]
+    exports_dir = os.path.join(session_root, "exports")
+    blobs = load_manifest(session_root).get("blobs", {})
+    dumps: dict[str, str] = {}
+    for filename, case_name in EXPORT_CASE_NAMES.items():
+        export_path = os.path.join(exports_dir, filename)
+        digest = blobs.get(runtime_relpath(export_path))
+        dump_path = os.path.join(dumps_dir, filename)
+        if os.path.exists(export_path):
+            # Interned or not (intern_file failed), the export file is current.
+            link_or_copy(export_path, dump_path)
+            link_or_copy(export_path, os.path.join(case_dir, case_name))
+            if digest is not None and _is_interned(export_path, digest):
+                dumps[runtime_relpath(dump_path)] = digest
+        elif digest is not None:
+            link_blob(digest, os.path.join(case_dir, case_name))
+            dumps[runtime_relpath(dump_path)] = digest
+    record_blobs(session_root, dumps)
+
+    details: Optional[WorkDetails] = None
     if frame:
-        try:
-            _write_text(frame_html_path, frame.content())
-        except Exception:
-            _write_text(frame_html_path, "")
-        try:
-            _write_text(frame_text_path, frame.inner_text("body"))
-        except Exception:
-            _write_text(frame_text_path, "")
-    else:
-        _write_text(frame_html_path, "")
-        _write_text(frame_text_path, "")
-
-    _copy_if_exists(main_html_path, os.path.join(case_dir, "main.html"))
-    _copy_if_exists(main_text_path, os.path.join(case_dir, "main.txt"))
-    _copy_if_exists(frame_html_path, os.path.join(case_dir, "work_frame.html"))
-    _copy_if_exists(frame_text_path, os.path.join(case_dir, "work_frame.txt"))
-
+        details = await extract_work_details(frame)
     meta_path = os.path.join(case_dir, "meta.json")
-    meta: dict[str, str] = {}
-    if frame:
-        table_rows = frame.locator("#dane_podstawowe_div table tr")
-        try:
-            row_count = table_rows.count()
-        except Exception:
-            row_count = 0
-        for idx in range(row_count):
-            row = table_rows.nth(idx)
-            try:
-                key = row.locator("td").nth(0).inner_text()
-                value = row.locator("td").nth(1).inner_text()
-            except Exception:
-                continue
-            key = _normalize_label(key)
-            value = _normalize_label(value)
-            if key:
-                meta[key] = value
-    with open(meta_path, "w", encoding="utf-8") as handle:
-        json.dump(meta, handle, ensure_ascii=False, indent=2)
+    write_text_atomic(
+        meta_path, json.dumps(details.meta if details else {}, ensure_ascii=False, indent=2)
+    )
 
     coords_path = os.path.join(case_dir, "polygon_coords.txt")
     coords_json_path = os.path.join(case_dir, "polygon_coords.json")
-    coords_text = ""
-    if frame:
-        try:
-            coords_text = frame.locator("#pokaz_obszary").text_content() or ""
-        except Exception:
-            coords_text = ""
-        if not coords_text.strip():
-            toggle = _first_visible(
-                frame.locator("input[value*='Pokaż/ukryj współrzędne']")
-            )
-            if toggle:
-                try:
-                    toggle.click()
-                    frame.wait_for_timeout(300)
-                except Exception:
-                    pass
-                try:
-                    coords_text = frame.locator("#pokaz_obszary").text_content() or ""
-                except Exception:
-                    coords_text = ""
+    coords_text = details.coords_text if details else ""
+    if frame and not coords_text.strip():
+        toggle = await _first_visible(
+            frame.locator("input[value*='Pokaż/ukryj współrzędne']")
+        )
+        if toggle:
+            try:
+                await toggle.click()
+                with waiting():
+                    await frame.wait_for_timeout(300)
+            except Exception:
+                pass
+            details = await extract_work_details(frame)
+            coords_text = details.coords_text if details else ""
     _write_text(coords_path, coords_text)
-    with open(coords_json_path, "w", encoding="utf-8") as handle:
-        json.dump(_parse_polygon_coords(coords_text), handle, ensure_ascii=False, indent=2)
+    write_polygon_json(coords_json_path, parse_polygon_text(coords_text))
 
     downloaded_files: list[str] = []
     if frame:
-        download_button = _first_visible(
+        download_button = await _first_visible(
             frame.locator("input[value*='Pobierz poligon/poligony']")
         )
         if download_button:
             try:
-                with page.expect_download(timeout=5000) as download_info:
-                    download_button.click()
-                download = download_info.value
+                with waiting():
+                    async with page.expect_download(timeout=5000) as download_info:
+                        await download_button.click()
+                    download = await download_info.value
                 filename = download.suggested_filename or "polygon.zip"
                 session_download_path = os.path.join(downloads_dir, filename)
                 case_download_dir = os.path.join(case_dir, "downloads")
                 os.makedirs(case_download_dir, exist_ok=True)
-                download.save_as(session_download_path)
-                shutil.copyfile(
-                    session_download_path,
-                    os.path.join(case_download_dir, filename),
-                )
+                break_hardlink(session_download_path)
+                await download.save_as(session_download_path)
+                case_download_path = os.path.join(case_download_dir, filename)
+                digest = _store_blob(session_root, session_download_path)
+                if digest:
+                    link_blob(digest, case_download_path)
+                else:
+                    link_or_copy(session_download_path, case_download_path)
                 downloaded_files.append(os.path.join(case_download_dir, filename))
             except Exception:
                 pass
@@ -808,7 +875,7 @@ def _postprocess_case(
         except Exception:
             pass
     update_manifest(
-        session_info["session_root"],
+        session_root,
         {
             "status": "postprocess_ok",
             "last_step": "POSTPROCESS",
@@ -817,332 +884,966 @@ def _postprocess_case(
             "files": key_files,
         },
     )
+    store = catalog()
+    store.upsert_case(
+        case_dir,
+        portal_key,
+        sanitize_gkn(number),
+        session_root,
+        meta=details.meta if details else {},
+        files=key_files,
+    )
+    store.set_state("last_case_dir", case_dir)
     return case_dir, key_files
 
 
-def run_portal_flow(
-    number: str,
-    portal_data: dict[str, str],
-    selectors: dict[str, Any],
-    session_info: dict[str, str],
-    debug: bool = False,
-) -> PortalRunResult:
-    log_path = session_info["log_path"]
-    critical_path = session_info["critical_path"]
-    screens_dir = session_info["screens_dir"]
-
-    sync_playwright, PlaywrightTimeout = _load_playwright()
-    if sync_playwright is None:
-        _log_event(
-            log_path,
-            "STEP_00_IMPORT_PLAYWRIGHT: Missing Playwright dependency. Install playwright.",
-        )
-        return PortalRunResult(
-            status="failed",
-            last_step="STEP_00_IMPORT_PLAYWRIGHT",
-            message="Brak Playwright – zainstaluj",
-            detail="playwright.sync_api",
-            found=False,
-        )
-
-    portal_key = _load_portal_key(session_info)
+def _resolve_run_portal(
+    portal_data: dict[str, Any],
+    portal_key: Optional[str],
+    log_path: str,
+) -> tuple[dict[str, Any], Optional[PortalRunResult]]:
     portal_data = _resolve_portal_data(portal_data, portal_key)
     if not portal_data and portal_key:
         portals = load_json(portals_path(), {})
         portal_data = _resolve_portal_data(portals, portal_key)
 
-    url = portal_data.get("url")
-    login = portal_data.get("login")
-    password = portal_data.get("password")
-    if not url:
+    if not portal_data.get("url"):
         _log_event(log_path, "STEP_00_MISSING_PORTAL_DATA: Missing portal credentials.")
-        return PortalRunResult(
+        return portal_data, PortalRunResult(
             status="failed",
             last_step="STEP_00_MISSING_PORTAL_DATA",
             message="Brak danych portalu",
             detail="url/login/password",
             found=False,
         )
-    if not login or not password:
+    if not portal_data.get("login") or not portal_data.get("password"):
         last_step = "STEP_02_CREDENTIALS_MISSING"
         message = "Brak loginu lub hasła do portalu"
         _log_event(log_path, f"{last_step}: {message}")
-        return PortalRunResult(
+        return portal_data, PortalRunResult(
             status="failed",
             last_step=last_step,
             message=message,
             detail="login/password",
             found=False,
         )
+    return portal_data, None
 
-    page = None
-    try:
-        with sync_playwright() as playwright:
-            _log_event(log_path, "STEP_01_OPEN_URL: Launching browser.")
-            browser = playwright.chromium.launch(headless=False)
-            page = browser.new_page()
-            page.on("dialog", lambda dialog: dialog.accept())
-            page.goto(url, timeout=30_000)
-            page.wait_for_load_state("domcontentloaded")
-            if debug:
-                _take_screenshot(page, screens_dir, "STEP_01_OPEN_URL")
-
-            username_selector = selectors.get("login_username")
-            password_selector = selectors.get("login_password")
-            submit_selector = selectors.get("login_submit")
-            if username_selector and password_selector and submit_selector:
-                _log_event(
-                    log_path,
-                    f"STEP_02_LOGIN_DETECTION: Using selector login_username={username_selector}",
-                )
-            else:
-                _log_event(log_path, "STEP_02_LOGIN_DETECTION: Using AUTO login detection")
-
-            username_locator = _locator_from_selector(page, username_selector)
-            password_locator = _locator_from_selector(page, password_selector)
-            submit_locator = _locator_from_selector(page, submit_selector)
-
-            login_frame = page.main_frame
-            if not username_locator or not password_locator:
-                detected = find_login_in_any_frame(page)
-                if detected:
-                    login_frame, username_locator, password_locator, detected_submit = detected
-                    if not submit_locator:
-                        submit_locator = detected_submit
-
-            if not username_locator:
-                username_locator = _auto_detect_username(page)
-            if not password_locator:
-                password_locator = _auto_detect_password(page)
-            if not submit_locator:
-                submit_locator = _auto_detect_submit(page)
 
-            if _same_element(username_locator, password_locator):
-                password_locator = None
+def _missing_playwright_result(log_path: str) -> PortalRunResult:
+    _log_event(
+        log_path,
+        "STEP_00_IMPORT_PLAYWRIGHT: Missing Playwright dependency. Install playwright.",
+    )
+    return PortalRunResult(
+        status="failed",
+        last_step="STEP_00_IMPORT_PLAYWRIGHT",
+        message="Brak Playwright – zainstaluj",
+        detail="playwright.async_api",
+        found=False,
+    )
 
-            if not username_locator or not password_locator:
-                return _login_inputs_not_found(
-                    log_path, critical_path, page, screens_dir
-                )
 
-            login_frame = _locator_frame(username_locator, login_frame)
+async def _exception_result(
+    exc: Exception,
+    is_timeout: bool,
+    page: Any,
+    session_info: dict[str, str],
+) -> PortalRunResult:
+    log_path = session_info["log_path"]
+    screens_dir = session_info["screens_dir"]
+    if is_timeout:
+        _log_event(log_path, f"STEP_99_TIMEOUT: {exc}")
+        screenshot_path = await _take_screenshot(page, screens_dir, "STEP_99_TIMEOUT")
+        return PortalRunResult(
+            status="failed",
+            last_step="STEP_99_TIMEOUT",
+            message="Timeout podczas uruchamiania Playwright",
+            detail=str(exc),
+            found=False,
+            screenshot_path=screenshot_path,
+        )
+    _log_event(log_path, f"STEP_98_ERROR: {exc}")
+    screenshot_path = await _take_screenshot(page, screens_dir, "STEP_98_ERROR")
+    return PortalRunResult(
+        status="failed",
+        last_step="STEP_98_ERROR",
+        message="Błąd podczas uruchamiania Playwright",
+        detail=str(exc),
+        found=False,
+        screenshot_path=screenshot_path,
+    )
 
-            _log_event(log_path, "STEP_02_LOGIN_FILL: Filling login form.")
-            username_locator.click()
-            username_locator.fill(login)
-            password_locator.click()
-            password_locator.fill(password)
-            try:
-                user_len = len(username_locator.input_value())
-            except Exception:
-                user_len = len(login or "")
-            try:
-                pass_len = len(password_locator.input_value())
-            except Exception:
-                pass_len = 0
-            _log_event(
-                log_path,
-                f"STEP_02_LOGIN_FILL: user_len={user_len}, password_len={pass_len}",
-            )
-            if pass_len == 0:
-                password_locator.click()
-                password_locator.press("Control+A")
-                password_locator.type(password, delay=25)
-                try:
-                    pass_len = len(password_locator.input_value())
-                except Exception:
-                    pass_len = 0
-                _log_event(
-                    log_path,
-                    f"STEP_02_LOGIN_FILL: password_len={pass_len} after fallback",
-                )
-                if pass_len == 0:
-                    last_step = "STEP_02_PASSWORD_NOT_SET"
-                    message = "Nie udało się wpisać hasła w pole hasła"
-                    _log_event(log_path, f"{last_step}: {message}")
-                    screenshot_path = _take_screenshot(page, screens_dir, last_step)
-                    return PortalRunResult(
-                        status="failed",
-                        last_step=last_step,
-                        message=message,
-                        detail="password",
-                        found=False,
-                        screenshot_path=screenshot_path,
-                    )
-            if debug:
-                _take_screenshot(page, screens_dir, "STEP_02_LOGIN_FILL")
 
-            _log_event(log_path, "STEP_03_LOGIN_SUBMIT: Submitting login form.")
-            if submit_locator:
-                submit_locator.click()
-            else:
-                try:
-                    password_locator.press("Enter")
-                except Exception:
-                    page.keyboard.press("Enter")
-            page.wait_for_load_state("domcontentloaded")
-            start_time = time.time()
-            while time.time() - start_time < 5:
-                if not _login_form_visible(login_frame):
-                    break
-                page.wait_for_timeout(500)
-
-            password_error_selector = selectors.get("password_error")
-            if password_error_selector and page.locator(password_error_selector).count() > 0:
-                _log_event(log_path, "STEP_03_LOGIN_SUBMIT: Password error detected.")
-                screenshot_path = _take_screenshot(page, screens_dir, "STEP_03_LOGIN_SUBMIT")
-                browser.close()
-                return PortalRunResult(
-                    status="password_error",
-                    last_step="STEP_03_LOGIN_SUBMIT",
-                    message="Błędne hasło",
-                    detail="password_error",
-                    found=False,
-                    screenshot_path=screenshot_path,
-                )
+# Pages whose context was created from a saved login: page -> st_mtime_ns of
+# the storage state file actually loaded. Another job may save a newer state
+# after the page was opened; only the loaded one may be judged and dropped.
+_RESTORED_STATES: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
 
-            if debug:
-                _take_screenshot(page, screens_dir, "STEP_03_LOGIN_SUBMIT")
 
-            if _login_form_visible(login_frame):
-                last_step = "STEP_03_LOGIN_FAILED_STILL_ON_FORM"
-                message = (
-                    "Logowanie nie powiodło się (nadal widzę formularz). "
-                    "Możliwe złe hasło albo nie kliknęło."
-                )
-                _log_event(log_path, f"{last_step}: {message}")
-                screenshot_path = _take_screenshot(page, screens_dir, last_step)
-                return PortalRunResult(
-                    status="failed",
-                    last_step=last_step,
-                    message=message,
-                    detail="login_form_visible",
-                    found=False,
-                    screenshot_path=screenshot_path,
-                )
+def _state_stamp(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
-            _log_event(log_path, "STEP_04_CLICK_OK_LOOP: Clicking OK dialogs.")
-            dismiss_ok_dialogs(page)
-            if debug:
-                _take_screenshot(page, screens_dir, "STEP_04_CLICK_OK_LOOP")
-
-            _log_event(log_path, "STEP_05_NAV_ROBOTY_NIEZAKONCZONE: Navigating.")
-            if not open_list(page, "unfinished"):
-                last_step = "STEP_05_NAV_UNFINISHED_NOT_FOUND"
-                message = "Nie znalazłem przycisku Lista prac niezakończonych"
-                _log_event(log_path, f"{last_step}: {message}")
-                _log_critical(critical_path, f"{last_step}: {message}")
-                screenshot_path = _take_screenshot(page, screens_dir, last_step)
-                return PortalRunResult(
-                    status="failed",
-                    last_step=last_step,
-                    message=message,
-                    detail="form_kerglista",
-                    found=False,
-                    screenshot_path=screenshot_path,
-                )
 
-            frame = get_frame_centr(page)
-            hit = find_number_in_frame(frame, number)
-            if not hit:
-                _log_event(log_path, "STEP_06_NAV_ROBOTY_ZAKONCZONE: Navigating.")
-                if not open_list(page, "finished"):
-                    last_step = "STEP_06_NAV_FINISHED_NOT_FOUND"
-                    message = "Nie znalazłem przycisku Lista prac zakończonych"
-                    _log_event(log_path, f"{last_step}: {message}")
-                    _log_critical(critical_path, f"{last_step}: {message}")
-                    screenshot_path = _take_screenshot(page, screens_dir, last_step)
-                    return PortalRunResult(
-                        status="failed",
-                        last_step=last_step,
-                        message=message,
-                        detail="form_kerglistaz",
-                        found=False,
-                        screenshot_path=screenshot_path,
-                    )
-                frame = get_frame_centr(page)
-                hit = find_number_in_frame(frame, number)
-
-            if not hit:
-                last_step = "STEP_07_NUMBER_NOT_FOUND"
-                message = "Nie znaleziono numeru zgłoszenia"
-                _log_event(log_path, f"{last_step}: {message}")
-                _log_critical(critical_path, f"{last_step}: {message}")
-                screenshot_path = _export_work_artifacts(
-                    page,
-                    frame,
-                    session_info["session_root"],
-                    screens_dir,
-                    log_path,
-                )
-                browser.close()
-                return PortalRunResult(
-                    status="failed",
-                    last_step=last_step,
-                    message=message,
-                    detail=number,
-                    found=False,
-                    screenshot_path=screenshot_path,
-                )
+def _drop_restored_state(portal_key: str, stamp: int) -> None:
+    """Remove the saved login a page was restored from, unless it was replaced since."""
+    if _state_stamp(storage_state_path(portal_key)) == stamp:
+        clear_storage_state(portal_key)
 
-            last_step = "STEP_07_NUMBER_FOUND"
-            try:
-                hit.click(force=True)
-            except Exception:
-                _log_event(log_path, f"{last_step}: failed to click match")
-            if frame:
-                try:
-                    frame.wait_for_load_state("domcontentloaded")
-                except Exception:
-                    pass
-            dismiss_ok_dialogs(page)
-
-            screenshot_path = _export_work_artifacts(
-                page,
-                frame,
-                session_info["session_root"],
-                screens_dir,
+
+async def _new_portal_page(
+    browser: Any,
+    portal_key: Optional[str],
+    log_path: Optional[str],
+    mode: BrowserMode = BrowserMode(),
+) -> Any:
+    """Open a page in a new context, restoring the saved login state if valid.
+
+    ``log_path=None`` opens it silently (pre-warmed page, no session yet).
+    """
+
+    def _note(message: str) -> None:
+        if log_path:
+            _log_event(log_path, message)
+
+    state_path = valid_storage_state(portal_key) if portal_key else None
+    stamp = _state_stamp(state_path) if state_path else None
+    if stamp is not None:
+        _note(f"STEP_01_STATE: Restoring saved session {state_path}")
+        try:
+            context = await browser.new_context(storage_state=state_path)
+        except Exception as exc:
+            _note(f"STEP_01_STATE: Saved session unreadable ({exc})")
+            _drop_restored_state(portal_key, stamp)
+            stamp = None
+            context = await browser.new_context()
+    else:
+        context = await browser.new_context()
+    if mode.blocked:
+        _note(f"STEP_01_FAST_MODE: blocking {', '.join(sorted(mode.blocked))}")
+        await install_blocking(context, mode)
+    page = await context.new_page()
+    page.on("dialog", lambda dialog: dialog.accept())
+    if stamp is not None:
+        _RESTORED_STATES[page] = stamp
+    return page
+
+
+async def _lists_available(page: Any, timeout: int = 3000) -> bool:
+    try:
+        with waiting():
+            await page.wait_for_selector(
+                "form#form_kerglista input[type=submit]", state="visible", timeout=timeout
+            )
+    except Exception:
+        return False
+    return True
+
+
+async def _save_login_state(page: Any, portal_key: Optional[str], log_path: str) -> None:
+    if not portal_key:
+        return
+    try:
+        await page.context.storage_state(path=storage_state_path(portal_key))
+        _log_event(log_path, "STEP_04_STATE_SAVED: Session saved for next runs.")
+    except Exception as exc:
+        _log_event(log_path, f"STEP_04_STATE_SAVED: failed ({exc})")
+
+
+async def _login_portal(
+    page: Any,
+    portal_data: dict[str, Any],
+    selectors: dict[str, Any],
+    session_info: dict[str, str],
+    debug: bool,
+    portal_key: Optional[str] = None,
+    opened: bool = False,
+) -> Optional[PortalRunResult]:
+    """Open the portal, log in and dismiss the OK dialogs (STEP_01..STEP_04).
+
+    When :func:`_new_portal_page` restored the page from a saved session and
+    the work lists are already available, the login steps are skipped;
+    ``opened`` means the page already shows the portal (pre-warmed). Returns
+    ``None`` when the page is ready for list navigation, otherwise the
+    failure result.
+    """
+    log_path = session_info["log_path"]
+    critical_path = session_info["critical_path"]
+    screens_dir = session_info["screens_dir"]
+    url = portal_data.get("url")
+    login = portal_data.get("login")
+    password = portal_data.get("password")
+
+    if opened:
+        _log_event(log_path, "STEP_01_OPEN_URL: Portal page already open.")
+    else:
+        await page.goto(url, timeout=30_000)
+    with waiting():
+        await page.wait_for_load_state("domcontentloaded")
+    if debug:
+        await _take_screenshot(page, screens_dir, "STEP_01_OPEN_URL")
+
+    restored = _RESTORED_STATES.get(page) if portal_key else None
+    if restored is not None:
+        if await _lists_available(page):
+            _log_event(log_path, "STEP_02_LOGIN_SKIPPED: Saved session accepted.")
+            if await _first_visible(page.locator("div.ui-dialog")):
+                await dismiss_ok_dialogs(page)
+            return None
+        _log_event(log_path, "STEP_02_STATE_REJECTED: Saved session expired, logging in.")
+        _drop_restored_state(portal_key, restored)
+
+    username_selector = selectors.get("login_username")
+    password_selector = selectors.get("login_password")
+    submit_selector = selectors.get("login_submit")
+    if username_selector and password_selector and submit_selector:
+        _log_event(
+            log_path,
+            f"STEP_02_LOGIN_DETECTION: Using selector login_username={username_selector}",
+        )
+    else:
+        _log_event(log_path, "STEP_02_LOGIN_DETECTION: Using AUTO login detection")
+
+    username_locator = await _locator_from_selector(page, username_selector)
+    password_locator = await _locator_from_selector(page, password_selector)
+    submit_locator = await _locator_from_selector(page, submit_selector)
+
+    login_frame = page.main_frame
+    strategy = STRATEGY_SELECTORS if username_locator and password_locator else None
+    learned = learned_login(portal_key)
+    learned_strategy = learned.get("strategy") if learned else None
+    if strategy is None and learned_strategy in (STRATEGY_FRAME, STRATEGY_AUTO):
+        detected = await _login_from_learned(page, learned)
+        if detected:
+            login_frame, username_locator, password_locator, detected_submit = detected
+            if not submit_locator:
+                submit_locator = detected_submit
+            strategy = learned_strategy
+            _log_event(
+                log_path, f"STEP_02_LOGIN_DETECTION: Learned {strategy} path matched."
+            )
+        else:
+            record_login(portal_key, learned_strategy, hit=False)
+            _log_event(
                 log_path,
+                f"STEP_02_LOGIN_DETECTION: Learned {learned_strategy} path missed,"
+                " trying fallbacks.",
             )
-            case_dir = None
-            case_files: list[str] = []
-            try:
-                if portal_key:
-                    case_dir, case_files = _postprocess_case(
-                        page, frame, number, portal_key, session_info
-                    )
-            except Exception as exc:
-                _log_event(log_path, f"POSTPROCESS_FAILED: {exc}")
-            browser.close()
+
+    if strategy is None:
+        if not username_locator or not password_locator:
+            detected = await find_login_in_any_frame(page)
+            if detected:
+                login_frame, username_locator, password_locator, detected_submit = detected
+                if not submit_locator:
+                    submit_locator = detected_submit
+                strategy = STRATEGY_FRAME
+
+        if not username_locator:
+            username_locator = await _auto_detect_username(page)
+        if not password_locator:
+            password_locator = await _auto_detect_password(page)
+        if not submit_locator:
+            submit_locator = await _auto_detect_submit(page)
+        strategy = strategy or STRATEGY_AUTO
+
+    if await _same_element(username_locator, password_locator):
+        password_locator = None
+
+    if not username_locator or not password_locator:
+        return await _login_inputs_not_found(log_path, critical_path, page, screens_dir)
+
+    login_frame = await _locator_frame(username_locator, login_frame)
+
+    _log_event(log_path, "STEP_02_LOGIN_FILL: Filling login form.")
+    await username_locator.click()
+    await username_locator.fill(login)
+    await password_locator.click()
+    await password_locator.fill(password)
+    try:
+        user_len = len(await username_locator.input_value())
+    except Exception:
+        user_len = len(login or "")
+    try:
+        pass_len = len(await password_locator.input_value())
+    except Exception:
+        pass_len = 0
+    _log_event(
+        log_path,
+        f"STEP_02_LOGIN_FILL: user_len={user_len}, password_len={pass_len}",
+    )
+    if pass_len == 0:
+        await password_locator.click()
+        await password_locator.press("Control+A")
+        await password_locator.type(password, delay=25)
+        try:
+            pass_len = len(await password_locator.input_value())
+        except Exception:
+            pass_len = 0
+        _log_event(
+            log_path,
+            f"STEP_02_LOGIN_FILL: password_len={pass_len} after fallback",
+        )
+        if pass_len == 0:
+            last_step = "STEP_02_PASSWORD_NOT_SET"
+            message = "Nie udało się wpisać hasła w pole hasła"
+            _log_event(log_path, f"{last_step}: {message}")
+            screenshot_path = await _take_screenshot(page, screens_dir, last_step)
             return PortalRunResult(
-                status="success",
+                status="failed",
                 last_step=last_step,
-                message="Znaleziono",
-                detail=number,
-                found=True,
+                message=message,
+                detail="password",
+                found=False,
                 screenshot_path=screenshot_path,
-                case_dir=case_dir,
-                case_files=case_files or None,
             )
-    except PlaywrightTimeout as exc:
-        _log_event(log_path, f"STEP_99_TIMEOUT: {exc}")
-        screenshot_path = _take_screenshot(page, screens_dir, "STEP_99_TIMEOUT")
+    if debug:
+        await _take_screenshot(page, screens_dir, "STEP_02_LOGIN_FILL")
+
+    _log_event(log_path, "STEP_03_LOGIN_SUBMIT: Submitting login form.")
+    if submit_locator:
+        await submit_locator.click()
+    else:
+        try:
+            await password_locator.press("Enter")
+        except Exception:
+            await page.keyboard.press("Enter")
+    with waiting():
+        await page.wait_for_load_state("domcontentloaded")
+    await wait_hidden(
+        login_frame.locator("input[type='password']"), LOGIN_SUBMIT_TIMEOUT_MS
+    )
+
+    password_error_selector = selectors.get("password_error")
+    if password_error_selector and await page.locator(password_error_selector).count() > 0:
+        _log_event(log_path, "STEP_03_LOGIN_SUBMIT: Password error detected.")
+        if portal_key:
+            clear_storage_state(portal_key)
+        screenshot_path = await _take_screenshot(page, screens_dir, "STEP_03_LOGIN_SUBMIT")
         return PortalRunResult(
-            status="failed",
-            last_step="STEP_99_TIMEOUT",
-            message="Timeout podczas uruchamiania Playwright",
-            detail=str(exc),
+            status="password_error",
+            last_step="STEP_03_LOGIN_SUBMIT",
+            message="Błędne hasło",
+            detail="password_error",
             found=False,
             screenshot_path=screenshot_path,
         )
-    except Exception as exc:
-        _log_event(log_path, f"STEP_98_ERROR: {exc}")
-        screenshot_path = _take_screenshot(page, screens_dir, "STEP_98_ERROR")
+
+    if debug:
+        await _take_screenshot(page, screens_dir, "STEP_03_LOGIN_SUBMIT")
+
+    if await _login_form_visible(login_frame):
+        last_step = "STEP_03_LOGIN_FAILED_STILL_ON_FORM"
+        message = (
+            "Logowanie nie powiodło się (nadal widzę formularz). "
+            "Możliwe złe hasło albo nie kliknęło."
+        )
+        _log_event(log_path, f"{last_step}: {message}")
+        screenshot_path = await _take_screenshot(page, screens_dir, last_step)
         return PortalRunResult(
             status="failed",
-            last_step="STEP_98_ERROR",
-            message="Błąd podczas uruchamiania Playwright",
-            detail=str(exc),
+            last_step=last_step,
+            message=message,
+            detail="login_form_visible",
+            found=False,
+            screenshot_path=screenshot_path,
+        )
+
+    record_login(portal_key, strategy, hit=True, frame=login_frame)
+    _log_event(log_path, "STEP_04_CLICK_OK_LOOP: Clicking OK dialogs.")
+    await dismiss_ok_dialogs(page)
+    if debug:
+        await _take_screenshot(page, screens_dir, "STEP_04_CLICK_OK_LOOP")
+    await _save_login_state(page, portal_key, log_path)
+    return None
+
+
+async def _open_work(
+    page: Any,
+    number: str,
+    session_info: dict[str, str],
+) -> tuple[Any, str, Optional[PortalRunResult]]:
+    """Find ``number`` on the work lists and open it (STEP_05..STEP_07).
+
+    Returns ``frame_centr`` showing the work and the URL that reopens it, or
+    the failure result. The URL is empty unless the work view appeared at an
+    address of its own (not the list's), so it is never a list URL.
+    """
+    log_path = session_info["log_path"]
+    critical_path = session_info["critical_path"]
+    screens_dir = session_info["screens_dir"]
+
+    lists = work_lists(page)
+    frame = None
+    hit = None
+    for kind in lists.search_order(number):
+        nav_step, missing_step, missing_message, form_id = _LIST_STEPS[kind]
+        frame = await get_frame_centr(page)
+        if lists.is_showing(frame, kind):
+            _log_event(log_path, f"{nav_step}: List already open.")
+        else:
+            _log_event(log_path, f"{nav_step}: Navigating.")
+            if not await open_list(page, kind):
+                _log_event(log_path, f"{missing_step}: {missing_message}", level=LEVEL_ERROR)
+                _log_critical(critical_path, f"{missing_step}: {missing_message}")
+                screenshot_path = await _take_screenshot(page, screens_dir, missing_step)
+                return None, "", PortalRunResult(
+                    status="failed",
+                    last_step=missing_step,
+                    message=missing_message,
+                    detail=form_id,
+                    found=False,
+                    screenshot_path=screenshot_path,
+                )
+            frame = await get_frame_centr(page)
+            if frame and not await lists.load(frame, kind):
+                lists.forget_view()
+        if frame and lists.rows.get(kind):
+            row = lists.find(kind, number)
+            hit = lists.target(frame, row, number) if row else None
+        else:
+            hit = await find_number_in_frame(frame, number)
+        if hit:
+            break
+
+    if not hit:
+        last_step = "STEP_07_NUMBER_NOT_FOUND"
+        message = "Nie znaleziono numeru zgłoszenia"
+        _log_event(log_path, f"{last_step}: {message}", level=LEVEL_ERROR)
+        _log_critical(critical_path, f"{last_step}: {message}")
+        screenshot_path = await _export_work_artifacts(
+            page,
+            frame,
+            session_info["session_root"],
+            screens_dir,
+            log_path,
+            faithful=True,
+        )
+        return None, "", PortalRunResult(
+            status="failed",
+            last_step=last_step,
+            message=message,
+            detail=number,
             found=False,
             screenshot_path=screenshot_path,
         )
+
+    last_step = "STEP_07_NUMBER_FOUND"
+    _log_event(log_path, f"{last_step}: Opening work.")
+    lists.forget_view()
+    list_url = frame.url if frame else ""
+    try:
+        await hit.click(force=True)
+    except Exception:
+        _log_event(log_path, f"{last_step}: failed to click match")
+    work_url = ""
+    if frame:
+        # domcontentloaded may still resolve on the list document; the work
+        # view's own table only exists once the work has loaded.
+        try:
+            with waiting():
+                await frame.wait_for_selector(
+                    WORK_VIEW_SELECTOR, state="attached", timeout=FRAME_TIMEOUT_MS
+                )
+        except Exception:
+            _log_event(log_path, f"{last_step}: work view not confirmed")
+        else:
+            if frame.url != list_url:
+                work_url = frame.url
+    await dismiss_ok_dialogs(page)
+    return frame, work_url, None
+
+
+async def _reopen_work(page: Any, work_url: Optional[str], log_path: str) -> Any:
+    """Load the work found by an earlier attempt straight into ``frame_centr``."""
+    frame = await get_frame_centr(page)
+    if frame is None or not work_url:
+        return None
+    _log_event(log_path, "STEP_07_NUMBER_FOUND: Reopening work from checkpoint.")
+    work_lists(page).forget_view()
+    try:
+        with waiting():
+            await frame.goto(work_url, wait_until="domcontentloaded")
+            await frame.wait_for_selector(WORK_VIEW_SELECTOR, timeout=FRAME_TIMEOUT_MS)
+    except Exception as exc:
+        _log_event(log_path, f"STEP_07_NUMBER_FOUND: Checkpoint URL unusable ({exc})")
+        return None
+    await dismiss_ok_dialogs(page)
+    return frame
+
+
+def _checkpoint_login(page: Any, number: str, session_info: dict[str, str]) -> None:
+    # A resumed run keeps the later checkpoints of the earlier attempt.
+    if STEP_LOGIN not in load_checkpoints(session_info, number):
+        save_checkpoint(session_info, number, STEP_LOGIN, {"url": page.url})
+
+
+def _log_resume(number: str, session_info: dict[str, str]) -> None:
+    step = last_checkpoint(load_checkpoints(session_info, number))
+    if step:
+        _log_event(session_info["log_path"], f"STEP_00_RESUME: Last completed step: {step}.")
+
+
+async def _lookup_number(
+    page: Any,
+    number: str,
+    portal_key: Optional[str],
+    session_info: dict[str, str],
+    debug: bool,
+) -> PortalRunResult:
+    """Find ``number`` and save the work (STEP_05..STEP_09) on a logged-in page.
+
+    Runs the lookup, export and postprocess steps, each checkpointed in
+    run.json. A retry in the same session reopens the known work URL and
+    skips the steps that already finished.
+    """
+    log_path = session_info["log_path"]
+    steps = load_checkpoints(session_info, number)
+    frame = None
+    if STEP_LOOKUP in steps:
+        frame = await _reopen_work(page, steps[STEP_LOOKUP].get("work_url"), log_path)
+    if frame is None:
+        frame, work_url, failure = await _open_work(page, number, session_info)
+        if failure:
+            return failure
+        # Without a URL of its own the work cannot be reopened by GET; a
+        # resume then repeats the lookup instead of waiting on a list URL.
+        save_checkpoint(session_info, number, STEP_LOOKUP, {"work_url": work_url})
+        steps = {}
+
+    if STEP_EXPORT in steps:
+        screenshot_path = steps[STEP_EXPORT].get("screenshot_path")
+        _log_event(log_path, "STEP_08_EXPORT_WORK: Already saved, skipping.")
+    else:
+        screenshot_path = await _export_work_artifacts(
+            page,
+            frame,
+            session_info["session_root"],
+            session_info["screens_dir"],
+            log_path,
+        )
+        save_checkpoint(
+            session_info, number, STEP_EXPORT, {"screenshot_path": screenshot_path}
+        )
+
+    case_dir = None
+    case_files: list[str] = []
+    try:
+        if portal_key:
+            _log_event(log_path, "STEP_09_POSTPROCESS: Writing case files.")
+            case_dir, case_files = await _postprocess_case(
+                page, frame, number, portal_key, session_info
+            )
+        save_checkpoint(
+            session_info,
+            number,
+            STEP_POSTPROCESS,
+            {"case_dir": case_dir, "case_files": case_files},
+        )
+    except Exception as exc:
+        _log_event(log_path, f"POSTPROCESS_FAILED: {exc}")
+    return PortalRunResult(
+        status="success",
+        last_step="STEP_07_NUMBER_FOUND",
+        message="Znaleziono",
+        detail=number,
+        found=True,
+        screenshot_path=screenshot_path,
+        case_dir=case_dir,
+        case_files=case_files or None,
+    )
+
+
+def _store_timings(session_info: dict[str, str]) -> Optional[dict[str, Any]]:
+    """Write the step timings of the finished lookup to run.json / manifest.json."""
+    timings = finish_timing()
+    session_root = session_info.get("session_root")
+    if not timings or not session_root:
+        return timings
+    try:
+        update_run_info(session_root, {"timings": timings})
+        update_manifest(
+            session_root,
+            {"timings": {"total_ms": timings["total_ms"], "steps": step_totals(timings)}},
+            flush=True,
+        )
+    except OSError:
+        pass
+    return timings
+
+
+def _emit_summary(
+    logs_dir: str,
+    timings: Optional[dict[str, Any]],
+    result: Optional[PortalRunResult],
+) -> None:
+    for item in (timings or {}).get("steps", []):
+        emit_event(
+            logs_dir,
+            item["step"],
+            LEVEL_TIMING,
+            duration_ms=item["duration_ms"],
+            payload={"wait_ms": item["wait_ms"], "action_ms": item["action_ms"]},
+        )
+    if result is not None:
+        emit_event(
+            logs_dir,
+            result.last_step,
+            LEVEL_RESULT,
+            result.message,
+            duration_ms=(timings or {}).get("total_ms"),
+            payload={"status": result.status, "found": result.found, "detail": result.detail},
+        )
+
+
+def _begin_lookup(
+    session_info: dict[str, str], number: str, portal_key: Optional[str] = None
+) -> None:
+    """Start step timing and the event log of one lookup (current task)."""
+    begin_timing()
+    begin_events(
+        os.path.dirname(session_info["log_path"]),
+        session_id(session_info["session_root"]),
+        portal_key or _load_portal_key(session_info) or "",
+        number,
+    )
+
+
+def _finish_lookup(session_info: dict[str, str], result: Optional[PortalRunResult]) -> None:
+    _emit_summary(os.path.dirname(session_info["log_path"]), _store_timings(session_info), result)
+    finish_events()
+
+
+async def _timed(
+    session_info: dict[str, str],
+    awaitable: Any,
+    number: str,
+    portal_key: Optional[str] = None,
+) -> PortalRunResult:
+    _begin_lookup(session_info, number, portal_key)
+    result = None
+    try:
+        result = await awaitable
+        return result
+    finally:
+        _finish_lookup(session_info, result)
+
+
+async def async_run_portal_flow(
+    number: str,
+    portal_data: dict[str, str],
+    selectors: dict[str, Any],
+    session_info: dict[str, str],
+    debug: bool = False,
+    fast: Optional[bool] = None,
+) -> PortalRunResult:
+    """Log in and look up ``number``; ``fast`` overrides ``fast_mode`` from settings.json."""
+    return await _timed(
+        session_info,
+        _portal_flow(number, portal_data, selectors, session_info, debug, fast),
+        number,
+    )
+
+
+async def _portal_flow(
+    number: str,
+    portal_data: dict[str, str],
+    selectors: dict[str, Any],
+    session_info: dict[str, str],
+    debug: bool,
+    fast: Optional[bool],
+) -> PortalRunResult:
+    log_path = session_info["log_path"]
+
+    async_playwright, PlaywrightTimeout = _load_playwright()
+    if async_playwright is None:
+        return _missing_playwright_result(log_path)
+
+    portal_key = _load_portal_key(session_info)
+    portal_data, failure = _resolve_run_portal(portal_data, portal_key, log_path)
+    if failure:
+        return failure
+
+    mode = resolve_browser_mode(fast, debug)
+    _log_resume(number, session_info)
+    page = None
+    try:
+        async with async_playwright() as playwright:
+            _log_event(log_path, "STEP_01_OPEN_URL: Launching browser.")
+            browser = await playwright.chromium.launch(headless=mode.headless)
+            page = await _new_portal_page(browser, portal_key, log_path, mode)
+            failure = await _login_portal(
+                page, portal_data, selectors, session_info, debug, portal_key
+            )
+            if failure:
+                await browser.close()
+                return failure
+            _checkpoint_login(page, number, session_info)
+            result = await _lookup_number(page, number, portal_key, session_info, debug)
+            await browser.close()
+            return result
+    except PlaywrightTimeout as exc:
+        return await _exception_result(exc, True, page, session_info)
+    except Exception as exc:
+        return await _exception_result(exc, False, page, session_info)
+
+
+def run_portal_flow(
+    number: str,
+    portal_data: dict[str, str],
+    selectors: dict[str, Any],
+    session_info: dict[str, str],
+    debug: bool = False,
+    fast: Optional[bool] = None,
+) -> PortalRunResult:
+    """Blocking wrapper around :func:`async_run_portal_flow` (panel, CLI)."""
+    return asyncio.run(
+        async_run_portal_flow(number, portal_data, selectors, session_info, debug, fast)
+    )
+
+
+async def run_portal_job(
+    browser: Any,
+    number: str,
+    portal_key: str,
+    portal_data: dict[str, Any],
+    selectors: dict[str, Any],
+    session_info: dict[str, str],
+    debug: bool = False,
+    mode: BrowserMode = BrowserMode(),
+    page: Any = None,
+) -> PortalRunResult:
+    """Run one lookup in its own context of an already launched browser.
+
+    Used by the worker pool and the panel's warm browser: the browser stays
+    open, the context (cookies, pages) is closed after the job. ``page`` is
+    a pre-opened portal page (see :func:`open_portal_page`) to start from.
+    """
+    return await _timed(
+        session_info,
+        _portal_job(
+            browser, number, portal_key, portal_data, selectors, session_info, debug, mode, page
+        ),
+        number,
+        portal_key,
+    )
+
+
+async def _portal_job(
+    browser: Any,
+    number: str,
+    portal_key: str,
+    portal_data: dict[str, Any],
+    selectors: dict[str, Any],
+    session_info: dict[str, str],
+    debug: bool,
+    mode: BrowserMode,
+    page: Any = None,
+) -> PortalRunResult:
+    log_path = session_info["log_path"]
+    _async_playwright, PlaywrightTimeout = _load_playwright()
+    portal_data, failure = _resolve_run_portal(portal_data, portal_key, log_path)
+    if failure:
+        return failure
+
+    _log_resume(number, session_info)
+    opened = page is not None
+    try:
+        if opened:
+            _log_event(log_path, "STEP_01_OPEN_URL: Using pre-opened portal page.")
+        else:
+            _log_event(log_path, "STEP_01_OPEN_URL: Opening context in shared browser.")
+            page = await _new_portal_page(browser, portal_key, log_path, mode)
+        failure = await _login_portal(
+            page, portal_data, selectors, session_info, debug, portal_key, opened
+        )
+        if failure:
+            return failure
+        _checkpoint_login(page, number, session_info)
+        return await _lookup_number(page, number, portal_key, session_info, debug)
+    except Exception as exc:
+        is_timeout = PlaywrightTimeout is not None and isinstance(exc, PlaywrightTimeout)
+        return await _exception_result(exc, is_timeout, page, session_info)
+    finally:
+        if page is not None:
+            try:
+                await page.context.close()
+            except Exception:
+                pass
+
+
+async def open_portal_page(
+    browser: Any,
+    portal_key: str,
+    portal_data: dict[str, Any],
+    mode: BrowserMode = BrowserMode(),
+) -> Any:
+    """Open the portal URL in a new context ahead of a lookup (``run_portal_job(page=...)``)."""
+    page = await _new_portal_page(browser, portal_key, None, mode)
+    try:
+        await page.goto(portal_data["url"], timeout=30_000)
+    except Exception:
+        await page.context.close()
+        raise
+    return page
+
+
+def _start_batch_session(
+    portal_key: str,
+    number: str,
+    index: int,
+    total: int,
+) -> dict[str, str]:
+    session_root = create_session(portal_key, number)
+    update_run_info(
+        session_root,
+        {
+            "portal_key": portal_key,
+            "last_number": number,
+            "run_count": 1,
+            "batch": {"index": index, "total": total},
+        },
+    )
+    return session_paths(session_root)
+
+
+def _finish_batch_session(session_info: dict[str, str], result: PortalRunResult) -> None:
+    _finish_lookup(session_info, result)
+    update_run_info(
+        session_info["session_root"],
+        {
+            "last_status": result.status,
+            "last_step": result.last_step,
+        },
+        flush=True,
+    )
+
+
+async def async_run_portal_batch(
+    numbers: list[str],
+    portal_key: str,
+    portal_data: dict[str, Any],
+    selectors: dict[str, Any],
+    debug: bool = False,
+    on_result: Optional[Callable[[str, PortalRunResult, dict[str, str]], None]] = None,
+    fast: Optional[bool] = None,
+) -> list[tuple[str, PortalRunResult]]:
+    """Look up many numbers of one portal in a single logged-in browser.
+
+    Each number gets its own session (and case on success); the login runs
+    once and is logged into the session of the first number. ``on_result``
+    is called after every number, e.g. to report progress.
+    """
+    unique_numbers = list(dict.fromkeys(item.strip() for item in numbers if item.strip()))
+    results: list[tuple[str, PortalRunResult]] = []
+    if not unique_numbers:
+        return results
+    total = len(unique_numbers)
+
+    def _record(
+        number: str,
+        result: PortalRunResult,
+        info: Optional[dict[str, str]],
+    ) -> None:
+        if info:
+            _finish_batch_session(info, result)
+        results.append((number, result))
+        if on_result:
+            on_result(number, result, info or {})
+
+    def _skip_rest(start: int, reason: PortalRunResult) -> None:
+        for number in unique_numbers[start:]:
+            _record(
+                number,
+                PortalRunResult(
+                    status=reason.status,
+                    last_step=reason.last_step,
+                    message=reason.message,
+                    detail="batch_skipped",
+                    found=False,
+                ),
+                None,
+            )
+
+    session_info = _start_batch_session(portal_key, unique_numbers[0], 1, total)
+    log_path = session_info["log_path"]
+    # Early failures below are events of the first number's lookup too.
+    _begin_lookup(session_info, unique_numbers[0], portal_key)
+
+    async_playwright, PlaywrightTimeout = _load_playwright()
+    if async_playwright is None:
+        _record(unique_numbers[0], _missing_playwright_result(log_path), session_info)
+        _skip_rest(1, results[0][1])
+        return results
+
+    portal_data, failure = _resolve_run_portal(portal_data, portal_key, log_path)
+    if failure:
+        _record(unique_numbers[0], failure, session_info)
+        _skip_rest(1, failure)
+        return results
+
+    mode = resolve_browser_mode(fast, debug)
+    page = None
+    try:
+        async with async_playwright() as playwright:
+            _log_event(log_path, f"STEP_01_OPEN_URL: Launching browser (batch of {total}).")
+            browser = await playwright.chromium.launch(headless=mode.headless)
+            page = await _new_portal_page(browser, portal_key, log_path, mode)
+            failure = await _login_portal(
+                page, portal_data, selectors, session_info, debug, portal_key
+            )
+            if failure:
+                _record(unique_numbers[0], failure, session_info)
+                _skip_rest(1, failure)
+                await browser.close()
+                return results
+
+            for index, number in enumerate(unique_numbers):
+                if index > 0:
+                    session_info = _start_batch_session(portal_key, number, index + 1, total)
+                    _begin_lookup(session_info, number, portal_key)
+                    _log_event(
+                        session_info["log_path"],
+                        f"BATCH: reusing logged-in browser ({index + 1}/{total}).",
+                    )
+                try:
+                    result = await _lookup_number(
+                        page, number, portal_key, session_info, debug
+                    )
+                except Exception as exc:
+                    result = await _exception_result(
+                        exc, isinstance(exc, PlaywrightTimeout), page, session_info
+                    )
+                _record(number, result, session_info)
+                if page.is_closed():
+                    _skip_rest(index + 1, result)
+                    break
+            await browser.close()
+    except Exception as exc:
+        if len(results) < total:
+            failure = await _exception_result(
+                exc, isinstance(exc, PlaywrightTimeout), page, session_info
+            )
+            _record(unique_numbers[len(results)], failure, session_info)
+            _skip_rest(len(results), failure)
+    return results
+
+
+def run_portal_batch(
+    numbers: list[str],
+    portal_key: str,
+    portal_data: dict[str, Any],
+    selectors: dict[str, Any],
+    debug: bool = False,
+    on_result: Optional[Callable[[str, PortalRunResult, dict[str, str]], None]] = None,
+    fast: Optional[bool] = None,
+) -> list[tuple[str, PortalRunResult]]:
+    """Blocking wrapper around :func:`async_run_portal_batch`."""
+    return asyncio.run(
+        async_run_portal_batch(
+            numbers, portal_key, portal_data, selectors, debug, on_result, fast
+        )
+    )
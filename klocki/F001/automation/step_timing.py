@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+
+class StepTimer:
+    """Start time and duration of every STEP_xx of one lookup.
+
+    A step runs from its first log event until the next step starts; the
+    part spent inside :func:`waiting` blocks is reported as ``wait_ms``.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.started_at = datetime.now().isoformat(timespec="milliseconds")
+        self.steps: list[dict[str, Any]] = []
+        self._current: Optional[dict[str, Any]] = None
+        self._step_started = 0.0
+        self._wait_depth = 0
+        self._wait_started = 0.0
+
+    def mark(self, step: str) -> None:
+        if self._current and self._current["step"] == step:
+            return
+        now = time.perf_counter()
+        self._close(now)
+        self._current = {
+            "step": step,
+            "started_at": datetime.now().isoformat(timespec="milliseconds"),
+            "duration_ms": 0,
+            "wait_ms": 0,
+            "action_ms": 0,
+        }
+        self._step_started = now
+
+    def _close(self, now: float) -> None:
+        if self._current is None:
+            return
+        if self._wait_depth:
+            self._current["wait_ms"] += round((now - self._wait_started) * 1000)
+            self._wait_started = now
+        duration = round((now - self._step_started) * 1000)
+        self._current["duration_ms"] = duration
+        self._current["action_ms"] = max(0, duration - self._current["wait_ms"])
+        self.steps.append(self._current)
+        self._current = None
+
+    def enter_wait(self) -> None:
+        if self._wait_depth == 0:
+            self._wait_started = time.perf_counter()
+        self._wait_depth += 1
+
+    def exit_wait(self) -> None:
+        self._wait_depth -= 1
+        if self._wait_depth == 0 and self._current is not None:
+            elapsed = time.perf_counter() - self._wait_started
+            self._current["wait_ms"] += round(elapsed * 1000)
+
+    def finish(self) -> dict[str, Any]:
+        self._close(time.perf_counter())
+        return {
+            "started_at": self.started_at,
+            "total_ms": round((time.perf_counter() - self.started) * 1000),
+            "steps": self.steps,
+        }
+
+
+_TIMER: ContextVar[Optional[StepTimer]] = ContextVar("f001_step_timer", default=None)
+
+
+def begin_timing() -> StepTimer:
+    """Start timing a lookup in the current task (replaces a previous timer)."""
+    timer = StepTimer()
+    _TIMER.set(timer)
+    return timer
+
+
+def finish_timing() -> Optional[dict[str, Any]]:
+    timer = _TIMER.get()
+    if timer is None:
+        return None
+    _TIMER.set(None)
+    return timer.finish()
+
+
+def mark_step(step: str) -> None:
+    timer = _TIMER.get()
+    if timer is not None:
+        timer.mark(step)
+
+
+@contextmanager
+def waiting() -> Iterator[None]:
+    """Count the enclosed block as wait time of the current step."""
+    timer = _TIMER.get()
+    if timer is None:
+        yield
+        return
+    timer.enter_wait()
+    try:
+        yield
+    finally:
+        timer.exit_wait()
+
+
+def step_totals(timings: dict[str, Any]) -> dict[str, int]:
+    """Duration per step name (repeated steps are summed)."""
+    totals: dict[str, int] = {}
+    for item in timings.get("steps", []):
+        totals[item["step"]] = totals.get(item["step"], 0) + item["duration_ms"]
+    return totals
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable, Optional
+
+from automation.step_timing import waiting
+
+# Budgets only bound the worst case; every wait returns as soon as the
+# condition holds (Playwright resolves them from DOM/frame events).
+LOGIN_DETECT_TIMEOUT_MS = 15_000
+LEARNED_LOGIN_TIMEOUT_MS = 5_000
+LOGIN_SUBMIT_TIMEOUT_MS = 5_000
+DIALOG_SETTLE_MS = 1_000
+DIALOG_DEADLINE_MS = 8_000
+DIALOG_CLOSE_TIMEOUT_MS = 2_000
+FRAME_TIMEOUT_MS = 8_000
+
+
+def frame_list(page: Any) -> list[Any]:
+    frames = [page.main_frame]
+    frames.extend(frame for frame in page.frames if frame != page.main_frame)
+    return frames
+
+
+async def wait_in_any_frame(
+    page: Any,
+    make_locator: Callable[[Any], Any],
+    timeout_ms: int,
+    state: str = "visible",
+    accept: Optional[Callable[[Any], bool]] = None,
+) -> Optional[Any]:
+    """Return the first frame in which ``make_locator(frame)`` reaches ``state``.
+
+    Frames attached while waiting are watched too; ``accept`` (checked once
+    the locator matched, when the frame URL is final) limits which frames
+    count. Returns ``None`` on timeout.
+    """
+    loop = asyncio.get_running_loop()
+    found: asyncio.Future = loop.create_future()
+    watchers: dict[Any, asyncio.Task] = {}
+
+    async def _watch(frame: Any) -> None:
+        try:
+            await make_locator(frame).first.wait_for(state=state, timeout=timeout_ms)
+        except Exception:
+            return
+        if accept is not None and not accept(frame):
+            return
+        if not found.done():
+            found.set_result(frame)
+
+    def _add(frame: Any) -> None:
+        if frame in watchers or frame.is_detached():
+            return
+        watchers[frame] = asyncio.ensure_future(_watch(frame))
+
+    for frame in frame_list(page):
+        _add(frame)
+    page.on("frameattached", _add)
+    try:
+        with waiting():
+            return await asyncio.wait_for(found, timeout_ms / 1000)
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        page.remove_listener("frameattached", _add)
+        for task in watchers.values():
+            task.cancel()
+
+
+async def wait_for_named_frame(page: Any, name: str, timeout_ms: int = FRAME_TIMEOUT_MS) -> Any:
+    frame = page.frame(name=name)
+    if frame is not None:
+        return frame
+    try:
+        with waiting():
+            return await page.wait_for_event(
+                "frameattached",
+                predicate=lambda attached: attached.name == name,
+                timeout=timeout_ms,
+            )
+    except Exception:
+        return page.frame(name=name)
+
+
+async def wait_hidden(locator: Any, timeout_ms: int) -> bool:
+    """Wait until the element is hidden or gone (a detached frame counts too)."""
+    try:
+        with waiting():
+            await locator.first.wait_for(state="hidden", timeout=timeout_ms)
+        return True
+    except Exception as exc:
+        return "detached" in str(exc).lower()
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from automation.browser_mode import BrowserMode, resolve_browser_mode
+from automation.portal_runner import (
+    PortalRunResult,
+    _load_playwright,
+    open_portal_page,
+    run_portal_job,
+)
+
+IDLE_TIMEOUT_S = 10 * 60
+HEALTH_CHECK_S = 30
+# A pre-opened portal page older than this is replaced (portal session expiry).
+READY_PAGE_MAX_AGE_S = 5 * 60
+
+
+@dataclass
+class _ReadyPage:
+    portal_key: str
+    url: str
+    mode: BrowserMode
+    page: Any
+    opened_at: float
+
+
+class WarmBrowser:
+    """Playwright and Chromium kept running for the panel between lookups.
+
+    :meth:`warm` starts them in the background (own asyncio loop thread) and
+    can open the portal URL in a fresh context, so START only has to log in
+    or reuse the saved session. :meth:`run` executes a lookup on the warm
+    browser (``run_portal_job``) and then prepares the next portal page.
+    A disconnected browser is relaunched; an idle one is closed after
+    ``idle_timeout`` seconds and started again by the next warm/run.
+    ``open_portal=False`` only keeps the browser up, without portal pages.
+    Without fast mode nothing is launched before the first lookup.
+    """
+
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT_S, open_portal: bool = True) -> None:
+        self.idle_timeout = idle_timeout
+        self.open_portal = open_portal
+        self.available = importlib.util.find_spec("playwright.async_api") is not None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._headless: Optional[bool] = None
+        self._ready: Optional[_ReadyPage] = None
+        self._warming: Optional[asyncio.Task] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._running = 0
+        self._last_used = time.monotonic()
+
+    def _submit(self, coro: Any) -> Any:
+        with self._lock:
+            if self._thread is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._serve, name="F001-warm-browser", daemon=True
+                )
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _serve(self) -> None:
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        self._browser_lock = asyncio.Lock()
+        self._watcher = loop.create_task(self._watch())
+        loop.run_forever()
+        loop.close()
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_S)
+            if self._browser is None or self._running:
+                continue
+            async with self._browser_lock:
+                if not self._browser.is_connected():
+                    self._browser = None
+                    self._ready = None
+                elif time.monotonic() - self._last_used > self.idle_timeout:
+                    await self._close_browser()
+
+    async def _shutdown(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+        await self._close_browser()
+
+    async def _close_browser(self) -> None:
+        await self._drop_ready()
+        browser, playwright = self._browser, self._playwright
+        self._browser = self._playwright = None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception:
+                pass
+
+    async def _drop_ready(self) -> None:
+        ready, self._ready = self._ready, None
+        if ready is not None:
+            try:
+                await ready.page.context.close()
+            except Exception:
+                pass
+
+    async def _browser_for(self, mode: BrowserMode) -> Any:
+        async with self._browser_lock:
+            self._last_used = time.monotonic()
+            if self._browser is not None and (
+                not self._browser.is_connected() or self._headless != mode.headless
+            ):
+                await self._close_browser()
+            if self._playwright is None:
+                async_playwright, _timeout = _load_playwright()
+                self._playwright = await async_playwright().start()
+            if self._browser is None:
+                self._browser = await self._playwright.chromium.launch(headless=mode.headless)
+                self._headless = mode.headless
+            return self._browser
+
+    def _ready_matches(self, portal_key: str, url: str, mode: BrowserMode) -> bool:
+        ready = self._ready
+        return (
+            ready is not None
+            and ready.portal_key == portal_key
+            and ready.url == url
+            and ready.mode == mode
+            and time.monotonic() - ready.opened_at <= READY_PAGE_MAX_AGE_S
+            and not ready.page.is_closed()
+        )
+
+    async def _warm(
+        self,
+        portal_key: Optional[str],
+        portal_data: Optional[dict[str, Any]],
+        mode: BrowserMode,
+        reset: bool,
+    ) -> None:
+        self._warming = asyncio.current_task()
+        try:
+            browser = await self._browser_for(mode)
+            url = (portal_data or {}).get("url") if self.open_portal else None
+            if reset or not portal_key or not url:
+                await self._drop_ready()
+            if not portal_key or not url or self._ready_matches(portal_key, url, mode):
+                return
+            await self._drop_ready()
+            page = await open_portal_page(browser, portal_key, portal_data, mode)
+            self._ready = _ReadyPage(portal_key, url, mode, page, time.monotonic())
+        except Exception:
+            # Warm-up is best effort; START launches what is missing.
+            pass
+        finally:
+            if self._warming is asyncio.current_task():
+                self._warming = None
+
+    def warm(
+        self,
+        portal_key: Optional[str] = None,
+        portal_data: Optional[dict[str, Any]] = None,
+        fast: Optional[bool] = None,
+        reset: bool = False,
+    ) -> None:
+        """Start the browser (and open ``portal_data['url']``) without waiting.
+
+        ``reset`` drops an already opened portal page (e.g. new credentials).
+        A headed Chromium (no fast mode) shows a window, so it is not launched
+        here: the first :meth:`run` starts it, later calls reuse it.
+        """
+        if not self.available:
+            return
+        mode = resolve_browser_mode(fast)
+        if not mode.headless and (self._browser is None or self._headless):
+            return
+        self._submit(self._warm(portal_key, portal_data, mode, reset))
+
+    async def _run(
+        self,
+        number: str,
+        portal_key: str,
+        portal_data: dict[str, Any],
+        selectors: dict[str, Any],
+        session_info: dict[str, str],
+        debug: bool,
+        mode: BrowserMode,
+    ) -> PortalRunResult:
+        self._running += 1
+        try:
+            if self._warming is not None:
+                # START pressed while the portal page is still loading: use it.
+                await asyncio.wait([self._warming])
+            browser = await self._browser_for(mode)
+            page = None
+            if self._ready_matches(portal_key, portal_data.get("url", ""), mode):
+                page, self._ready = self._ready.page, None
+            else:
+                await self._drop_ready()
+            return await run_portal_job(
+                browser,
+                number,
+                portal_key,
+                portal_data,
+                selectors,
+                session_info,
+                debug=debug,
+                mode=mode,
+                page=page,
+            )
+        finally:
+            self._running -= 1
+            self._last_used = time.monotonic()
+
+    def run(
+        self,
+        number: str,
+        portal_key: str,
+        portal_data: dict[str, Any],
+        selectors: dict[str, Any],
+        session_info: dict[str, str],
+        debug: bool = False,
+        fast: Optional[bool] = None,
+    ) -> PortalRunResult:
+        """Blocking lookup on the warm browser; the next portal page is opened afterwards."""
+        mode = resolve_browser_mode(fast, debug)
+        result = self._submit(
+            self._run(number, portal_key, portal_data, selectors, session_info, debug, mode)
+        ).result()
+        self.warm(portal_key, portal_data, fast)
+        return result
+
+    def close(self, timeout: float = 10) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Basic data table of an opened work; its presence means the work view loaded.
+WORK_VIEW_SELECTOR = "#dane_podstawowe_div"
+
+# One evaluate for the opened work: every row of the basic data table and
+# the coordinates text, instead of count() + two inner_text() calls per row.
+_DETAILS_SCRIPT = """
+() => {
+  const rows = Array.from(document.querySelectorAll("#dane_podstawowe_div table tr")).map(
+    (tr) => Array.from(tr.querySelectorAll("td")).map((td) => td.innerText || "")
+  );
+  const coords = document.querySelector("#pokaz_obszary");
+  return { rows, coords: coords ? coords.textContent || "" : null };
+}
+"""
+
+
+def normalize_label(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+@dataclass
+class MetaRow:
+    label: str
+    value: str
+
+
+@dataclass
+class WorkDetails:
+    """Structured fields of the work view in ``frame_centr``."""
+
+    rows: list[MetaRow]
+    coords_text: str
+
+    @property
+    def meta(self) -> dict[str, str]:
+        """``meta.json`` content: label -> value (a repeated label keeps the last value)."""
+        return {row.label: row.value for row in self.rows if row.label}
+
+
+def parse_details(raw: dict[str, Any]) -> WorkDetails:
+    rows = [
+        MetaRow(normalize_label(cells[0]), normalize_label(cells[1]))
+        for cells in raw.get("rows") or []
+        if len(cells) >= 2
+    ]
+    return WorkDetails(rows=rows, coords_text=raw.get("coords") or "")
+
+
+async def extract_work_details(frame: Any) -> Optional[WorkDetails]:
+    """Read the work view in one browser roundtrip; ``None`` if it cannot run."""
+    try:
+        raw = await frame.evaluate(_DETAILS_SCRIPT)
+    except Exception:
+        return None
+    return parse_details(raw or {})
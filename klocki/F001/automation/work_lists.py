@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import re
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+ROW_ATTR = "data-f001-row"
+LIST_KINDS = ("unfinished", "finished")
+
+# Number-like tokens inside a cell: word parts joined by punctuation,
+# e.g. "GKN.6640.5.2024" or "GK-I/123/24".
+_TOKEN_RE = re.compile(r"\w+(?:[^\w\s]+\w+)+")
+
+# One evaluate per opened list: tags every row so a hit can be clicked
+# directly, and returns the cell/link texts the index is built from.
+_ROWS_SCRIPT = """
+(attr) => Array.from(document.querySelectorAll("tr")).map((tr, index) => {
+  tr.setAttribute(attr, String(index));
+  return {
+    index,
+    visible: tr.getClientRects().length > 0,
+    cells: Array.from(tr.querySelectorAll("td, th")).map((cell) => cell.innerText || ""),
+    links: Array.from(tr.querySelectorAll("a")).map((link) => link.innerText || ""),
+  };
+})
+"""
+
+
+def normalize_gkn(text: str) -> str:
+    return ".".join(part.upper() for part in re.split(r"\W+", text or "") if part)
+
+
+def _number_regex(number: str) -> Optional[re.Pattern[str]]:
+    parts = [part for part in re.split(r"\W+", number) if part]
+    if not parts:
+        return None
+    return re.compile(r"\W*".join(re.escape(part) for part in parts), re.I)
+
+
+@dataclass
+class ListRow:
+    kind: str
+    index: int
+    cells: list[str]
+    links: list[str]
+
+
+@dataclass
+class WorkListIndex:
+    """GKN -> row map of the work lists shown in ``frame_centr``.
+
+    Kept per page for the whole browser session: a repeated or batch lookup
+    opens the list that held the number last time and clicks the row by its
+    tag instead of searching the frame text.
+    """
+
+    rows: dict[str, list[ListRow]] = field(default_factory=dict)
+    keys: dict[str, tuple[str, int]] = field(default_factory=dict)
+    showing: Optional[str] = None
+    frame_url: Optional[str] = None
+
+    async def load(self, frame: Any, kind: str) -> bool:
+        try:
+            payload = await frame.evaluate(_ROWS_SCRIPT, ROW_ATTR)
+        except Exception:
+            payload = []
+        self.rows[kind] = [
+            ListRow(kind, item["index"], item["cells"], item["links"])
+            for item in payload
+            if item.get("visible")
+        ]
+        self.keys = {}
+        for rows in self.rows.values():
+            for row in rows:
+                for cell in row.cells:
+                    for token in _TOKEN_RE.findall(cell):
+                        self.keys.setdefault(normalize_gkn(token), (row.kind, row.index))
+        self.showing = kind
+        self.frame_url = frame.url
+        return bool(self.rows[kind])
+
+    def is_showing(self, frame: Any, kind: str) -> bool:
+        return bool(frame) and self.showing == kind and frame.url == self.frame_url
+
+    def forget_view(self) -> None:
+        self.showing = None
+        self.frame_url = None
+
+    def search_order(self, number: str) -> list[str]:
+        hit = self.keys.get(normalize_gkn(number))
+        if not hit:
+            return list(LIST_KINDS)
+        return [hit[0]] + [kind for kind in LIST_KINDS if kind != hit[0]]
+
+    def find(self, kind: str, number: str) -> Optional[ListRow]:
+        rows = self.rows.get(kind, [])
+        hit = self.keys.get(normalize_gkn(number))
+        if hit and hit[0] == kind:
+            for row in rows:
+                if row.index == hit[1]:
+                    return row
+        regex = _number_regex(number)
+        if regex is None:
+            return None
+        for row in rows:
+            if any(regex.search(cell) for cell in row.cells):
+                return row
+        return None
+
+    def target(self, frame: Any, row: ListRow, number: str) -> Any:
+        """Locator of the clickable part of ``row``: its matching link or cell."""
+        locator = frame.locator(f"tr[{ROW_ATTR}='{row.index}']")
+        regex = _number_regex(number)
+        for position, text in enumerate(row.links):
+            if regex and regex.search(text):
+                return locator.locator("a").nth(position)
+        for position, text in enumerate(row.cells):
+            if regex and regex.search(text):
+                return locator.locator("td, th").nth(position)
+        return locator
+
+
+_INDEXES: "weakref.WeakKeyDictionary[Any, WorkListIndex]" = weakref.WeakKeyDictionary()
+
+
+def work_lists(page: Any) -> WorkListIndex:
+    index = _INDEXES.get(page)
+    if index is None:
+        index = WorkListIndex()
+        _INDEXES[page] = index
+    return index
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from runtime_utils import (
+    create_session,
+    load_json,
+    load_run_info,
+    portals_path,
+    selectors_path,
+    session_paths,
+    update_run_info,
+)
+
+from automation.browser_mode import resolve_browser_mode
+from automation.checkpoints import resumable_session
+from automation.portal_runner import (
+    PortalRunResult,
+    _load_playwright,
+    _missing_playwright_result,
+    run_portal_job,
+)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_PORTAL_LIMIT = 1
+
+
+@dataclass
+class PortalJob:
+    portal_key: str
+    number: str
+    debug: bool = False
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "queued"
+    submitted_at: str = field(
+        default_factory=lambda: datetime.now().isoformat(timespec="seconds")
+    )
+    session_root: Optional[str] = None
+    result: Optional[PortalRunResult] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+
+class PortalWorkerPool:
+    """Run F001 lookups for several portals at the same time.
+
+    All jobs share one Chromium process driven from a single asyncio event
+    loop (in a background thread); every job gets its own browser context.
+    ``max_workers`` caps the number of jobs in flight, and a job only starts
+    when its portal is below its limit: the global ``per_portal_limit`` or
+    ``max_concurrency`` from the portal entry in ``portals.json``.
+    ``fast`` (default: ``fast_mode`` from settings.json) runs Chromium headless
+    and blocks images, fonts and stylesheets in contexts of non-DEBUG jobs.
+    A job for a number whose earlier attempt did not finish resumes that
+    session (``resumable_session``) on the shared browser.
+    ``submit`` / ``wait`` / ``shutdown`` may be called from any thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        per_portal_limit: int = DEFAULT_PORTAL_LIMIT,
+        headless: bool = False,
+        on_done: Optional[Callable[[PortalJob], None]] = None,
+        fast: Optional[bool] = None,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.per_portal_limit = max(1, per_portal_limit)
+        self.fast = fast
+        self.headless = headless or resolve_browser_mode(fast).headless
+        self.on_done = on_done
+        self.portals: dict[str, Any] = load_json(portals_path(), {})
+        self.selectors: dict[str, Any] = load_json(selectors_path(), {})
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        # Sessions of running jobs; a retry never resumes one still in use.
+        self._active_sessions: set[str] = set()
+
+    def _portal_limit(self, portal_key: str) -> int:
+        portal_data = self.portals.get(portal_key) or {}
+        try:
+            return max(1, int(portal_data.get("max_concurrency", self.per_portal_limit)))
+        except (TypeError, ValueError):
+            return self.per_portal_limit
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._main()),
+            name="F001-worker-pool",
+            daemon=True,
+        )
+        self._thread.start()
+        self._ready.wait()
+
+    def submit(self, portal_key: str, number: str, debug: bool = False) -> PortalJob:
+        job = PortalJob(portal_key=portal_key, number=number, debug=debug)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("PortalWorkerPool is shut down")
+            self._ensure_started()
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return job
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._ready.set()
+
+        async_playwright, _timeout = _load_playwright()
+        playwright = None
+        browser_lock = asyncio.Lock()
+        browser: dict[str, Any] = {}
+        slots = asyncio.Semaphore(self.max_workers)
+        portal_slots: dict[str, asyncio.Semaphore] = {}
+        tasks: set[asyncio.Task] = set()
+
+        async def _get_browser() -> Any:
+            nonlocal playwright
+            async with browser_lock:
+                if async_playwright is None:
+                    return None
+                if playwright is None:
+                    playwright = await async_playwright().start()
+                current = browser.get("chromium")
+                if current is None or not current.is_connected():
+                    browser["chromium"] = await playwright.chromium.launch(
+                        headless=self.headless
+                    )
+                return browser["chromium"]
+
+        async def _run(job: PortalJob) -> None:
+            portal_slot = portal_slots.setdefault(
+                job.portal_key, asyncio.Semaphore(self._portal_limit(job.portal_key))
+            )
+            async with portal_slot, slots:
+                job.status = "running"
+                try:
+                    job.result = await self._run_job(await _get_browser(), job)
+                except Exception as exc:
+                    job.result = PortalRunResult(
+                        status="failed",
+                        last_step="STEP_98_ERROR",
+                        message="Błąd podczas uruchamiania Playwright",
+                        detail=str(exc),
+                        found=False,
+                    )
+                finally:
+                    job.status = job.result.status if job.result else "failed"
+                    job.done.set()
+            if self.on_done:
+                self.on_done(job)
+
+        try:
+            while True:
+                job = await self._queue.get()
+                if job is None:
+                    break
+                task = asyncio.create_task(_run(job))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            if browser.get("chromium") is not None:
+                try:
+                    await browser["chromium"].close()
+                except Exception:
+                    pass
+            if playwright is not None:
+                try:
+                    await playwright.stop()
+                except Exception:
+                    pass
+
+    def _open_session(self, job: PortalJob) -> str:
+        """Unfinished session of the same number (retry) or a new one."""
+        session_root = resumable_session(job.portal_key, job.number)
+        if session_root is None or session_root in self._active_sessions:
+            session_root = create_session(job.portal_key, job.number)
+        self._active_sessions.add(session_root)
+        return session_root
+
+    async def _run_job(self, browser: Any, job: PortalJob) -> PortalRunResult:
+        session_root = self._open_session(job)
+        job.session_root = session_root
+        try:
+            return await self._run_session(browser, job, session_root)
+        finally:
+            self._active_sessions.discard(session_root)
+
+    async def _run_session(
+        self, browser: Any, job: PortalJob, session_root: str
+    ) -> PortalRunResult:
+        session_info = session_paths(session_root)
+        update_run_info(
+            session_root,
+            {
+                "portal_key": job.portal_key,
+                "last_number": job.number,
+                "run_count": load_run_info(session_root).get("run_count", 0) + 1,
+                "job_id": job.job_id,
+            },
+        )
+        if browser is None:
+            result = _missing_playwright_result(session_info["log_path"])
+        else:
+            result = await run_portal_job(
+                browser,
+                job.number,
+                job.portal_key,
+                self.portals.get(job.portal_key, {}),
+                self.selectors,
+                session_info,
+                debug=job.debug,
+                mode=resolve_browser_mode(self.fast, job.debug),
+            )
+        update_run_info(
+            session_root,
+            {
+                "last_status": result.status,
+                "last_step": result.last_step,
+            },
+            flush=True,
+        )
+        return result
+
+    def wait(self, jobs: list[PortalJob], timeout: Optional[float] = None) -> bool:
+        for job in jobs:
+            if not job.done.wait(timeout):
+                return False
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is None:
+                return
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        if wait:
+            self._thread.join()
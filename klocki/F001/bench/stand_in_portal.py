@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import argparse
+import html
+import io
+import random
+import secrets
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, quote, urlsplit
+
+
+@dataclass
+class StandInConfig:
+    latency_ms: int = 0
+    jitter_ms: int = 0
+    unfinished: int = 50
+    finished: int = 200
+    dialogs: int = 2
+    year: int = 2024
+
+
+def work_numbers(config: StandInConfig, kind: str) -> list[str]:
+    """GKN numbers shown on the ``unfinished`` / ``finished`` list."""
+    if kind == "unfinished":
+        return [f"GKN.6640.{index}.{config.year}" for index in range(1, config.unfinished + 1)]
+    return [f"GKN.6640.{index}.{config.year - 1}" for index in range(1, config.finished + 1)]
+
+
+_STYLE = """
+body { font-family: sans-serif; background: #f4f4f4; }
+.ui-dialog { position: absolute; left: 60px; width: 320px; background: #fff;
+  border: 1px solid #888; padding: 8px; }
+.ui-dialog-buttonpane { text-align: right; margin-top: 8px; }
+"""
+
+
+def _page(body: str) -> str:
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'>"
+        "<link rel='stylesheet' href='/static/style.css'>"
+        f"</head><body>{body}</body></html>"
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_StandInServer"
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _send(
+        self,
+        body: str | bytes,
+        content_type: str = "text/html; charset=utf-8",
+        status: int = 200,
+        headers: tuple[tuple[str, str], ...] = (),
+    ) -> None:
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _logged_in(self) -> bool:
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            name, _sep, value = part.strip().partition("=")
+            if name == "sid" and value in self.server.sessions:
+                return True
+        return False
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        config = self.server.config
+        delay = config.latency_ms + random.randint(0, max(0, config.jitter_ms))
+        if delay:
+            time.sleep(delay / 1000)
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        route = {
+            "/": self._main,
+            "/login": self._login_form,
+            "/do_login": self._do_login,
+            "/blank": lambda: self._send(_page("")),
+            "/list/unfinished": lambda: self._list("unfinished"),
+            "/list/finished": lambda: self._list("finished"),
+            "/work": lambda: self._work(query.get("n", [""])[0]),
+            "/download": lambda: self._download(query.get("n", [""])[0]),
+            "/static/style.css": lambda: self._send(_STYLE, "text/css"),
+        }.get(url.path)
+        if route is None:
+            self._send(_page("404"), status=404)
+            return
+        route()
+
+    def _main(self) -> None:
+        if not self._logged_in():
+            self._send(
+                _page(
+                    "<h1>Geoportal</h1>"
+                    "<iframe name='logowanie' src='/login' width='600' height='260'></iframe>"
+                )
+            )
+            return
+        dialogs = "".join(
+            f"<div class='ui-dialog' style='top:{80 + index * 30}px;z-index:{100 - index}'>"
+            f"<div class='ui-dialog-content'>Komunikat {index + 1}</div>"
+            "<div class='ui-dialog-buttonpane'><button type='button' "
+            "onclick=\"this.closest('.ui-dialog').style.display='none'\">OK</button></div>"
+            "</div>"
+            for index in range(self.server.config.dialogs)
+        )
+        menu = (
+            "<form id='form_kerglista' action='/list/unfinished' target='frame_centr' method='post'>"
+            "<input type='submit' value='Lista prac niezakończonych'></form>"
+            "<form id='form_kerglistaz' action='/list/finished' target='frame_centr' method='post'>"
+            "<input type='submit' value='Lista prac zakończonych'></form>"
+        )
+        self._send(
+            _page(
+                menu
+                + dialogs
+                + "<iframe name='frame_centr' src='/blank' width='1000' height='700'></iframe>"
+            )
+        )
+
+    def _login_form(self) -> None:
+        self._send(
+            _page(
+                "<form method='post' action='/do_login' target='_top'>"
+                "<div>Użytkownik</div><input name='login'>"
+                "<div>Hasło</div><input type='password' name='haslo'>"
+                "<button type='submit'>Zaloguj</button></form>"
+            )
+        )
+
+    def _do_login(self) -> None:
+        sid = secrets.token_hex(8)
+        self.server.sessions.add(sid)
+        self._send(
+            b"",
+            status=303,
+            headers=(("Location", "/"), ("Set-Cookie", f"sid={sid}; Path=/")),
+        )
+
+    def _list(self, kind: str) -> None:
+        if not self._logged_in():
+            self._send(_page("Sesja wygasła"))
+            return
+        rows = "".join(
+            f"<tr><td><a href='/work?n={quote(number)}'>{html.escape(number)}</a></td>"
+            f"<td>Podział działki {index}</td><td>2024-01-{index % 28 + 1:02d}</td></tr>"
+            for index, number in enumerate(work_numbers(self.server.config, kind), start=1)
+        )
+        self._send(_page(f"<table><tr><th>Zgłoszenie</th><th>Cel</th><th>Data</th></tr>{rows}</table>"))
+
+    def _work(self, number: str) -> None:
+        meta = (
+            ("Numer zgłoszenia", number),
+            ("Cel pracy", "podział nieruchomości"),
+            ("Wykonawca", "Jan  Kowalski"),
+            ("Obręb", "Sokółka 0001"),
+        )
+        rows = "".join(
+            f"<tr><td>{html.escape(label)}:</td><td>\n  {html.escape(value)}\n</td></tr>"
+            for label, value in meta
+        )
+        self._send(
+            _page(
+                f"<div id='dane_podstawowe_div'><table>{rows}</table></div>"
+                "<div id='pokaz_obszary' style='display:none'>"
+                "POLYGON((100.5 200.25, 101.5 200.25, 101.5 201.75, 100.5 200.25))</div>"
+                "<input type='button' value='Pokaż/ukryj współrzędne' "
+                "onclick=\"var el=document.getElementById('pokaz_obszary');"
+                "el.style.display=el.style.display==='none'?'block':'none'\">"
+                "<input type='button' value='Pobierz poligon/poligony' "
+                f"onclick=\"location.href='/download?n={quote(number)}'\">"
+            )
+        )
+
+    def _download(self, number: str) -> None:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("GK_poligon.txt", f"{number}\n100.5 200.25\n101.5 200.25\n")
+        self._send(
+            buffer.getvalue(),
+            "application/zip",
+            headers=(("Content-Disposition", "attachment; filename=poligon.zip"),),
+        )
+
+
+class _StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: StandInConfig) -> None:
+        super().__init__(address, _Handler)
+        self.config = config
+        self.sessions: set[str] = set()
+
+
+class StandInPortal:
+    """Local HTTP imitation of the geoportal pages F001 automates.
+
+    Serves the login form in an iframe, ``ui-dialog`` OK popups,
+    ``frame_centr`` with the ``form_kerglista`` / ``form_kerglistaz`` lists,
+    the work view (``#dane_podstawowe_div``, ``#pokaz_obszary``) and the
+    "Pobierz poligon/poligony" download. Every request is delayed by
+    ``latency_ms`` (+ random ``jitter_ms``).
+    """
+
+    def __init__(self, config: Optional[StandInConfig] = None, port: int = 0) -> None:
+        self.config = config or StandInConfig()
+        self._server = _StandInServer(("127.0.0.1", port), self.config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def start(self) -> "StandInPortal":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="F001-stand-in", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread (standalone use, stopped with Ctrl+C)."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInPortal":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in geoportal for F001")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--jitter-ms", type=int, default=0)
+    parser.add_argument("--unfinished", type=int, default=50, help="Rows on the unfinished list")
+    parser.add_argument("--finished", type=int, default=200, help="Rows on the finished list")
+    parser.add_argument("--dialogs", type=int, default=2, help="OK dialogs after login")
+    args = parser.parse_args()
+    config = StandInConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        unfinished=args.unfinished,
+        finished=args.finished,
+        dialogs=args.dialogs,
+    )
+    portal = StandInPortal(config, port=args.port)
+    print(f"Stand-in portal: {portal.url} (Ctrl+C kończy)")
+    try:
+        portal.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import shutil
+from typing import Optional
+
+from runtime_utils import (
+    BLOBS_DIR,
+    MANIFEST,
+    RUNTIME_ROOT,
+    SESSIONS_DIR,
+    flush_sessions,
+    link_or_copy,
+    load_json,
+    session_state,
+    settings_path,
+)
+
+_CHUNK = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_path(digest: str, compressed: bool = False) -> str:
+    name = f"{digest}.gz" if compressed else digest
+    return os.fspath(BLOBS_DIR / digest[:2] / name)
+
+
+def has_blob(digest: str) -> bool:
+    return os.path.exists(blob_path(digest)) or os.path.exists(blob_path(digest, True))
+
+
+def compress_session_files() -> bool:
+    """``compress_session_files`` from settings.json: keep session-only text gzipped."""
+    return bool(load_json(settings_path(), {}).get("compress_session_files", False))
+
+
+def _ensure_plain(digest: str) -> str:
+    plain = blob_path(digest)
+    if not os.path.exists(plain):
+        os.makedirs(os.path.dirname(plain), exist_ok=True)
+        temp_path = f"{plain}.tmp"
+        with gzip.open(blob_path(digest, True), "rb") as source, open(temp_path, "wb") as target:
+            shutil.copyfileobj(source, target, _CHUNK)
+        os.replace(temp_path, plain)
+    return plain
+
+
+def intern_file(path: str, compress: bool = False) -> str:
+    """Move ``path`` into the blob store and return its SHA-256.
+
+    Identical content is stored once. Without ``compress`` the file stays at
+    ``path`` as a hardlink to the blob; with ``compress`` the blob is kept
+    gzipped and ``path`` is removed (read it back with :func:`read_blob` or
+    :func:`link_blob`).
+    """
+    digest = file_digest(path)
+    if compress:
+        target = blob_path(digest, True)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp_path = f"{target}.tmp"
+            with open(path, "rb") as source, gzip.open(temp_path, "wb") as archive:
+                shutil.copyfileobj(source, archive, _CHUNK)
+            os.replace(temp_path, target)
+        os.remove(path)
+        return digest
+    target = blob_path(digest)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(path, target)
+            return digest
+        except OSError:
+            shutil.copyfile(path, target)
+    link_or_copy(target, path)
+    return digest
+
+
+def link_blob(digest: str, destination_path: str) -> None:
+    """Materialise blob ``digest`` at ``destination_path`` (hardlink, else copy)."""
+    link_or_copy(_ensure_plain(digest), destination_path)
+
+
+def read_blob(digest: str) -> bytes:
+    plain = blob_path(digest)
+    if os.path.exists(plain):
+        with open(plain, "rb") as handle:
+            return handle.read()
+    with gzip.open(blob_path(digest, True), "rb") as handle:
+        return handle.read()
+
+
+def runtime_relpath(path: str) -> str:
+    return os.path.relpath(path, RUNTIME_ROOT).replace(os.sep, "/")
+
+
+def record_blobs(session_root: str, blobs: dict[str, str]) -> None:
+    """Merge ``{runtime-relative path: sha256}`` into ``manifest.json['blobs']``."""
+    if not blobs:
+        return
+    session_state(session_root).merge(MANIFEST, "blobs", blobs)
+
+
+def _referenced_digests(sessions_dir: str) -> set[str]:
+    referenced: set[str] = set()
+    if not os.path.isdir(sessions_dir):
+        return referenced
+    for date_name in os.listdir(sessions_dir):
+        date_dir = os.path.join(sessions_dir, date_name)
+        if not os.path.isdir(date_dir):
+            continue
+        for session_name in os.listdir(date_dir):
+            manifest_path = os.path.join(date_dir, session_name, "manifest.json")
+            try:
+                manifest = load_json(manifest_path, {})
+            except (OSError, ValueError):
+                continue
+            referenced.update((manifest.get("blobs") or {}).values())
+    return referenced
+
+
+def prune_blobs(sessions_dir: Optional[str] = None) -> int:
+    """Delete blobs nothing points to any more; returns the number removed.
+
+    A plain blob is still used while another hardlink to it exists (session
+    or case file); a compressed one while a session manifest lists it.
+    """
+    # Manifests are read from disk: write pending session state first.
+    flush_sessions()
+    if not BLOBS_DIR.exists():
+        return 0
+    referenced = _referenced_digests(os.fspath(sessions_dir or SESSIONS_DIR))
+    removed = 0
+    for prefix in os.listdir(BLOBS_DIR):
+        prefix_dir = os.path.join(BLOBS_DIR, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for name in os.listdir(prefix_dir):
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(prefix_dir, name)
+            digest = name.split(".", 1)[0]
+            if name.endswith(".gz"):
+                unused = digest not in referenced
+            else:
+                # Only the store links it; the .gz twin (if any) stays the reference.
+                unused = os.stat(path).st_nlink <= 1 and (
+                    digest not in referenced or os.path.exists(f"{path}.gz")
+                )
+            if unused:
+                os.remove(path)
+                removed += 1
+    return removed
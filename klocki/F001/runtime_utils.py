@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import atexit
+import copy
 import json
 import os
 import re
 import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
@@ -19,17 +25,33 @@ def _find_repo_root(start_path: Path) -> Path:
 
 
 REPO_ROOT = _find_repo_root(Path(__file__).resolve())
-RUNTIME_ROOT = REPO_ROOT / "klocki" / "F001_runtime"
+# klocki/ on sys.path: code shared with F002 is imported as ``_shared.<module>``.
+KLOCKI_DIR = Path(__file__).resolve().parents[1]
+if str(KLOCKI_DIR) not in sys.path:
+    sys.path.append(str(KLOCKI_DIR))
+# F001_RUNTIME_ROOT points a process at a separate runtime (e.g. benchmarks).
+RUNTIME_ROOT = Path(
+    os.environ.get("F001_RUNTIME_ROOT") or REPO_ROOT / "klocki" / "F001_runtime"
+)
 CONFIG_DIR = RUNTIME_ROOT / "config"
 STATE_DIR = RUNTIME_ROOT / "state"
 SHARED_DIR = RUNTIME_ROOT / "shared"
 SESSIONS_DIR = RUNTIME_ROOT / "sessions"
 CASES_DIR = RUNTIME_ROOT / "cases"
+BLOBS_DIR = RUNTIME_ROOT / "blobs"
+QUEUE_DIR = RUNTIME_ROOT / "queue"
+ARCHIVE_DIR = RUNTIME_ROOT / "archive"
 LATEST_PATH = RUNTIME_ROOT / "LATEST.txt"
+CATALOG_PATH = RUNTIME_ROOT / "catalog.sqlite"
+STORAGE_STATE_MAX_AGE = timedelta(hours=8)
+RUN_INFO = "run.json"
+MANIFEST = "manifest.json"
+# Clean session states kept in memory; states with unsaved changes stay until flushed.
+MAX_CACHED_SESSIONS = 32
 
 
 def ensure_runtime_dirs() -> None:
-    for path in (CONFIG_DIR, STATE_DIR, SHARED_DIR, SESSIONS_DIR, CASES_DIR):
+    for path in (CONFIG_DIR, STATE_DIR, SHARED_DIR, SESSIONS_DIR, CASES_DIR, BLOBS_DIR):
         os.makedirs(path, exist_ok=True)
 
 
@@ -46,10 +68,68 @@ def save_json(path: str, payload: Any) -> None:
         json.dump(payload, handle, ensure_ascii=False, indent=2)
 
 
+def write_json_atomic(path: str, payload: Any, fsync: bool = False) -> None:
+    """Write JSON to a temp file and rename it over ``path`` (no torn files)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, ensure_ascii=False, indent=2)
+        if fsync:
+            handle.flush()
+            os.fsync(handle.fileno())
+    for attempt in range(5):
+        try:
+            os.replace(temp_path, path)
+            return
+        except PermissionError:
+            # Windows: the target is briefly open in another process.
+            if attempt == 4:
+                os.remove(temp_path)
+                raise
+            time.sleep(0.05)
+
+
+def break_hardlink(path: str) -> None:
+    """Remove ``path`` before it is written again.
+
+    Interned session files are hardlinks to ``blobs/`` shared with other
+    sessions and cases; writing through the link would change all of them
+    and the blob itself.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def write_text_atomic(path: str, content: str) -> None:
+    """Write through a temp file + rename: never into an existing (shared) inode."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        handle.write(content)
+    os.replace(temp_path, path)
+
+
+def link_or_copy(source_path: str, destination_path: str) -> None:
+    """Hardlink ``source_path`` to ``destination_path``; copy if linking fails."""
+    os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+    if os.path.lexists(destination_path):
+        os.remove(destination_path)
+    try:
+        os.link(source_path, destination_path)
+    except OSError:
+        shutil.copyfile(source_path, destination_path)
+
+
 def selectors_path() -> str:
     return os.fspath(CONFIG_DIR / "selectors.json")
 
 
+def settings_path() -> str:
+    return os.fspath(CONFIG_DIR / "settings.json")
+
+
 def portals_path() -> str:
     return os.fspath(STATE_DIR / "portals.json")
 
@@ -62,6 +142,48 @@ def panel_state_path() -> str:
     return os.fspath(STATE_DIR / "F001_state.json")
 
 
+def queue_path() -> str:
+    return os.fspath(QUEUE_DIR / "requests.jsonl")
+
+
+def queue_results_path() -> str:
+    return os.fspath(QUEUE_DIR / "results.jsonl")
+
+
+def queue_status_path() -> str:
+    return os.fspath(QUEUE_DIR / "daemon_status.json")
+
+
+def login_strategy_path() -> str:
+    return os.fspath(STATE_DIR / "login_strategy.json")
+
+
+def storage_state_path(portal_key: str) -> str:
+    portal = (portal_key or "unknown").lower()
+    return os.fspath(STATE_DIR / f"storage_{portal}.json")
+
+
+def valid_storage_state(
+    portal_key: str, max_age: timedelta = STORAGE_STATE_MAX_AGE
+) -> str | None:
+    """Return the saved browser storage state for the portal if not expired."""
+    path = storage_state_path(portal_key)
+    if not os.path.exists(path):
+        return None
+    saved_at = datetime.fromtimestamp(os.path.getmtime(path))
+    if datetime.now() - saved_at > max_age:
+        clear_storage_state(portal_key)
+        return None
+    return path
+
+
+def clear_storage_state(portal_key: str) -> None:
+    try:
+        os.remove(storage_state_path(portal_key))
+    except OSError:
+        pass
+
+
 def ensure_runtime_files() -> None:
     ensure_runtime_dirs()
     if not os.path.exists(selectors_path()):
@@ -78,6 +200,20 @@ def ensure_runtime_files() -> None:
                 "password_error": "",
             },
         )
+    if not os.path.exists(settings_path()):
+        save_json(
+            settings_path(),
+            {
+                "fast_mode": False,
+                "fast_block_resources": ["image", "font", "stylesheet", "media"],
+                "compress_session_files": False,
+                "warm_browser": True,
+                "warm_open_portal": True,
+                "session_max_age_days": 14,
+                "session_quota_mb": 2048,
+                "archive_sessions": False,
+            },
+        )
     if not os.path.exists(portals_path()):
         save_json(portals_path(), {})
     if not os.path.exists(shared_state_path()):
@@ -109,9 +245,9 @@ def create_session(portal_key: str = "UNKNOWN", gkn: str = "UNKNOWN") -> str:
     os.makedirs(screens_dir, exist_ok=True)
     os.makedirs(dumps_dir, exist_ok=True)
     os.makedirs(downloads_dir, exist_ok=True)
-    run_path = os.path.join(session_root, "run.json")
-    save_json(
-        run_path,
+    state = session_state(session_root)
+    state.replace(
+        RUN_INFO,
         {
             "session_started_at": now.isoformat(timespec="seconds"),
             "portal_key": portal_key,
@@ -122,9 +258,8 @@ def create_session(portal_key: str = "UNKNOWN", gkn: str = "UNKNOWN") -> str:
             "last_step": None,
         },
     )
-    manifest_path = os.path.join(session_root, "manifest.json")
-    save_json(
-        manifest_path,
+    state.replace(
+        MANIFEST,
         {
             "status": "init",
             "last_step": None,
@@ -134,19 +269,216 @@ def create_session(portal_key: str = "UNKNOWN", gkn: str = "UNKNOWN") -> str:
             "files": [],
         },
     )
+    # Written through now (atomically, with the catalog row): LATEST.txt and
+    # the catalog must never point at a folder without run.json/manifest.json.
+    # Only later updates are buffered.
+    state.flush()
     start_log_path = os.path.join(logs_dir, "F001_start.log")
     with open(start_log_path, "a", encoding="utf-8") as handle:
         handle.write(f"Session started at {now.isoformat(timespec='seconds')}\n")
-    with open(LATEST_PATH, "w", encoding="utf-8") as handle:
+    temp_path = f"{LATEST_PATH}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
         handle.write(session_root)
+    os.replace(temp_path, LATEST_PATH)
+    catalog().set_state("latest_session", session_root)
     return session_root
 
 
-def update_run_info(session_root: str, updates: dict[str, Any]) -> None:
-    run_path = os.path.join(session_root, "run.json")
-    data = load_json(run_path, {})
-    data.update(updates)
-    save_json(run_path, data)
+_CATALOGS: dict[str, Any] = {}
+_CATALOGS_LOCK = threading.Lock()
+
+
+def catalog() -> Any:
+    """SQLite catalog of sessions and cases (``_shared/catalog.py``, ``catalog.sqlite``).
+
+    One instance (and connection) per catalog file for the whole process.
+    """
+    from _shared.catalog import Catalog
+
+    key = os.fspath(CATALOG_PATH)
+    with _CATALOGS_LOCK:
+        store = _CATALOGS.get(key)
+        if store is None:
+            store = _CATALOGS[key] = Catalog(key)
+        return store
+
+
+def _catalog_row(run_info: dict[str, Any], manifest: dict[str, Any]) -> tuple[Any, ...]:
+    """Session fields kept in the catalog: portal, number, start, status, step."""
+    return (
+        run_info.get("portal_key") or manifest.get("portal_key"),
+        run_info.get("last_number") or run_info.get("gkn"),
+        run_info.get("session_started_at"),
+        run_info.get("last_status") or manifest.get("status"),
+        run_info.get("last_step") or manifest.get("last_step"),
+    )
+
+
+class SessionState:
+    """``run.json`` and ``manifest.json`` of one session, kept in memory.
+
+    Updates are merged in memory and written only by :meth:`flush` (temp
+    file + rename): at step boundaries (``flush=True``), at the end of a
+    lookup and at exit. Every flush also updates the session row of the
+    catalog. A document without unsaved changes is reloaded when another
+    process rewrote the file; if the file changed under unsaved changes,
+    :meth:`flush` reloads it and applies the pending updates again, so
+    concurrent writers (panel, daemon, API, GC) do not lose theirs.
+    """
+
+    def __init__(self, session_root: str) -> None:
+        self.session_root = session_root
+        self._lock = threading.RLock()
+        self._docs: dict[str, dict[str, Any]] = {}
+        self._stamps: dict[str, tuple[int, int, int]] = {}
+        self._dirty: set[str] = set()
+        # Updates not yet written, replayed onto the file if it changed meanwhile.
+        self._pending: dict[str, list[tuple[Any, ...]]] = {}
+        self._cataloged: tuple[Any, ...] | None = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.session_root, name)
+
+    def _stamp(self, name: str) -> tuple[int, int, int]:
+        """mtime, inode and size: every atomic rewrite also gets a new inode."""
+        try:
+            stat = os.stat(self._path(name))
+        except OSError:
+            return (0, 0, 0)
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def _load(self, name: str) -> None:
+        stamp = self._stamp(name)
+        try:
+            data = load_json(self._path(name), {})
+        except (OSError, ValueError):
+            data = {}
+        self._docs[name] = data if isinstance(data, dict) else {}
+        self._stamps[name] = stamp
+
+    def _doc(self, name: str) -> dict[str, Any]:
+        if name in self._dirty:
+            return self._docs[name]
+        if name not in self._docs or self._stamps.get(name) != self._stamp(name):
+            self._load(name)
+        return self._docs[name]
+
+    @staticmethod
+    def _apply(doc: dict[str, Any], op: tuple[Any, ...]) -> dict[str, Any]:
+        kind = op[0]
+        if kind == "replace":
+            return op[1]
+        if kind == "merge":
+            _kind, key, updates = op
+            current = doc.get(key)
+            doc[key] = {**(current if isinstance(current, dict) else {}), **updates}
+        else:
+            doc.update(op[1])
+        return doc
+
+    def _change(self, name: str, op: tuple[Any, ...]) -> None:
+        self._docs[name] = self._apply(self._doc(name), op)
+        self._pending.setdefault(name, []).append(op)
+        self._dirty.add(name)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def read(self, name: str) -> dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._doc(name))
+
+    def update(self, name: str, updates: dict[str, Any]) -> None:
+        with self._lock:
+            self._change(name, ("update", dict(updates)))
+
+    def merge(self, name: str, key: str, updates: dict[str, Any]) -> None:
+        """``doc[key].update(updates)`` for a dict-valued key."""
+        with self._lock:
+            self._change(name, ("merge", key, dict(updates)))
+
+    def replace(self, name: str, payload: dict[str, Any]) -> None:
+        with self._lock:
+            self._change(name, ("replace", payload))
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            if not os.path.isdir(self.session_root):
+                # Session removed (cleanup): do not recreate it.
+                self._dirty.clear()
+                self._pending.clear()
+                return
+            for name in sorted(self._dirty):
+                if self._stamp(name) != self._stamps.get(name, (0, 0, 0)):
+                    # Rewritten by another writer since we read it: start from
+                    # its version and apply our pending updates on top.
+                    self._load(name)
+                    for op in self._pending.get(name, []):
+                        self._docs[name] = self._apply(self._docs[name], op)
+                write_json_atomic(self._path(name), self._docs[name])
+                self._stamps[name] = self._stamp(name)
+            self._dirty.clear()
+            self._pending.clear()
+            row = _catalog_row(self._doc(RUN_INFO), self._doc(MANIFEST))
+            if row == self._cataloged:
+                return
+            self._cataloged = row
+        # Outside the session lock, and only when a catalogued field changed
+        # (start, status, step, number): most flushes do not touch SQLite.
+        catalog().upsert_session(self.session_root, *row)
+
+
+_SESSION_STATES: OrderedDict[str, SessionState] = OrderedDict()
+_SESSION_STATES_LOCK = threading.Lock()
+
+
+def session_state(session_root: str) -> SessionState:
+    key = os.path.abspath(session_root)
+    with _SESSION_STATES_LOCK:
+        state = _SESSION_STATES.get(key)
+        if state is None:
+            state = _SESSION_STATES[key] = SessionState(key)
+        _SESSION_STATES.move_to_end(key)
+        excess = len(_SESSION_STATES) - MAX_CACHED_SESSIONS
+        for old_key in list(_SESSION_STATES)[:-1]:
+            if excess <= 0:
+                break
+            if not _SESSION_STATES[old_key].dirty:
+                del _SESSION_STATES[old_key]
+                excess -= 1
+        return state
+
+
+def flush_sessions() -> None:
+    """Write every session state with unsaved changes (also run at exit)."""
+    with _SESSION_STATES_LOCK:
+        states = list(_SESSION_STATES.values())
+    for state in states:
+        try:
+            state.flush()
+        except OSError:
+            pass
+
+
+atexit.register(flush_sessions)
+
+
+def load_run_info(session_root: str) -> dict[str, Any]:
+    return session_state(session_root).read(RUN_INFO)
+
+
+def load_manifest(session_root: str) -> dict[str, Any]:
+    return session_state(session_root).read(MANIFEST)
+
+
+def update_run_info(session_root: str, updates: dict[str, Any], flush: bool = False) -> None:
+    state = session_state(session_root)
+    state.update(RUN_INFO, updates)
+    if flush:
+        state.flush()
 
 
 def session_paths(session_root: str) -> dict[str, str]:
@@ -162,32 +494,11 @@ def session_paths(session_root: str) -> dict[str, str]:
         "downloads_dir": downloads_dir,
         "log_path": os.path.join(logs_dir, "F001.log"),
         "critical_path": os.path.join(logs_dir, "F001_critical.md"),
-        "run_path": os.path.join(session_root, "run.json"),
-        "manifest_path": os.path.join(session_root, "manifest.json"),
+        "run_path": os.path.join(session_root, RUN_INFO),
+        "manifest_path": os.path.join(session_root, MANIFEST),
     }
 
 
-def cleanup_sessions(max_age_days: int = 14) -> int:
-    """Remove session folders older than max_age_days."""
-    if not os.path.exists(SESSIONS_DIR):
-        return 0
-    cutoff = datetime.now() - timedelta(days=max_age_days)
-    removed = 0
-    for date_name in os.listdir(SESSIONS_DIR):
-        date_path = os.path.join(SESSIONS_DIR, date_name)
-        if not os.path.isdir(date_path):
-            continue
-        try:
-            date_value = datetime.strptime(date_name, "%Y-%m-%d")
-        except ValueError:
-            date_value = datetime.fromtimestamp(os.path.getmtime(date_path))
-        if date_value >= cutoff:
-            continue
-        shutil.rmtree(date_path, ignore_errors=True)
-        removed += 1
-    return removed
-
-
 def clear_sessions() -> None:
     if not os.path.exists(SESSIONS_DIR):
         return
@@ -195,6 +506,17 @@ def clear_sessions() -> None:
         date_path = os.path.join(SESSIONS_DIR, date_name)
         if os.path.isdir(date_path):
             shutil.rmtree(date_path, ignore_errors=True)
+    catalog().forget_all_sessions()
+    _prune_blobs()
+
+
+def _prune_blobs() -> None:
+    from blob_store import prune_blobs
+
+    try:
+        prune_blobs()
+    except OSError:
+        pass
 
 
 def read_latest_session() -> str | None:
@@ -204,11 +526,11 @@ def read_latest_session() -> str | None:
         return handle.read().strip() or None
 
 
-def update_manifest(session_root: str, updates: dict[str, Any]) -> None:
-    manifest_path = os.path.join(session_root, "manifest.json")
-    data = load_json(manifest_path, {})
-    data.update(updates)
-    save_json(manifest_path, data)
+def update_manifest(session_root: str, updates: dict[str, Any], flush: bool = False) -> None:
+    state = session_state(session_root)
+    state.update(MANIFEST, updates)
+    if flush:
+        state.flush()
 
 
 def case_root(portal_key: str, gkn: str) -> str:
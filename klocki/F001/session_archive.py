@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import io
+import json
+import os
+import shutil
+import struct
+import sys
+import threading
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import IO, Any, Iterator, Optional
+
+from runtime_utils import (
+    ARCHIVE_DIR,
+    MANIFEST,
+    RUN_INFO,
+    RUNTIME_ROOT,
+    SESSIONS_DIR,
+    flush_sessions,
+    load_json,
+    settings_path,
+)
+
+INDEX_MEMBER = "index.json"
+_CHUNK = 1024 * 1024
+# Already compressed formats are stored as they are (deflate only costs CPU).
+_STORED_SUFFIXES = (".png", ".jpg", ".jpeg", ".gz", ".zip", ".7z")
+
+_ARCHIVE_LOCK = threading.Lock()
+
+
+def archive_enabled() -> bool:
+    """``archive_sessions`` from settings.json: pack old sessions instead of deleting."""
+    return bool(load_json(settings_path(), {}).get("archive_sessions", False))
+
+
+def archive_path(date_name: str) -> str:
+    return os.fspath(ARCHIVE_DIR / f"sessions-{date_name}.zip")
+
+
+def _compress_type(name: str) -> int:
+    if name.lower().endswith(_STORED_SUFFIXES):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _copy_stream(source: IO[bytes], target: IO[bytes]) -> None:
+    shutil.copyfileobj(source, target, _CHUNK)
+
+
+def _write_member(
+    archive: zipfile.ZipFile,
+    name: str,
+    source: IO[bytes],
+    date_time: Optional[tuple[int, ...]] = None,
+) -> None:
+    info = zipfile.ZipInfo(name, date_time=date_time or datetime.now().timetuple()[:6])
+    info.compress_type = _compress_type(name)
+    with archive.open(info, "w", force_zip64=True) as target:
+        _copy_stream(source, target)
+
+
+def _copy_member_raw(
+    source: zipfile.ZipFile, info: zipfile.ZipInfo, target: zipfile.ZipFile
+) -> None:
+    """Copy a member's compressed bytes as they are, without inflate + deflate.
+
+    The public zipfile API can only re-compress, which made every append to
+    a day archive cost the whole archive again; this writes the local header
+    and data through ``target.fp`` and registers the entry for the central
+    directory written on close.
+    """
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"bad local header of {info.filename}")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    source.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+    copied = copy.copy(info)
+    # The new local header carries CRC and sizes, so no data descriptor follows.
+    copied.flag_bits &= ~zipfile._MASK_USE_DATA_DESCRIPTOR
+    copied.extra = zipfile._strip_extra(info.extra, (1,))
+    copied.header_offset = target.fp.tell()
+    zip64 = max(info.file_size, info.compress_size) > zipfile.ZIP64_LIMIT
+    target.fp.write(copied.FileHeader(zip64))
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = source.fp.read(min(_CHUNK, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"truncated member {info.filename}")
+        target.fp.write(chunk)
+        remaining -= len(chunk)
+    target.filelist.append(copied)
+    target.NameToInfo[copied.filename] = copied
+    target.start_dir = target.fp.tell()
+
+
+def _session_files(session_root: str) -> list[tuple[str, str]]:
+    """``(path inside the session, file on disk)`` for every file of the session."""
+    files: list[tuple[str, str]] = []
+    for root, _dirs, names in os.walk(session_root):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            files.append((os.path.relpath(path, session_root).replace(os.sep, "/"), path))
+    return files
+
+
+def _session_entry(session_root: str, members: list[dict[str, Any]]) -> dict[str, Any]:
+    def _doc(name: str) -> dict[str, Any]:
+        try:
+            data = load_json(os.path.join(session_root, name), {})
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    manifest = _doc(MANIFEST)
+    manifest.pop("blobs", None)
+    return {
+        "session": os.path.basename(session_root),
+        "archived_at": datetime.now().isoformat(timespec="seconds"),
+        "run": _doc(RUN_INFO),
+        "manifest": manifest,
+        "files": members,
+    }
+
+
+def _archive_session(archive: zipfile.ZipFile, session_root: str) -> dict[str, Any]:
+    from blob_store import read_blob
+
+    name = os.path.basename(session_root)
+    members: list[dict[str, Any]] = []
+    written: set[str] = set()
+    for relpath, path in _session_files(session_root):
+        modified = datetime.fromtimestamp(os.path.getmtime(path)).timetuple()[:6]
+        with open(path, "rb") as source:
+            _write_member(archive, f"{name}/{relpath}", source, modified)
+        members.append({"path": relpath, "size": os.path.getsize(path)})
+        written.add(relpath)
+    # Files kept only as compressed blobs (compress_session_files) go in too,
+    # otherwise pruning the blob store would drop them from the audit trail.
+    blobs = load_json(os.path.join(session_root, MANIFEST), {}).get("blobs") or {}
+    for runtime_rel, digest in blobs.items():
+        path = os.path.join(RUNTIME_ROOT, *runtime_rel.split("/"))
+        relpath = os.path.relpath(path, session_root).replace(os.sep, "/")
+        if relpath.startswith("..") or relpath in written:
+            continue
+        try:
+            data = read_blob(digest)
+        except OSError:
+            continue
+        _write_member(archive, f"{name}/{relpath}", io.BytesIO(data))
+        members.append({"path": relpath, "size": len(data), "blob": digest})
+    return _session_entry(session_root, members)
+
+
+def read_index(date_name: str) -> list[dict[str, Any]]:
+    """Sessions packed in the archive of ``date_name`` (empty if there is none)."""
+    path = archive_path(date_name)
+    if not os.path.exists(path):
+        return []
+    with zipfile.ZipFile(path) as archive:
+        with archive.open(INDEX_MEMBER) as handle:
+            return json.load(handle).get("sessions", [])
+
+
+def archive_sessions(session_roots: list[str]) -> list[str]:
+    """Pack sessions into ``archive/sessions-<date>.zip``; returns the packed ones.
+
+    Sessions are grouped by their date folder. A day archive that already
+    exists is rewritten with the new sessions added (temp file + rename), so
+    an interrupted run never leaves a broken archive; its members are copied
+    compressed as they are, so only the new sessions are compressed. The caller removes the
+    packed session folders.
+    """
+    by_date: dict[str, list[str]] = {}
+    for session_root in session_roots:
+        date_name = os.path.basename(os.path.dirname(os.path.abspath(session_root)))
+        by_date.setdefault(date_name, []).append(os.path.abspath(session_root))
+    packed: list[str] = []
+    with _ARCHIVE_LOCK:
+        for date_name, roots in sorted(by_date.items()):
+            packed.extend(_archive_day(date_name, roots))
+    return packed
+
+
+def _archive_day(date_name: str, session_roots: list[str]) -> list[str]:
+    path = archive_path(date_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    names = {os.path.basename(root) for root in session_roots}
+    sessions: list[dict[str, Any]] = []
+    try:
+        with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as target:
+            if os.path.exists(path):
+                with zipfile.ZipFile(path) as existing:
+                    with existing.open(INDEX_MEMBER) as handle:
+                        old_index = json.load(handle).get("sessions", [])
+                    sessions = [item for item in old_index if item.get("session") not in names]
+                    kept = {item["session"] for item in sessions}
+                    for info in existing.infolist():
+                        if info.filename.split("/", 1)[0] in kept:
+                            _copy_member_raw(existing, info, target)
+            for session_root in session_roots:
+                sessions.append(_archive_session(target, session_root))
+            sessions.sort(key=lambda item: item.get("session", ""))
+            target.writestr(
+                INDEX_MEMBER,
+                json.dumps({"date": date_name, "sessions": sessions}, ensure_ascii=False, indent=2),
+            )
+        os.replace(temp_path, path)
+    except (OSError, ValueError, zipfile.BadZipFile):
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return []
+    return session_roots
+
+
+def archive_all_sessions() -> tuple[int, int]:
+    """Pack every session folder (before ``clear_sessions``); ``(packed, total)``."""
+    flush_sessions()
+    roots: list[str] = []
+    if SESSIONS_DIR.exists():
+        for date_dir in sorted(SESSIONS_DIR.iterdir()):
+            if date_dir.is_dir():
+                roots.extend(os.fspath(path) for path in sorted(date_dir.iterdir()) if path.is_dir())
+    return len(archive_sessions(roots)), len(roots)
+
+
+def _split_session_id(session_id: str) -> tuple[str, str]:
+    """``YYYY-MM-DD/<session folder>`` (path under sessions/) -> (date, folder)."""
+    parts = session_id.replace("\\", "/").strip("/").split("/")
+    if len(parts) < 2:
+        raise ValueError(f"expected YYYY-MM-DD/<session>, got {session_id!r}")
+    return parts[-2], parts[-1]
+
+
+@contextmanager
+def open_archived(session_id: str, relpath: str) -> Iterator[IO[bytes]]:
+    """Stream one file of an archived session without extracting the archive.
+
+    ``with open_archived("2026-10-16/101500_SOKOLSKI_GKN_1", "logs/F001.log") as f``
+    """
+    date_name, session_name = _split_session_id(session_id)
+    with zipfile.ZipFile(archive_path(date_name)) as archive:
+        with archive.open(f"{session_name}/{relpath.strip('/')}") as handle:
+            yield handle
+
+
+def read_archived_json(session_id: str, relpath: str = RUN_INFO) -> Any:
+    with open_archived(session_id, relpath) as handle:
+        return json.load(handle)
+
+
+def archived_dates() -> list[str]:
+    if not ARCHIVE_DIR.exists():
+        return []
+    return sorted(
+        name[len("sessions-") : -len(".zip")]
+        for name in os.listdir(ARCHIVE_DIR)
+        if name.startswith("sessions-") and name.endswith(".zip")
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="F001 session archives (archive/sessions-*.zip)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="Archived sessions (all days or one day)")
+    list_parser.add_argument("date", nargs="?", help="YYYY-MM-DD")
+    cat_parser = commands.add_parser("cat", help="Write one archived file to stdout")
+    cat_parser.add_argument("session", help="YYYY-MM-DD/<session folder>")
+    cat_parser.add_argument("path", help="File inside the session, e.g. logs/F001.log")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for date_name in [args.date] if args.date else archived_dates():
+            for item in read_index(date_name):
+                run = item.get("run") or {}
+                print(
+                    f"{date_name}/{item.get('session')}\t{run.get('portal_key') or '-'}\t"
+                    f"{run.get('last_number') or '-'}\t{run.get('last_status') or '-'}\t"
+                    f"{len(item.get('files') or [])} files"
+                )
+        return 0
+    try:
+        with open_archived(args.session, args.path) as handle:
+            _copy_stream(handle, sys.stdout.buffer)
+    except (OSError, KeyError, ValueError) as exc:
+        print(f"Nie można odczytać {args.session}/{args.path}: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import copy
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+from runtime_utils import (
+    BLOBS_DIR,
+    MANIFEST,
+    SESSIONS_DIR,
+    STATE_DIR,
+    case_root,
+    catalog,
+    flush_sessions,
+    load_json,
+    read_latest_session,
+    save_json,
+    settings_path,
+)
+from session_archive import archive_enabled, archive_sessions
+
+DEFAULT_MAX_AGE_DAYS = 14
+DEFAULT_QUOTA_MB = 2048
+# Sessions touched this recently may still be running or resumed: never collected.
+ACTIVE_WINDOW_S = 60 * 60
+
+_GC_LOCK = threading.Lock()
+
+
+def gc_report_path() -> str:
+    return os.fspath(STATE_DIR / "session_gc.json")
+
+
+@dataclass
+class _Session:
+    path: str
+    mtime: float
+    # (st_dev, st_ino) -> number of links to that file inside the session.
+    inodes: dict[tuple[int, int], int] = field(default_factory=dict)
+
+
+class _DiskUsage:
+    """Bytes that removing sessions can free, with hardlinks counted once.
+
+    Session files are often hardlinks shared with blobs/, cases/ and other
+    sessions. A file is freed when its last session link goes and no link
+    is left outside the sessions except its blob (pruned afterwards); files
+    also held by a case are never counted.
+    """
+
+    def __init__(
+        self,
+        sessions: list[_Session],
+        stats: dict[tuple[int, int], tuple[int, int]],
+        blob_inodes: set[tuple[int, int]],
+    ) -> None:
+        self.sizes: dict[tuple[int, int], int] = {}
+        self.links: dict[tuple[int, int], int] = {}
+        nlinks: dict[tuple[int, int], int] = {}
+        for session in sessions:
+            for key, count in session.inodes.items():
+                self.links[key] = self.links.get(key, 0) + count
+        for key, (size, nlink) in stats.items():
+            self.sizes[key] = size
+            nlinks[key] = nlink
+        self.owned = {
+            key
+            for key in self.links
+            if nlinks[key] - self.links[key] - (1 if key in blob_inodes else 0) <= 0
+        }
+        self.total = sum(self.sizes[key] for key in self.owned)
+
+    def release(self, session: _Session) -> int:
+        """Drop the session's links; returns the bytes that became free."""
+        freed = 0
+        for key, count in session.inodes.items():
+            self.links[key] -= count
+            if self.links[key] <= 0 and key in self.owned:
+                freed += self.sizes[key]
+        self.total -= freed
+        return freed
+
+    def copy(self) -> "_DiskUsage":
+        """For planning: releases on the copy leave this one untouched."""
+        clone = copy.copy(self)
+        clone.links = dict(self.links)
+        return clone
+
+
+@dataclass
+class GcReport:
+    """Outcome of one :func:`collect_sessions` run."""
+
+    sessions_before: int = 0
+    bytes_before: int = 0
+    removed: list[str] = field(default_factory=list)
+    archived: list[str] = field(default_factory=list)
+    freed_bytes: int = 0
+    kept_for_cases: int = 0
+    blobs_removed: int = 0
+    bytes_after: int = 0
+    finished_at: str = ""
+
+    def summary(self) -> str:
+        freed_mb = self.freed_bytes / (1024 * 1024)
+        archived = f", w archiwum: {len(self.archived)}" if self.archived else ""
+        return (
+            f"Sprzątanie sesji: usunięto {len(self.removed)} z {self.sessions_before} "
+            f"({freed_mb:.1f} MB{archived}), zachowane dla case: {self.kept_for_cases}"
+        )
+
+
+def gc_settings() -> tuple[int, int]:
+    """``(max_age_days, quota_bytes)`` from settings.json; 0 turns a limit off."""
+    settings = load_json(settings_path(), {})
+    max_age_days = int(settings.get("session_max_age_days", DEFAULT_MAX_AGE_DAYS) or 0)
+    quota_mb = int(settings.get("session_quota_mb", DEFAULT_QUOTA_MB) or 0)
+    return max_age_days, quota_mb * 1024 * 1024
+
+
+def _blob_inodes() -> set[tuple[int, int]]:
+    inodes: set[tuple[int, int]] = set()
+    for root, _dirs, files in os.walk(BLOBS_DIR):
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            inodes.add((stat.st_dev, stat.st_ino))
+    return inodes
+
+
+def _scan_session(path: str, stats: dict[tuple[int, int], tuple[int, int]]) -> _Session:
+    """Links per file of the session and its newest file mtime (LRU key).
+
+    ``stats`` collects ``(size, st_nlink)`` of every file by inode.
+    """
+    session = _Session(path=path, mtime=os.path.getmtime(path))
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            session.mtime = max(session.mtime, stat.st_mtime)
+            key = (stat.st_dev, stat.st_ino)
+            session.inodes[key] = session.inodes.get(key, 0) + 1
+            stats[key] = (stat.st_size, stat.st_nlink)
+    return session
+
+
+def _scan_sessions(sessions_dir: str) -> tuple[list[_Session], _DiskUsage]:
+    sessions: list[_Session] = []
+    stats: dict[tuple[int, int], tuple[int, int]] = {}
+    if os.path.isdir(sessions_dir):
+        for date_name in os.listdir(sessions_dir):
+            date_dir = os.path.join(sessions_dir, date_name)
+            if not os.path.isdir(date_dir):
+                continue
+            for session_name in os.listdir(date_dir):
+                session_root = os.path.join(date_dir, session_name)
+                if not os.path.isdir(session_root):
+                    continue
+                try:
+                    sessions.append(_scan_session(session_root, stats))
+                except OSError:
+                    continue
+    return sessions, _DiskUsage(sessions, stats, _blob_inodes())
+
+
+def _case_sessions(sessions: list[_Session]) -> set[str]:
+    """Newest postprocessed session of every case folder that still exists."""
+    newest: dict[str, _Session] = {}
+    for session in sessions:
+        try:
+            manifest = load_json(os.path.join(session.path, MANIFEST), {})
+        except (OSError, ValueError):
+            continue
+        if manifest.get("status") != "postprocess_ok" or not manifest.get("gkn"):
+            continue
+        case_dir = case_root(manifest.get("portal_key") or "", manifest["gkn"])
+        if not os.path.isdir(case_dir):
+            continue
+        current = newest.get(case_dir)
+        if current is None or (session.mtime, session.path) > (current.mtime, current.path):
+            newest[case_dir] = session
+    return {session.path for session in newest.values()}
+
+
+def _remove_session(session: _Session) -> bool:
+    shutil.rmtree(session.path, ignore_errors=True)
+    if os.path.exists(session.path):
+        return False
+    try:
+        # Drop the date folder once its last session is gone.
+        os.rmdir(os.path.dirname(session.path))
+    except OSError:
+        pass
+    return True
+
+
+def collect_sessions(
+    max_age_days: Optional[int] = None,
+    quota_bytes: Optional[int] = None,
+    sessions_dir: Optional[str] = None,
+) -> GcReport:
+    """Remove sessions older than ``max_age_days``, then the least recently
+    used ones until all sessions fit in ``quota_bytes``.
+
+    Sizes count only bytes removal can free (see :class:`_DiskUsage`): files
+    shared with cases do not count, a blob counts once.
+
+    The newest session behind each existing case, ``LATEST.txt`` and
+    sessions used in the last ``ACTIVE_WINDOW_S`` are kept. With
+    ``archive_sessions`` on, sessions are packed into the day archive
+    (``session_archive.py``) before removal; one that cannot be packed stays.
+    Unreferenced blobs are pruned afterwards. Defaults come from
+    settings.json (``session_max_age_days``, ``session_quota_mb``).
+    """
+    default_age, default_quota = gc_settings()
+    max_age_days = default_age if max_age_days is None else max_age_days
+    quota_bytes = default_quota if quota_bytes is None else quota_bytes
+    sessions_dir = os.path.abspath(sessions_dir or SESSIONS_DIR)
+    report = GcReport()
+    with _GC_LOCK:
+        flush_sessions()
+        sessions, usage = _scan_sessions(sessions_dir)
+        report.sessions_before = len(sessions)
+        report.bytes_before = usage.total
+        for_cases = _case_sessions(sessions)
+        latest = read_latest_session()
+        keep = set(for_cases)
+        if latest:
+            keep.add(os.path.abspath(latest))
+        now = time.time()
+        candidates = sorted(
+            (
+                session
+                for session in sessions
+                if session.path not in keep
+                and now - session.mtime > ACTIVE_WINDOW_S
+            ),
+            key=lambda session: session.mtime,
+        )
+        selected: list[_Session] = []
+        planned = usage.copy()
+        for session in candidates:
+            expired = max_age_days > 0 and now - session.mtime > max_age_days * 86400
+            over_quota = quota_bytes > 0 and planned.total > quota_bytes
+            if expired or over_quota:
+                selected.append(session)
+                planned.release(session)
+        if selected and archive_enabled():
+            archived = set(archive_sessions([session.path for session in selected]))
+            report.archived = [session.path for session in selected if session.path in archived]
+            selected = [session for session in selected if session.path in archived]
+        for session in selected:
+            if _remove_session(session):
+                report.removed.append(session.path)
+                report.freed_bytes += usage.release(session)
+        report.kept_for_cases = len(for_cases)
+        report.bytes_after = usage.total
+        if report.removed:
+            catalog().forget_sessions(report.removed)
+            from blob_store import prune_blobs
+
+            try:
+                report.blobs_removed = prune_blobs(sessions_dir)
+            except OSError:
+                pass
+        report.finished_at = datetime.now().isoformat(timespec="seconds")
+    try:
+        save_json(gc_report_path(), asdict(report))
+    except OSError:
+        pass
+    return report
+
+
+def start_session_gc(
+    on_done: Optional[Callable[[GcReport], None]] = None,
+) -> threading.Thread:
+    """Run :func:`collect_sessions` in a daemon thread; startup does not wait for it."""
+
+    def _run() -> None:
+        try:
+            report = collect_sessions()
+        except Exception:
+            return
+        if on_done is not None:
+            on_done(report)
+
+    thread = threading.Thread(target=_run, name="F001-session-gc", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import runtime_utils
+
+
+@pytest.fixture(autouse=True)
+def _flush_session_states(monkeypatch):
+    """Flush session states while the test's runtime paths are still patched.
+
+    Depends on ``monkeypatch`` so it is torn down first; otherwise the atexit
+    flush would write run.json and catalog rows of a failed test into the
+    real runtime folder.
+    """
+    yield
+    runtime_utils.flush_sessions()
+    with runtime_utils._SESSION_STATES_LOCK:
+        runtime_utils._SESSION_STATES.clear()
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import F001_app
+import session_gc
+
+
+def test_cli_waits_for_session_gc_before_exit(monkeypatch):
+    finished = threading.Event()
+
+    def _slow_gc(on_done=None):
+        def _run():
+            time.sleep(0.2)
+            finished.set()
+
+        thread = threading.Thread(target=_run, daemon=True)
+        thread.start()
+        return thread
+
+    monkeypatch.setattr(session_gc, "start_session_gc", _slow_gc)
+    monkeypatch.setattr(F001_app, "ensure_runtime_files", lambda: None)
+    monkeypatch.setattr(F001_app, "run_cli", lambda args: None)
+    monkeypatch.setattr(sys, "argv", ["F001_app.py", "GKN.1"])
+
+    F001_app.main()
+
+    assert finished.is_set()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import blob_store
+from automation.portal_runner import _write_text
+from runtime_utils import break_hardlink
+
+HTML = "<html>same export</html>"
+
+
+def _interned_pair(tmp_path: Path, monkeypatch) -> tuple[Path, Path, str]:
+    """Two sessions with the same export, both interned (one shared inode)."""
+    monkeypatch.setattr(blob_store, "BLOBS_DIR", tmp_path / "blobs")
+    first = tmp_path / "sessions" / "s1" / "exports" / "main.html"
+    second = tmp_path / "sessions" / "s2" / "exports" / "main.html"
+    for path in (first, second):
+        _write_text(os.fspath(path), HTML)
+    digest = blob_store.intern_file(os.fspath(first))
+    assert blob_store.intern_file(os.fspath(second)) == digest
+    assert os.path.samefile(first, second)
+    return first, second, digest
+
+
+def test_rewriting_interned_export_keeps_other_session_and_blob(tmp_path, monkeypatch):
+    first, second, digest = _interned_pair(tmp_path, monkeypatch)
+
+    _write_text(os.fspath(first), "<html>resumed run</html>")
+
+    assert first.read_text(encoding="utf-8") == "<html>resumed run</html>"
+    assert second.read_text(encoding="utf-8") == HTML
+    assert blob_store.file_digest(blob_store.blob_path(digest)) == digest
+
+
+def test_break_hardlink_before_direct_write(tmp_path, monkeypatch):
+    # page.screenshot(path=...) and download.save_as(...) write the path directly.
+    first, second, digest = _interned_pair(tmp_path, monkeypatch)
+
+    break_hardlink(os.fspath(first))
+    with open(first, "wb") as handle:
+        handle.write(b"new screenshot")
+
+    assert second.read_text(encoding="utf-8") == HTML
+    assert blob_store.file_digest(blob_store.blob_path(digest)) == digest
+
+
+def test_resumed_export_is_interned_again(tmp_path, monkeypatch):
+    # A resumed session writes and interns its exports a second time.
+    import runtime_utils
+    from automation.portal_runner import _store_blob
+
+    first, second, digest = _interned_pair(tmp_path, monkeypatch)
+    monkeypatch.setattr(blob_store, "RUNTIME_ROOT", tmp_path)
+    monkeypatch.setattr(runtime_utils, "CATALOG_PATH", tmp_path / "catalog.sqlite")
+    session_root = os.fspath(tmp_path / "sessions" / "s1")
+
+    _write_text(os.fspath(first), "<html>resumed run</html>")
+    new_digest = _store_blob(session_root, os.fspath(first))
+    runtime_utils.session_state(session_root).flush()
+
+    assert new_digest and new_digest != digest
+    assert os.path.samefile(first, blob_store.blob_path(new_digest))
+    assert os.path.samefile(second, blob_store.blob_path(digest))
+    assert blob_store.file_digest(blob_store.blob_path(digest)) == digest
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import runtime_utils
+from automation import portal_runner
+from automation.event_log import EVENTS_FILE
+
+
+def _redirect_runtime(tmp_path: Path, monkeypatch) -> None:
+    old_root = runtime_utils.RUNTIME_ROOT
+    for name, value in list(vars(runtime_utils).items()):
+        if isinstance(value, Path) and name != "REPO_ROOT":
+            if value == old_root or old_root in value.parents:
+                monkeypatch.setattr(runtime_utils, name, tmp_path / value.relative_to(old_root))
+
+
+def _events(session_info: dict[str, str]) -> list[dict]:
+    path = os.path.join(os.path.dirname(session_info["log_path"]), EVENTS_FILE)
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+def test_early_batch_failure_events_carry_portal(tmp_path, monkeypatch):
+    _redirect_runtime(tmp_path, monkeypatch)
+    monkeypatch.setattr(portal_runner, "_load_playwright", lambda: (None, None))
+    sessions: list[dict[str, str]] = []
+
+    results = asyncio.run(
+        portal_runner.async_run_portal_batch(
+            ["GKN.1", "GKN.2"],
+            "PORTAL_A",
+            {},
+            {},
+            on_result=lambda number, result, info: sessions.append(info),
+        )
+    )
+
+    assert [result.status for _number, result in results] == ["failed", "failed"]
+    events = _events(sessions[0])
+    assert any(event["step"] == "STEP_00_IMPORT_PLAYWRIGHT" for event in events)
+    assert {(event["portal"], event["number"]) for event in events} == {("portal_a", "GKN.1")}
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+KLOCKI_DIR = Path(__file__).resolve().parents[2]
+if str(KLOCKI_DIR) not in sys.path:
+    sys.path.insert(0, str(KLOCKI_DIR))
+
+from _shared.geometry import parse_polygon_text, write_polygon_json
+
+SQUARE = "0 0\n10 0\n10 10\n0 10\n0 0"
+HOLE = "2 2\n4 2\n4 4\n2 2"
+
+
+def test_plain_pairs_closing_twice_are_two_rings(tmp_path):
+    # Written as one ring of 8 points before the shared parser.
+    path = tmp_path / "polygon_coords.json"
+
+    write_polygon_json(path, parse_polygon_text(f"{SQUARE}\n{HOLE}"))
+
+    assert json.loads(path.read_text(encoding="utf-8")) == [
+        [[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]],
+        [[2.0, 2.0], [4.0, 2.0], [4.0, 4.0], [2.0, 2.0]],
+    ]
+
+
+def test_plain_pairs_of_one_ring_keep_their_shape():
+    assert parse_polygon_text("1,5 2\n3 4,25\n5 6") == [[[1.5, 2.0], [3.0, 4.25], [5.0, 6.0]]]
+    assert parse_polygon_text(SQUARE) == [
+        [[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]]
+    ]
+
+
+def test_wkt_gives_one_ring_per_parentheses():
+    text = "POLYGON ((0 0, 10 0, 10 10, 0 0), (2 2, 4 2, 4 4, 2 2))"
+    assert parse_polygon_text(text) == [
+        [[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 0.0]],
+        [[2.0, 2.0], [4.0, 2.0], [4.0, 4.0], [2.0, 2.0]],
+    ]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import http.client
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+from automation import http_api
+from automation.http_api import LookupApi
+from automation.worker_pool import PortalJob
+
+
+class _Pool:
+    """Stands in for PortalWorkerPool: jobs are queued and never run."""
+
+    max_workers = 1
+
+    def __init__(self) -> None:
+        self.submitted: list[PortalJob] = []
+
+    def submit(self, portal_key: str, number: str, debug: bool = False) -> PortalJob:
+        job = PortalJob(portal_key=portal_key, number=number, debug=debug)
+        self.submitted.append(job)
+        return job
+
+
+@pytest.fixture
+def api():
+    api = LookupApi(_Pool(), port=0).start()
+    yield api
+    api.stop()
+
+
+def _request(api, method, path, body=None, headers=None):
+    port = api._server.port
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    headers = {"Host": f"127.0.0.1:{port}", **(headers or {})}
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    payload = json.loads(response.read() or b"null")
+    conn.close()
+    return response.status, payload
+
+
+def test_post_requires_json_content_type(api):
+    body = json.dumps({"portal_key": "p", "number": "1"})
+
+    status, _ = _request(api, "POST", "/jobs", body, {"Content-Type": "text/plain"})
+    assert status == 415
+    assert api.pool.submitted == []
+
+    status, payload = _request(
+        api, "POST", "/jobs", body, {"Content-Type": "application/json; charset=utf-8"}
+    )
+    assert status == 202
+    assert payload["jobs"][0]["number"] == "1"
+
+
+@pytest.mark.parametrize(
+    "host", ["evil.example:{port}", "127.0.0.1:1", "localhost", "", "[::1"]
+)
+def test_foreign_host_header_is_rejected(api, host):
+    # A rebound DNS name reaches 127.0.0.1 but keeps its own Host header.
+    status, payload = _request(
+        api, "GET", "/jobs", headers={"Host": host.format(port=api._server.port)}
+    )
+    assert status == 403
+    assert "jobs" not in payload
+
+
+def test_localhost_names_on_bound_port_are_accepted(api):
+    port = api._server.port
+    for host in (f"localhost:{port}", f"127.0.0.1:{port}"):
+        status, _ = _request(api, "GET", "/health", headers={"Host": host})
+        assert status == 200
+
+
+def test_wait_is_capped(api, monkeypatch):
+    monkeypatch.setattr(http_api, "MAX_WAIT_SECONDS", 0.2)
+    job = api.submit("p", "1")
+
+    for wait in ("1e9", "inf", "nan", "-5"):
+        started = time.monotonic()
+        status, payload = _request(api, "GET", f"/jobs/{job.job_id}?wait={wait}")
+        assert status == 200
+        assert payload["status"] == "queued"
+        assert time.monotonic() - started < 5
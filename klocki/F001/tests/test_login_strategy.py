@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+from automation import login_strategy
+from automation.login_strategy import STRATEGY_SELECTORS, learned_login, record_login
+
+
+def test_torn_strategy_file_counts_as_nothing_learned(tmp_path, monkeypatch):
+    path = tmp_path / "login_strategy.json"
+    monkeypatch.setattr(login_strategy, "login_strategy_path", lambda: str(path))
+    path.write_text('{"portal": {"learned": {"strat', encoding="utf-8")
+
+    assert learned_login("portal") is None
+
+    record_login("Portal", STRATEGY_SELECTORS, hit=True)
+
+    assert learned_login("portal")["strategy"] == STRATEGY_SELECTORS
+    assert list(tmp_path.iterdir()) == [path]
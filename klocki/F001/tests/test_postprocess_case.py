@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import blob_store
+import runtime_utils
+from automation.portal_runner import _postprocess_case, _store_blob, _write_text
+from runtime_utils import RUN_INFO, load_manifest, session_paths, write_json_atomic
+
+
+def _redirect_runtime(tmp_path: Path, monkeypatch) -> None:
+    old_root = runtime_utils.RUNTIME_ROOT
+    for module in (runtime_utils, blob_store):
+        for name, value in list(vars(module).items()):
+            if isinstance(value, Path) and name != "REPO_ROOT":
+                if value == old_root or old_root in value.parents:
+                    monkeypatch.setattr(module, name, tmp_path / value.relative_to(old_root))
+
+
+def test_case_files_are_created_when_interning_failed(tmp_path, monkeypatch):
+    _redirect_runtime(tmp_path, monkeypatch)
+    session_root = os.fspath(tmp_path / "sessions" / "2026-01-01" / "101500_P_123")
+    write_json_atomic(os.path.join(session_root, RUN_INFO), {"portal_key": "p"})
+    session_info = session_paths(session_root)
+    exports_dir = os.path.join(session_root, "exports")
+
+    interned = os.path.join(exports_dir, "main.html")
+    _write_text(interned, "<html>main</html>")
+    digest = _store_blob(session_root, interned)
+    # Rewritten by a resumed run whose intern_file failed: the manifest
+    # still lists the digest of the earlier text.
+    rewritten = os.path.join(exports_dir, "main.txt")
+    _write_text(rewritten, "old text")
+    _store_blob(session_root, rewritten)
+    _write_text(rewritten, "new text")
+    # Never interned at all.
+    _write_text(os.path.join(exports_dir, "frame_centr.html"), "<html>frame</html>")
+
+    case_dir, _files = asyncio.run(_postprocess_case(None, None, "123", "p", session_info))
+
+    case = Path(case_dir)
+    assert (case / "main.html").read_text(encoding="utf-8") == "<html>main</html>"
+    assert (case / "main.txt").read_text(encoding="utf-8") == "new text"
+    assert (case / "work_frame.html").read_text(encoding="utf-8") == "<html>frame</html>"
+    assert not (case / "work_frame.txt").exists()
+    dumps = {
+        path: value
+        for path, value in load_manifest(session_root)["blobs"].items()
+        if "/dumps/" in path
+    }
+    assert dumps == {"sessions/2026-01-01/101500_P_123/dumps/main.html": digest}
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import runtime_utils
+import session_archive
+from runtime_utils import RUN_INFO, write_json_atomic
+from session_archive import archive_path, archive_sessions, open_archived, read_index
+
+
+def _redirect_runtime(tmp_path: Path, monkeypatch) -> None:
+    old_root = runtime_utils.RUNTIME_ROOT
+    for module in (runtime_utils, session_archive):
+        for name, value in list(vars(module).items()):
+            if isinstance(value, Path) and name != "REPO_ROOT":
+                if value == old_root or old_root in value.parents:
+                    monkeypatch.setattr(module, name, tmp_path / value.relative_to(old_root))
+
+
+def _session(tmp_path: Path, name: str, log: str) -> str:
+    session_root = tmp_path / "sessions" / "2026-01-01" / name
+    write_json_atomic(os.fspath(session_root / RUN_INFO), {"portal_key": "p", "gkn": name})
+    (session_root / "logs").mkdir()
+    (session_root / "logs" / "F001.log").write_text(log, encoding="utf-8")
+    (session_root / "screens").mkdir()
+    (session_root / "screens" / "a.png").write_bytes(os.urandom(4096))
+    return os.fspath(session_root)
+
+
+def test_append_copies_existing_members_without_recompressing(tmp_path, monkeypatch):
+    _redirect_runtime(tmp_path, monkeypatch)
+    first = _session(tmp_path, "100000_P_A", "first log\n" * 500)
+    assert archive_sessions([first]) == [first]
+    with zipfile.ZipFile(archive_path("2026-01-01")) as archive:
+        before = {info.filename: info.CRC for info in archive.infolist()}
+
+    written: list[str] = []
+    write_member = session_archive._write_member
+
+    def _counting(archive, name, source, date_time=None):
+        written.append(name)
+        write_member(archive, name, source, date_time)
+
+    monkeypatch.setattr(session_archive, "_write_member", _counting)
+    second = _session(tmp_path, "100100_P_B", "second log\n")
+    assert archive_sessions([second]) == [second]
+
+    assert all(name.startswith("100100_P_B/") for name in written)
+    with zipfile.ZipFile(archive_path("2026-01-01")) as archive:
+        assert archive.testzip() is None
+        after = {info.filename: info.CRC for info in archive.infolist()}
+    assert {name: after[name] for name in before if name != "index.json"} == {
+        name: crc for name, crc in before.items() if name != "index.json"
+    }
+    assert [item["session"] for item in read_index("2026-01-01")] == [
+        "100000_P_A",
+        "100100_P_B",
+    ]
+    with open_archived("2026-01-01/100000_P_A", "logs/F001.log") as handle:
+        assert handle.read().decode("utf-8") == "first log\n" * 500
+
+
+def test_rearchived_session_replaces_its_old_copy(tmp_path, monkeypatch):
+    _redirect_runtime(tmp_path, monkeypatch)
+    first = _session(tmp_path, "100000_P_A", "old\n")
+    other = _session(tmp_path, "100100_P_B", "other\n")
+    archive_sessions([first, other])
+    Path(first, "logs", "F001.log").write_text("new\n", encoding="utf-8")
+
+    archive_sessions([first])
+
+    with zipfile.ZipFile(archive_path("2026-01-01")) as archive:
+        assert archive.testzip() is None
+        names = [info.filename for info in archive.infolist()]
+    assert len(names) == len(set(names))
+    with open_archived("2026-01-01/100000_P_A", "logs/F001.log") as handle:
+        assert handle.read() == b"new\n"
+    with open_archived("2026-01-01/100100_P_B", "logs/F001.log") as handle:
+        assert handle.read() == b"other\n"
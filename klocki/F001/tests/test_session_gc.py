@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import blob_store
+import runtime_utils
+import session_archive
+import session_gc
+
+KB = 1024
+
+
+def _redirect_runtime(tmp_path: Path, monkeypatch) -> None:
+    """Point every runtime path of the GC and blob modules at ``tmp_path``."""
+    old_root = runtime_utils.RUNTIME_ROOT
+    for module in (runtime_utils, blob_store, session_gc, session_archive):
+        for name, value in list(vars(module).items()):
+            if isinstance(value, Path) and name != "REPO_ROOT":
+                if value == old_root or old_root in value.parents:
+                    monkeypatch.setattr(module, name, tmp_path / value.relative_to(old_root))
+
+
+def _session(tmp_path: Path, name: str, files: dict[str, bytes]) -> str:
+    session_root = tmp_path / "sessions" / "2026-01-01" / name
+    for relpath, data in files.items():
+        path = session_root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return os.fspath(session_root)
+
+
+def _age(session_root: str, days: float) -> None:
+    old = time.time() - days * 86400
+    for root, _dirs, names in os.walk(session_root):
+        for item in names:
+            os.utime(os.path.join(root, item), (old, old))
+        os.utime(root, (old, old))
+
+
+def test_shared_files_are_not_counted_as_freed(tmp_path, monkeypatch):
+    _redirect_runtime(tmp_path, monkeypatch)
+    own = _session(tmp_path, "100000_P_A", {"logs/F001.log": b"x" * (4 * KB)})
+    shared = _session(tmp_path, "100100_P_B", {"logs/F001.log": b"y" * KB})
+    # Export interned in both sessions and also linked from a case folder.
+    export = os.path.join(shared, "exports", "main.html")
+    os.makedirs(os.path.dirname(export))
+    Path(export).write_bytes(b"z" * (8 * KB))
+    digest = blob_store.intern_file(export)
+    blob_store.link_blob(digest, os.path.join(own, "exports", "main.html"))
+    blob_store.link_blob(digest, os.fspath(tmp_path / "cases" / "p" / "GKN_1" / "main.html"))
+    # A blob used by both sessions only: freed once both are gone.
+    screen = os.path.join(own, "screens", "a.png")
+    os.makedirs(os.path.dirname(screen))
+    Path(screen).write_bytes(b"s" * (2 * KB))
+    screen_digest = blob_store.intern_file(screen)
+    blob_store.link_blob(screen_digest, os.path.join(shared, "screens", "a.png"))
+    _age(own, 30)
+    _age(shared, 30)
+
+    report = session_gc.collect_sessions(max_age_days=14, quota_bytes=0)
+
+    assert sorted(report.removed) == sorted([own, shared])
+    # Logs of both sessions plus the screenshot blob; the case export stays.
+    assert report.bytes_before == 7 * KB
+    assert report.freed_bytes == 7 * KB
+    assert report.bytes_after == 0
+    assert os.path.exists(blob_store.blob_path(digest))
+    assert not os.path.exists(blob_store.blob_path(screen_digest))
+
+
+def test_quota_counts_only_freeable_bytes(tmp_path, monkeypatch):
+    _redirect_runtime(tmp_path, monkeypatch)
+    first = _session(tmp_path, "100000_P_A", {"logs/F001.log": b"x" * (4 * KB)})
+    second = _session(tmp_path, "100100_P_B", {"logs/F001.log": b"y" * (4 * KB)})
+    # A large export held by a case: removing sessions never frees it.
+    export = os.path.join(first, "exports", "main.html")
+    os.makedirs(os.path.dirname(export))
+    Path(export).write_bytes(b"z" * (64 * KB))
+    digest = blob_store.intern_file(export)
+    blob_store.link_blob(digest, os.fspath(tmp_path / "cases" / "p" / "GKN_1" / "main.html"))
+    _age(first, 30)
+    _age(second, 29)
+
+    report = session_gc.collect_sessions(max_age_days=0, quota_bytes=6 * KB)
+
+    # 8 KB of session-owned data over a 6 KB quota: only the older session goes.
+    assert report.removed == [first]
+    assert report.freed_bytes == 4 * KB
+    assert os.path.isdir(second)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import runtime_utils
+from runtime_utils import MANIFEST, RUN_INFO, SessionState, load_json, write_json_atomic
+
+
+def _session(tmp_path: Path, monkeypatch) -> str:
+    monkeypatch.setattr(runtime_utils, "CATALOG_PATH", tmp_path / "catalog.sqlite")
+    session_root = tmp_path / "sessions" / "2026-01-01" / "101500_P_GKN_1"
+    session_root.mkdir(parents=True)
+    write_json_atomic(os.fspath(session_root / RUN_INFO), {"portal_key": "p", "run_count": 0})
+    return os.fspath(session_root)
+
+
+def test_concurrent_writers_keep_both_updates(tmp_path, monkeypatch):
+    session_root = _session(tmp_path, monkeypatch)
+    # Two processes (panel and daemon) with their own in-memory state.
+    panel, daemon = SessionState(session_root), SessionState(session_root)
+
+    panel.update(RUN_INFO, {"last_status": "success"})
+    daemon.update(RUN_INFO, {"run_count": 1})
+    daemon.merge(MANIFEST, "blobs", {"exports/main.html": "abc"})
+    daemon.flush()
+    panel.flush()
+
+    run_info = load_json(os.path.join(session_root, RUN_INFO), {})
+    assert run_info == {"portal_key": "p", "run_count": 1, "last_status": "success"}
+    manifest = load_json(os.path.join(session_root, MANIFEST), {})
+    assert manifest["blobs"] == {"exports/main.html": "abc"}
+
+
+def test_external_rewrite_under_pending_merge(tmp_path, monkeypatch):
+    session_root = _session(tmp_path, monkeypatch)
+    state = SessionState(session_root)
+    state.merge(MANIFEST, "blobs", {"a": "1"})
+
+    write_json_atomic(os.path.join(session_root, MANIFEST), {"status": "postprocess_ok"})
+    state.flush()
+
+    manifest = load_json(os.path.join(session_root, MANIFEST), {})
+    assert manifest == {"status": "postprocess_ok", "blobs": {"a": "1"}}
+    assert state.read(MANIFEST) == manifest
+
+
+def test_new_session_is_on_disk_before_any_flush(tmp_path, monkeypatch):
+    old_root = runtime_utils.RUNTIME_ROOT
+    for name, value in list(vars(runtime_utils).items()):
+        if isinstance(value, Path) and name != "REPO_ROOT":
+            if value == old_root or old_root in value.parents:
+                monkeypatch.setattr(runtime_utils, name, tmp_path / value.relative_to(old_root))
+
+    session_root = runtime_utils.create_session("p", "GKN.1")
+
+    # What a crash right after create_session leaves behind.
+    assert runtime_utils.read_latest_session() == session_root
+    assert load_json(os.path.join(session_root, RUN_INFO), {})["portal_key"] == "p"
+    assert load_json(os.path.join(session_root, MANIFEST), {})["status"] == "init"
+    assert not runtime_utils.session_state(session_root).dirty
+    rows = runtime_utils.catalog().find_sessions(portal_key="p")
+    assert [row["status"] for row in rows] == ["init"]
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import runtime_utils
+from automation.portal_runner import _RESTORED_STATES, _drop_restored_state, _new_portal_page
+from runtime_utils import storage_state_path
+
+
+class _Page:
+    def on(self, event, handler):
+        pass
+
+
+class _Context:
+    async def new_page(self):
+        return _Page()
+
+
+class _Browser:
+    def __init__(self) -> None:
+        self.loaded: list[str | None] = []
+
+    async def new_context(self, storage_state=None):
+        self.loaded.append(storage_state)
+        return _Context()
+
+
+def _save_state(content: str, mtime_ns: int) -> str:
+    path = storage_state_path("p")
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def _open(browser: _Browser):
+    return asyncio.run(_new_portal_page(browser, "p", None))
+
+
+def test_page_opened_without_state_ignores_state_saved_later(tmp_path, monkeypatch):
+    monkeypatch.setattr(runtime_utils, "STATE_DIR", tmp_path)
+    browser = _Browser()
+    page = _open(browser)
+    assert browser.loaded == [None]
+
+    # Another pooled job logs in and saves a fresh state meanwhile.
+    path = _save_state('{"cookies": []}', time.time_ns())
+
+    assert page not in _RESTORED_STATES
+    assert os.path.exists(path)
+
+
+def test_rejected_state_is_dropped_only_if_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(runtime_utils, "STATE_DIR", tmp_path)
+    now = time.time_ns()
+    path = _save_state('{"cookies": ["old"]}', now - 10**9)
+    browser = _Browser()
+    page = _open(browser)
+    assert browser.loaded == [path]
+    restored = _RESTORED_STATES[page]
+
+    _save_state('{"cookies": ["new"]}', now)
+    _drop_restored_state("p", restored)
+    assert os.path.exists(path)
+
+    page = _open(browser)
+    _drop_restored_state("p", _RESTORED_STATES[page])
+    assert not os.path.exists(path)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import runtime_utils
+from automation.warm_browser import WarmBrowser
+
+
+def _recording(browser: WarmBrowser) -> list[object]:
+    submitted: list[object] = []
+
+    def _submit(coro):
+        coro.close()
+        submitted.append(coro)
+
+    browser._submit = _submit
+    browser.available = True
+    return submitted
+
+
+def test_headed_browser_is_not_launched_before_first_run():
+    browser = WarmBrowser()
+    submitted = _recording(browser)
+
+    browser.warm("p", {"url": "https://portal"}, fast=False)
+    assert submitted == []
+
+    browser.warm("p", {"url": "https://portal"}, fast=True)
+    assert len(submitted) == 1
+
+
+def test_running_headed_browser_keeps_preparing_pages():
+    browser = WarmBrowser()
+    submitted = _recording(browser)
+    browser._browser, browser._headless = object(), False
+
+    browser.warm("p", {"url": "https://portal"}, fast=False)
+
+    assert len(submitted) == 1
+
+
+def test_panel_fast_mode_toggle_keeps_newer_settings(tmp_path, monkeypatch):
+    import F001_panel
+
+    monkeypatch.setattr(runtime_utils, "CONFIG_DIR", tmp_path)
+    path = Path(runtime_utils.settings_path())
+    path.write_text(json.dumps({"fast_mode": False}), encoding="utf-8")
+    panel = SimpleNamespace(
+        settings={"fast_mode": False},
+        fast_var=SimpleNamespace(get=lambda: True),
+        _warm_up=lambda: None,
+    )
+    # Changed on disk after the panel loaded its snapshot.
+    path.write_text(json.dumps({"fast_mode": False, "archive_sessions": True}), encoding="utf-8")
+
+    F001_panel.F001Panel._save_fast_mode(panel)
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {
+        "fast_mode": True,
+        "archive_sessions": True,
+    }
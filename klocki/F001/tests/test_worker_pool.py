@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+F001_DIR = Path(__file__).resolve().parents[1]
+if str(F001_DIR) not in sys.path:
+    sys.path.insert(0, str(F001_DIR))
+
+import runtime_utils
+from automation import checkpoints
+from automation.checkpoints import STEP_LOGIN, STEP_LOOKUP, save_checkpoint
+from automation.worker_pool import PortalJob, PortalWorkerPool
+from runtime_utils import RUN_INFO, load_run_info, session_paths, write_json_atomic
+
+
+def _redirect_runtime(tmp_path: Path, monkeypatch) -> None:
+    old_root = runtime_utils.RUNTIME_ROOT
+    for module in (runtime_utils, checkpoints):
+        for name, value in list(vars(module).items()):
+            if isinstance(value, Path) and name != "REPO_ROOT":
+                if value == old_root or old_root in value.parents:
+                    monkeypatch.setattr(module, name, tmp_path / value.relative_to(old_root))
+
+
+def _failed_attempt(number: str) -> str:
+    """Session of an earlier attempt that stopped after the lookup step."""
+    date_dir = runtime_utils.SESSIONS_DIR / datetime.now().strftime("%Y-%m-%d")
+    session_root = os.fspath(date_dir / f"000001_P_{number}")
+    write_json_atomic(
+        os.path.join(session_root, RUN_INFO),
+        {"portal_key": "p", "last_number": number, "run_count": 1, "last_status": "failed"},
+    )
+    session_info = session_paths(session_root)
+    save_checkpoint(session_info, number, STEP_LOGIN)
+    save_checkpoint(session_info, number, STEP_LOOKUP, {"work_url": "https://portal/work/1"})
+    return session_root
+
+
+def test_pooled_retry_resumes_unfinished_session(tmp_path, monkeypatch):
+    _redirect_runtime(tmp_path, monkeypatch)
+    earlier = _failed_attempt("123")
+    pool = PortalWorkerPool()
+    job = PortalJob(portal_key="p", number="123")
+
+    # No browser: the job fails fast, but inside the resumed session.
+    asyncio.run(pool._run_job(None, job))
+
+    assert job.session_root == earlier
+    run_info = load_run_info(earlier)
+    assert run_info["run_count"] == 2
+    assert run_info["job_id"] == job.job_id
+    assert run_info["checkpoints"]["steps"][STEP_LOOKUP]["work_url"] == "https://portal/work/1"
+    assert not pool._active_sessions
+
+
+def test_session_of_running_job_is_not_resumed_twice(tmp_path, monkeypatch):
+    _redirect_runtime(tmp_path, monkeypatch)
+    earlier = _failed_attempt("123")
+    pool = PortalWorkerPool()
+    pool._active_sessions.add(earlier)
+    job = PortalJob(portal_key="p", number="123")
+
+    asyncio.run(pool._run_job(None, job))
+
+    assert job.session_root != earlier
+    assert load_run_info(job.session_root)["run_count"] == 1
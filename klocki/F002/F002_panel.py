@@ -4,7 +4,9 @@ import hashlib
 import json
 import math
 import os
+import sqlite3
 import subprocess
+import sys
 import threading
 import traceback
 import urllib.parse
@@ -35,6 +37,14 @@ INDEX_CASES = F001_RUNTIME / "index_cases.json"
 SHARED_STATE = F001_RUNTIME / "shared_state.json"
 SHARED_STATE_LEGACY = F001_RUNTIME / "shared" / "shared_state.json"
 
+# Parser poligonów i katalog wspólne z F001 (klocki/_shared/).
+if str(REPO_ROOT / "klocki") not in sys.path:
+    sys.path.append(str(REPO_ROOT / "klocki"))
+from _shared.catalog import CATALOG_FILE, Catalog
+from _shared.geometry import close_ring, load_case_polygon, points_in_rings
+
+CATALOG = Catalog(F001_RUNTIME / CATALOG_FILE)
+
 ULDK_BASE_URL = "https://uldk.gugik.gov.pl/"
 
 
@@ -88,7 +98,30 @@ def _build_case_index() -> None:
         subprocess.run(["python", os.fspath(script_path)], check=False)
 
 
+def _catalog_cases() -> list[dict[str, Any]]:
+    try:
+        rows = CATALOG.find_cases(limit=10000)
+    except sqlite3.Error as exc:
+        _log(f"Catalog error: {exc}")
+        return []
+    return [
+        {
+            "portal_key": row["portal_key"],
+            "gkn": row["gkn"],
+            "case_dir": row["case_dir"],
+            "meta": row["meta"],
+            "timestamp": row["updated_at"],
+        }
+        for row in rows
+        if os.path.isdir(row["case_dir"])
+    ]
+
+
 def _load_cases() -> list[dict[str, Any]]:
+    # Katalog zna też case zapisane przez F001 po ostatnim build_case_index.
+    cases = _catalog_cases()
+    if cases:
+        return cases
     if not INDEX_CASES.exists():
         _build_case_index()
     payload = _load_json(INDEX_CASES, {})
@@ -104,6 +137,12 @@ def _find_active_case_dir(cases: list[dict[str, Any]]) -> str:
                 value = data.get(key)
                 if value:
                     return value
+    try:
+        value = CATALOG.get_state("last_case_dir")
+    except sqlite3.Error:
+        value = None
+    if value:
+        return value
     if cases:
         return cases[0].get("case_dir", "")
     return ""
@@ -116,57 +155,13 @@ def _format_case_label(case: dict[str, Any]) -> str:
     return f"{portal} | {gkn} | {timestamp}"
 
 
-def _parse_gk_poligon(path: Path) -> list[list[float]]:
-    points: list[list[float]] = []
-    with path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            numbers = [item.replace(",", ".") for item in line.strip().split()]
-            if len(numbers) < 2:
-                continue
-            try:
-                x = float(numbers[0])
-                y = float(numbers[1])
-            except ValueError:
-                continue
-            points.append([x, y])
-    return points
-
-
-def _parse_polygon_coords(path: Path) -> list[list[float]]:
-    content = path.read_text(encoding="utf-8")
-    numbers: list[float] = []
-    for token in content.replace(";", " ").replace(",", " ").split():
-        try:
-            numbers.append(float(token))
-        except ValueError:
-            continue
-    points = []
-    for idx in range(0, len(numbers) - 1, 2):
-        points.append([numbers[idx], numbers[idx + 1]])
-    return points
-
+def _load_polygon(case_dir: Path) -> tuple[list[list[list[float]]], str]:
+    rings, polygon_path = load_case_polygon(case_dir)
+    return [close_ring(ring) for ring in rings if len(ring) >= 3], polygon_path
 
-def _load_polygon(case_dir: Path) -> tuple[list[list[float]], str]:
-    gk_files = sorted(case_dir.glob("GK_*_poligon.txt"))
-    if gk_files:
-        return _parse_gk_poligon(gk_files[0]), os.fspath(gk_files[0])
-    polygon_path = case_dir / "polygon_coords.txt"
-    if polygon_path.exists():
-        return _parse_polygon_coords(polygon_path), os.fspath(polygon_path)
-    return [], ""
 
-
-def _close_polygon(points: list[list[float]]) -> list[list[float]]:
-    if not points:
-        return []
-    closed = [point[:] for point in points]
-    if closed[0] != closed[-1]:
-        closed.append(closed[0][:])
-    return closed
-
-
-def _polygon_hash(points: list[list[float]]) -> str:
-    normalized = ";".join(f"{pt[0]:.4f},{pt[1]:.4f}" for pt in points)
+def _polygon_hash(rings: list[list[list[float]]]) -> str:
+    normalized = "|".join(";".join(f"{pt[0]:.4f},{pt[1]:.4f}" for pt in ring) for ring in rings)
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
@@ -191,22 +186,9 @@ def _polygon_centroid(points: list[list[float]]) -> list[float]:
     return [cx, cy]
 
 
-def _point_in_polygon(point: list[float], polygon: list[list[float]]) -> bool:
-    x, y = point
-    inside = False
-    for i in range(len(polygon) - 1):
-        x0, y0 = polygon[i]
-        x1, y1 = polygon[i + 1]
-        if (y0 > y) != (y1 > y):
-            x_intersect = (x1 - x0) * (y - y0) / (y1 - y0 + 1e-9) + x0
-            if x < x_intersect:
-                inside = not inside
-    return inside
-
-
-def _grid_points(polygon: list[list[float]], limit: int) -> list[list[float]]:
-    xs = [pt[0] for pt in polygon]
-    ys = [pt[1] for pt in polygon]
+def _grid_points(rings: list[list[list[float]]], limit: int) -> list[list[float]]:
+    xs = [pt[0] for ring in rings for pt in ring]
+    ys = [pt[1] for ring in rings for pt in ring]
     min_x, max_x = min(xs), max(xs)
     min_y, max_y = min(ys), max(ys)
     width = max_x - min_x
@@ -216,18 +198,14 @@ def _grid_points(polygon: list[list[float]], limit: int) -> list[list[float]]:
     count = max(1, int(math.sqrt(limit)))
     step_x = width / count
     step_y = height / count
-    points: list[list[float]] = []
-    for i in range(1, count):
-        for j in range(1, count):
-            candidate = [min_x + i * step_x, min_y + j * step_y]
-            if _point_in_polygon(candidate, polygon):
-                points.append(candidate)
-                if len(points) >= limit:
-                    return points
-    return points
-
-
-def _sample_points(polygon: list[list[float]], limit: int) -> list[list[float]]:
+    candidates = [
+        [min_x + i * step_x, min_y + j * step_y] for i in range(1, count) for j in range(1, count)
+    ]
+    inside = points_in_rings(candidates, rings)
+    return [point for point, flag in zip(candidates, inside) if flag][:limit]
+
+
+def _sample_points(rings: list[list[list[float]]], limit: int) -> list[list[float]]:
     unique: list[list[float]] = []
     seen = set()
 
@@ -237,13 +215,15 @@ def _sample_points(polygon: list[list[float]], limit: int) -> list[list[float]]:
             seen.add(key)
             unique.append(point)
 
-    for point in polygon[:-1]:
-        _add(point)
-    centroid = _polygon_centroid(polygon)
+    for ring in rings:
+        for point in ring[:-1]:
+            _add(point)
+    # Pierwszy pierścień to obrys zewnętrzny (kolejne: dziury lub kolejne części).
+    centroid = _polygon_centroid(rings[0])
     _add(centroid)
     remaining = max(0, limit - len(unique))
     if remaining:
-        for point in _grid_points(polygon, remaining):
+        for point in _grid_points(rings, remaining):
             _add(point)
             if len(unique) >= limit:
                 break
@@ -341,14 +321,13 @@ class F002Panel:
             self.limit_var.set(str(state.get("limit", "200")))
 
     def _save_state(self) -> None:
-        _save_json(
-            F002_STATE,
-            {
-                "srid": self.srid_var.get(),
-                "limit": self.limit_var.get(),
-                "last_case_dir": self.case_dir_var.get(),
-            },
-        )
+        state = {
+            "srid": self.srid_var.get(),
+            "limit": self.limit_var.get(),
+            "last_case_dir": self.case_dir_var.get(),
+        }
+        _save_json(F002_STATE, state)
+        CATALOG.set_state("f002", state)
 
     def _build_ui(self) -> None:
         header = ttk.Frame(self.root, padding=10)
@@ -467,12 +446,11 @@ class F002Panel:
             limit = 200
 
         self._set_status("POLYGON", "Wczytywanie poligonu")
-        points, polygon_path = _load_polygon(case_dir)
-        if len(points) < 3:
+        rings, polygon_path = _load_polygon(case_dir)
+        if not rings:
             self._set_status("POLYGON", "Brak poprawnego poligonu", "error")
             return
-        polygon = _close_polygon(points)
-        polygon_hash = _polygon_hash(polygon)
+        polygon_hash = _polygon_hash(rings)
 
         json_path = case_dir / "f002_admin_units.json"
         csv_path = case_dir / "f002_admin_units.csv"
@@ -489,7 +467,7 @@ class F002Panel:
         self.cache_var.set("-")
         self._set_status("ULDK", "Pobieranie danych z ULDK")
 
-        sample_points = _sample_points(polygon, limit)
+        sample_points = _sample_points(rings, limit)
         communes: dict[str, str] = {}
         regions: dict[str, str] = {}
 
@@ -515,6 +493,7 @@ class F002Panel:
         _write_csv(csv_path, communes, regions)
         _write_summary(summary_path, communes, regions)
         _update_manifest(case_dir, json_path, csv_path, summary_path)
+        CATALOG.upsert_f002(os.fspath(case_dir), payload, os.fspath(json_path))
         self.paths_var.set(f"{json_path}; {csv_path}")
         self._set_status("DONE", "Zapisano wyniki", "ok")
         self._save_state()
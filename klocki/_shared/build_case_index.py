@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import argparse
 import json
 import os
+import sqlite3
+import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 
 def _find_repo_root(start_path: Path) -> Path:
@@ -20,6 +23,12 @@ REPO_ROOT = _find_repo_root(Path(__file__).resolve())
 RUNTIME_ROOT = REPO_ROOT / "klocki" / "F001_runtime"
 CASES_DIR = RUNTIME_ROOT / "cases"
 INDEX_PATH = RUNTIME_ROOT / "index_cases.json"
+FINGERPRINTS_PATH = RUNTIME_ROOT / "state" / "index_cases_fingerprints.json"
+
+# Run as a script: klocki/ on sys.path for the package import.
+if str(REPO_ROOT / "klocki") not in sys.path:
+    sys.path.append(str(REPO_ROOT / "klocki"))
+from _shared.catalog import CATALOG_FILE, Catalog
 
 
 def _load_json(path: Path, default: Any) -> Any:
@@ -50,6 +59,21 @@ def _case_entry(case_dir: Path) -> dict[str, Any]:
     }
 
 
+def _fingerprint(case_dir: os.DirEntry[str]) -> list[int]:
+    """``[dir mtime_ns, meta.json mtime_ns, meta.json size]``.
+
+    Adding, removing or renaming a file changes the folder mtime; rewriting
+    ``meta.json`` in place does not, hence its own stat. Plain ``os`` calls:
+    this runs for every case folder.
+    """
+    dir_mtime = case_dir.stat().st_mtime_ns
+    try:
+        meta_stat = os.stat(os.path.join(case_dir.path, "meta.json"))
+    except OSError:
+        return [dir_mtime, 0, 0]
+    return [dir_mtime, meta_stat.st_mtime_ns, meta_stat.st_size]
+
+
 def _is_case_dir(path: Path) -> bool:
     if not path.is_dir():
         return False
@@ -64,29 +88,132 @@ def _is_case_dir(path: Path) -> bool:
     return False
 
 
-def build_index() -> dict[str, Any]:
-    cases: list[dict[str, Any]] = []
+def _previous_cases() -> dict[str, dict[str, Any]]:
+    try:
+        payload = _load_json(INDEX_PATH, {})
+    except (OSError, ValueError):
+        return {}
+    cases = payload.get("cases", []) if isinstance(payload, dict) else []
+    return {
+        entry["case_dir"]: entry
+        for entry in cases
+        if isinstance(entry, dict) and entry.get("case_dir")
+    }
+
+
+def _index_stamp() -> list[int]:
+    try:
+        stat = INDEX_PATH.stat()
+    except OSError:
+        return []
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _load_fingerprints() -> dict[str, Any]:
+    """Fingerprints of the last build; ignored if index_cases.json was rewritten since."""
+    try:
+        state = _load_json(FINGERPRINTS_PATH, {})
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict) or not state.get("index") or state["index"] != _index_stamp():
+        return {}
+    return state
+
+
+def _write_json(path: Path, payload: Any) -> None:
+    os.makedirs(path.parent, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+        json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+def build_index(full: bool = False) -> dict[str, Any]:
+    """Update ``index_cases.json`` and the catalog from ``cases/``; returns counts.
+
+    The fingerprint of every case folder is kept in ``FINGERPRINTS_PATH``.
+    A folder with an unchanged fingerprint is not read at all (no
+    ``meta.json``, no glob) and, when nothing changed, neither is the index:
+    the cost is one stat per folder and ``meta.json``. New and changed cases
+    are read, removed ones dropped. ``full`` re-reads every case.
+    """
+    state = {} if full else _load_fingerprints()
+    known: dict[str, list[int]] = state.get("cases", {})
+    known_other: dict[str, list[int]] = state.get("other", {})
+    fingerprints: dict[str, list[int]] = {}
+    other: dict[str, list[int]] = {}
+    changed: list[dict[str, Any]] = []
     if CASES_DIR.exists():
-        for portal_dir in CASES_DIR.iterdir():
-            if not portal_dir.is_dir():
-                continue
-            for case_dir in portal_dir.iterdir():
-                if _is_case_dir(case_dir):
-                    cases.append(_case_entry(case_dir))
+        with os.scandir(CASES_DIR) as portal_dirs:
+            for portal_dir in portal_dirs:
+                if not portal_dir.is_dir():
+                    continue
+                with os.scandir(portal_dir.path) as case_dirs:
+                    for item in case_dirs:
+                        if not item.is_dir():
+                            continue
+                        try:
+                            fingerprint = _fingerprint(item)
+                        except OSError:
+                            continue
+                        if known.get(item.path) == fingerprint:
+                            fingerprints[item.path] = fingerprint
+                        elif known_other.get(item.path) == fingerprint:
+                            other[item.path] = fingerprint
+                        elif _is_case_dir(Path(item.path)):
+                            fingerprints[item.path] = fingerprint
+                            changed.append(_case_entry(Path(item.path)))
+                        else:
+                            other[item.path] = fingerprint
+    removed = [case_dir for case_dir in known if case_dir not in fingerprints]
+    counts = {"count": len(fingerprints), "changed": len(changed), "removed": len(removed)}
+    catalog = Catalog(RUNTIME_ROOT / CATALOG_FILE)
+    if state and not changed and not removed:
+        # Nothing changed: the index stays as it is; only an empty catalog is filled.
+        try:
+            refill = not catalog.has_cases()
+        except sqlite3.Error:
+            refill = False
+        if refill:
+            catalog.sync_cases(list(_previous_cases().values()))
+        return counts
+
+    previous = _previous_cases() if state else {}
+    cases = list(changed)
+    fresh = {entry["case_dir"] for entry in changed}
+    for case_dir in fingerprints:
+        if case_dir in fresh:
+            continue
+        entry = previous.get(case_dir)
+        if entry is None:
+            # Out of sync with the index file: read the case again.
+            entry = _case_entry(Path(case_dir))
+            changed.append(entry)
+        cases.append(entry)
     cases.sort(key=lambda item: item.get("timestamp", ""), reverse=True)
     payload = {
         "generated_at": datetime.now().isoformat(timespec="seconds"),
         "count": len(cases),
         "cases": cases,
     }
-    os.makedirs(RUNTIME_ROOT, exist_ok=True)
-    with INDEX_PATH.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=False, indent=2)
-    return payload
-
-
-def main() -> None:
-    build_index()
+    _write_json(INDEX_PATH, payload)
+    _write_json(
+        FINGERPRINTS_PATH,
+        {"index": _index_stamp(), "cases": fingerprints, "other": other},
+    )
+    # index_cases.json stays the export; the catalog gets the same changes.
+    if state:
+        catalog.update_cases(changed, removed)
+    else:
+        catalog.sync_cases(cases)
+    return counts
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build klocki/F001_runtime/index_cases.json")
+    parser.add_argument("--full", action="store_true", help="Re-read every case folder")
+    args = parser.parse_args(argv)
+    build_index(full=args.full)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,509 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+
+def _find_repo_root(start_path: Path) -> Path:
+    for parent in [start_path, *start_path.parents]:
+        if (parent / ".git").exists():
+            return parent
+        if (parent / "klocki").exists():
+            return parent
+    return start_path.parent
+
+
+REPO_ROOT = _find_repo_root(Path(__file__).resolve())
+CATALOG_FILE = "catalog.sqlite"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    session_root TEXT NOT NULL,
+    date TEXT NOT NULL,
+    portal_key TEXT,
+    gkn_key TEXT,
+    number TEXT,
+    started_at TEXT,
+    status TEXT,
+    last_step TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_portal ON sessions (portal_key, date);
+CREATE INDEX IF NOT EXISTS sessions_gkn ON sessions (gkn_key, date);
+CREATE INDEX IF NOT EXISTS sessions_date ON sessions (date);
+CREATE INDEX IF NOT EXISTS sessions_status ON sessions (status, date);
+
+CREATE TABLE IF NOT EXISTS cases (
+    case_dir TEXT PRIMARY KEY,
+    portal_key TEXT NOT NULL,
+    gkn TEXT NOT NULL,
+    gkn_key TEXT NOT NULL,
+    session_id TEXT,
+    meta TEXT,
+    files TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cases_portal ON cases (portal_key, updated_at);
+CREATE INDEX IF NOT EXISTS cases_gkn ON cases (gkn_key);
+CREATE INDEX IF NOT EXISTS cases_updated ON cases (updated_at);
+
+CREATE TABLE IF NOT EXISTS f002_results (
+    case_dir TEXT PRIMARY KEY,
+    polygon_hash TEXT,
+    srid INTEGER,
+    communes TEXT,
+    regions TEXT,
+    json_path TEXT,
+    generated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+def default_catalog_path() -> Path:
+    runtime_root = os.environ.get("F001_RUNTIME_ROOT") or REPO_ROOT / "klocki" / "F001_runtime"
+    return Path(runtime_root) / CATALOG_FILE
+
+
+def gkn_key(gkn: str) -> str:
+    """F001 ``sanitize_gkn``, case-insensitive: ``gkn.1/2`` and ``GKN_1_2`` match."""
+    return re.sub(r"[^A-Za-z0-9]+", "_", gkn or "").strip("_").upper() or "UNKNOWN"
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+class Catalog:
+    """Local SQLite index of sessions, cases, F002 results and shared state.
+
+    JSON files in the runtime remain the source of record and the export
+    format; the catalog only makes lookups by portal, GKN, date and status
+    fast. Writes never raise (the catalog can always be rebuilt from the
+    folders: :meth:`rebuild_sessions`, ``build_case_index.py``), reads do.
+
+    One connection per instance, opened on first use and shared by threads
+    under a lock; it is reopened after an error.
+    """
+
+    def __init__(self, path: Optional[os.PathLike[str] | str] = None) -> None:
+        self.path = os.fspath(path or default_catalog_path())
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        # WAL + NORMAL: commits do not fsync; a crash loses at most the last writes.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._open()
+            try:
+                yield self._conn
+            except sqlite3.Error:
+                self._close_locked()
+                raise
+
+    def _close_locked(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_locked()
+
+    def _write(self, sql: str, rows: list[tuple[Any, ...]], clear: Optional[str] = None) -> bool:
+        """``executemany`` in one transaction; ``clear`` empties that table first."""
+        try:
+            with self._connection() as conn, conn:
+                if clear:
+                    conn.execute(f"DELETE FROM {clear}")
+                conn.executemany(sql, rows)
+            return True
+        except (sqlite3.Error, OSError):
+            return False
+
+    def _query(self, sql: str, params: tuple[Any, ...]) -> list[dict[str, Any]]:
+        with self._connection() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    # -- writes ---------------------------------------------------------------
+
+    def upsert_session(
+        self,
+        session_root: str,
+        portal_key: Optional[str] = None,
+        number: Optional[str] = None,
+        started_at: Optional[str] = None,
+        status: Optional[str] = None,
+        last_step: Optional[str] = None,
+    ) -> bool:
+        """Insert a session or update the fields that are given (``None`` keeps them)."""
+        return self._write(
+            _UPSERT_SESSION,
+            [_session_row(session_root, portal_key, number, started_at, status, last_step)],
+        )
+
+    def upsert_case(
+        self,
+        case_dir: str,
+        portal_key: str,
+        gkn: str,
+        session_root: Optional[str] = None,
+        meta: Optional[dict[str, Any]] = None,
+        files: Optional[list[str]] = None,
+        updated_at: Optional[str] = None,
+    ) -> bool:
+        session_id = _session_id(session_root) if session_root else None
+        return self._write(
+            _UPSERT_CASE,
+            [_case_row(case_dir, portal_key, gkn, session_id, meta, files, updated_at)],
+        )
+
+    def sync_cases(self, entries: list[dict[str, Any]]) -> bool:
+        """Make the cases table match a full scan (``build_case_index`` entries).
+
+        One transaction; cases whose folder is gone are dropped, the session
+        link written by F001 is kept.
+        """
+        rows = _entry_rows(entries)
+        try:
+            with self._connection() as conn, conn:
+                conn.executemany(_UPSERT_CASE, rows)
+                known = {row[0] for row in rows}
+                gone = [
+                    (case_dir,)
+                    for (case_dir,) in conn.execute("SELECT case_dir FROM cases")
+                    if case_dir not in known
+                ]
+                conn.executemany("DELETE FROM cases WHERE case_dir = ?", gone)
+            return True
+        except (sqlite3.Error, OSError):
+            return False
+
+    def update_cases(self, changed: list[dict[str, Any]], removed: list[str]) -> bool:
+        """Incremental :meth:`sync_cases`: only ``changed`` and ``removed`` are written."""
+        try:
+            with self._connection() as conn, conn:
+                conn.executemany(_UPSERT_CASE, _entry_rows(changed))
+                conn.executemany(
+                    "DELETE FROM cases WHERE case_dir = ?",
+                    [(os.path.abspath(case_dir),) for case_dir in removed],
+                )
+            return True
+        except (sqlite3.Error, OSError):
+            return False
+
+    def forget_sessions(self, session_roots: list[str]) -> bool:
+        """Drop sessions removed from disk (GC, clearing the session folder)."""
+        return self._write(
+            "DELETE FROM sessions WHERE session_id = ?",
+            [(_session_id(root),) for root in session_roots],
+        )
+
+    def forget_all_sessions(self) -> bool:
+        return self._write("DELETE FROM sessions", [], clear="sessions")
+
+    def upsert_f002(self, case_dir: str, payload: dict[str, Any], json_path: str) -> bool:
+        return self._write(
+            """
+            INSERT OR REPLACE INTO f002_results
+                (case_dir, polygon_hash, srid, communes, regions, json_path, generated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [(
+                os.path.abspath(case_dir),
+                payload.get("polygon_hash"),
+                payload.get("srid"),
+                _dumps(payload.get("communes") or []),
+                _dumps(payload.get("regions") or []),
+                json_path,
+                payload.get("generated_at") or _now(),
+            )],
+        )
+
+    def set_state(self, key: str, value: Any) -> bool:
+        return self._write(
+            "INSERT OR REPLACE INTO state (key, value, updated_at) VALUES (?, ?, ?)",
+            [(key, _dumps(value), _now())],
+        )
+
+    # -- reads ----------------------------------------------------------------
+
+    def get_state(self, key: str, default: Any = None) -> Any:
+        rows = self._query("SELECT value FROM state WHERE key = ?", (key,))
+        return json.loads(rows[0]["value"]) if rows else default
+
+    def find_sessions(
+        self,
+        portal_key: Optional[str] = None,
+        gkn: Optional[str] = None,
+        date: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Newest first; ``date`` is one day, ``since`` a first day (YYYY-MM-DD)."""
+        where, params = self._filters(portal_key, gkn)
+        if date:
+            where.append("date = ?")
+            params.append(date)
+        if since:
+            where.append("date >= ?")
+            params.append(since)
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        return self._query(
+            f"SELECT * FROM sessions {self._where(where)} ORDER BY session_id DESC LIMIT ?",
+            (*params, limit),
+        )
+
+    def find_cases(
+        self,
+        portal_key: Optional[str] = None,
+        gkn: Optional[str] = None,
+        limit: int = 1000,
+    ) -> list[dict[str, Any]]:
+        where, params = self._filters(portal_key, gkn)
+        rows = self._query(
+            f"SELECT * FROM cases {self._where(where)} ORDER BY updated_at DESC LIMIT ?",
+            (*params, limit),
+        )
+        for row in rows:
+            row["meta"] = json.loads(row["meta"]) if row["meta"] else {}
+            row["files"] = json.loads(row["files"]) if row["files"] else []
+        return rows
+
+    def has_cases(self) -> bool:
+        return bool(self._query("SELECT 1 FROM cases LIMIT 1", ()))
+
+    def f002_result(self, case_dir: str) -> Optional[dict[str, Any]]:
+        rows = self._query(
+            "SELECT * FROM f002_results WHERE case_dir = ?", (os.path.abspath(case_dir),)
+        )
+        return rows[0] if rows else None
+
+    @staticmethod
+    def _filters(portal_key: Optional[str], gkn: Optional[str]) -> tuple[list[str], list[Any]]:
+        where: list[str] = []
+        params: list[Any] = []
+        if portal_key:
+            where.append("portal_key = ?")
+            params.append(portal_key.lower())
+        if gkn:
+            where.append("gkn_key = ?")
+            params.append(gkn_key(gkn))
+        return where, params
+
+    @staticmethod
+    def _where(where: list[str]) -> str:
+        return f"WHERE {' AND '.join(where)}" if where else ""
+
+    # -- rebuild --------------------------------------------------------------
+
+    def rebuild_sessions(self, runtime_root: Optional[os.PathLike[str] | str] = None) -> int:
+        """Re-read ``sessions/*/*/run.json`` and ``LATEST.txt`` (one walk of the tree).
+
+        Cases are re-read by ``build_case_index.py``.
+        """
+        root = Path(runtime_root or Path(self.path).parent)
+        rows = [
+            _session_row(
+                os.fspath(session_root),
+                run_info.get("portal_key"),
+                run_info.get("last_number") or run_info.get("gkn"),
+                run_info.get("session_started_at"),
+                run_info.get("last_status"),
+                run_info.get("last_step"),
+            )
+            for session_root, run_info in _iter_sessions(root / "sessions")
+        ]
+        self._write(_UPSERT_SESSION, rows, clear="sessions")
+        latest = root / "LATEST.txt"
+        if latest.exists():
+            self.set_state("latest_session", latest.read_text(encoding="utf-8").strip())
+        return len(rows)
+
+
+_UPSERT_SESSION = """
+INSERT INTO sessions (session_id, session_root, date, portal_key, gkn_key, number,
+                      started_at, status, last_step, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (session_id) DO UPDATE SET
+    portal_key = COALESCE(excluded.portal_key, portal_key),
+    gkn_key = COALESCE(excluded.gkn_key, gkn_key),
+    number = COALESCE(excluded.number, number),
+    started_at = COALESCE(excluded.started_at, started_at),
+    status = COALESCE(excluded.status, status),
+    last_step = COALESCE(excluded.last_step, last_step),
+    updated_at = excluded.updated_at
+"""
+
+_UPSERT_CASE = """
+INSERT INTO cases (case_dir, portal_key, gkn, gkn_key, session_id, meta, files, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (case_dir) DO UPDATE SET
+    portal_key = excluded.portal_key,
+    gkn = excluded.gkn,
+    gkn_key = excluded.gkn_key,
+    session_id = COALESCE(excluded.session_id, session_id),
+    meta = COALESCE(excluded.meta, meta),
+    files = COALESCE(excluded.files, files),
+    updated_at = excluded.updated_at
+"""
+
+
+def _session_id(session_root: str) -> str:
+    """``YYYY-MM-DD/<session folder>``, as in events.jsonl and the archives."""
+    session_root = os.path.abspath(session_root)
+    return f"{os.path.basename(os.path.dirname(session_root))}/{os.path.basename(session_root)}"
+
+
+def _session_row(
+    session_root: str,
+    portal_key: Optional[str],
+    number: Optional[str],
+    started_at: Optional[str],
+    status: Optional[str],
+    last_step: Optional[str],
+) -> tuple[Any, ...]:
+    session_root = os.path.abspath(session_root)
+    session_id = _session_id(session_root)
+    return (
+        session_id,
+        session_root,
+        session_id.split("/", 1)[0],
+        (portal_key or "").lower() or None,
+        gkn_key(number) if number else None,
+        number,
+        started_at,
+        status,
+        last_step,
+        _now(),
+    )
+
+
+def _entry_rows(entries: list[dict[str, Any]]) -> list[tuple[Any, ...]]:
+    return [
+        _case_row(
+            entry["case_dir"],
+            entry.get("portal_key") or "",
+            entry.get("gkn") or "",
+            None,
+            entry.get("meta") if isinstance(entry.get("meta"), dict) else None,
+            None,
+            entry.get("timestamp"),
+        )
+        for entry in entries
+    ]
+
+
+def _case_row(
+    case_dir: str,
+    portal_key: str,
+    gkn: str,
+    session_id: Optional[str],
+    meta: Optional[dict[str, Any]],
+    files: Optional[list[str]],
+    updated_at: Optional[str],
+) -> tuple[Any, ...]:
+    return (
+        os.path.abspath(case_dir),
+        (portal_key or "unknown").lower(),
+        gkn,
+        gkn_key(gkn),
+        session_id,
+        _dumps(meta) if meta is not None else None,
+        _dumps(files) if files is not None else None,
+        updated_at or _now(),
+    )
+
+
+def _load_json(path: Path) -> Any:
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _iter_sessions(sessions_dir: Path) -> Iterator[tuple[Path, dict[str, Any]]]:
+    if not sessions_dir.is_dir():
+        return
+    for date_dir in sorted(sessions_dir.iterdir()):
+        if not date_dir.is_dir():
+            continue
+        for session_root in sorted(date_dir.iterdir()):
+            run_info = _load_json(session_root / "run.json")
+            if isinstance(run_info, dict):
+                yield session_root, run_info
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="F001/F002 runtime catalog (catalog.sqlite)")
+    parser.add_argument("--db", help="Catalog file (default: F001_runtime/catalog.sqlite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sessions = commands.add_parser("sessions", help="Find sessions")
+    cases = commands.add_parser("cases", help="Find cases")
+    for sub in (sessions, cases):
+        sub.add_argument("--portal-key")
+        sub.add_argument("--gkn")
+        sub.add_argument("--limit", type=int, default=100)
+    sessions.add_argument("--date", help="YYYY-MM-DD")
+    sessions.add_argument("--since", help="YYYY-MM-DD")
+    sessions.add_argument("--status")
+    commands.add_parser("rebuild", help="Re-read the session folders into the catalog")
+    args = parser.parse_args(argv)
+
+    catalog = Catalog(args.db)
+    if args.command == "rebuild":
+        print(f"Sesje w katalogu: {catalog.rebuild_sessions()}")
+        return 0
+    if args.command == "sessions":
+        rows = catalog.find_sessions(
+            args.portal_key, args.gkn, args.date, args.status, args.since, args.limit
+        )
+    else:
+        rows = catalog.find_cases(args.portal_key, args.gkn, args.limit)
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; pure Python is used without it.
+    np = None
+
+Point = list[float]
+Ring = list[Point]
+
+# Portal and GK file coordinates: decimal point or decimal comma.
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)?")
+# In WKT a comma separates vertices, so only a decimal point is allowed.
+_WKT_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+# Innermost WKT parentheses = one ring (exterior or hole).
+_WKT_RING = re.compile(r"\(([^()]+)\)")
+
+POLYGON_TEXT = "polygon_coords.txt"
+POLYGON_JSON = "polygon_coords.json"
+GK_POLYGON_GLOB = "GK_*_poligon.txt"
+
+
+def _to_float(token: str) -> float:
+    return float(token.replace(",", "."))
+
+
+def _split_closed(points: Ring) -> list[Ring]:
+    """Split a point sequence into rings wherever a ring closes on its first point."""
+    rings: list[Ring] = []
+    current: Ring = []
+    for point in points:
+        current.append(point)
+        if len(current) > 3 and point == current[0]:
+            rings.append(current)
+            current = []
+    if current:
+        rings.append(current)
+    return rings
+
+
+def _wkt_ring(group: str) -> Ring:
+    numbers = _WKT_NUMBER.findall(group)
+    vertices = group.count(",") + 1
+    dim = len(numbers) // vertices if vertices else 0
+    if dim >= 2 and dim * vertices == len(numbers):
+        # One findall per ring; a third/fourth coordinate (Z/M) is dropped.
+        return [[float(numbers[i]), float(numbers[i + 1])] for i in range(0, len(numbers), dim)]
+    ring: Ring = []
+    for vertex in group.split(","):
+        pair = _WKT_NUMBER.findall(vertex)
+        if len(pair) >= 2:
+            ring.append([float(pair[0]), float(pair[1])])
+    return ring
+
+
+def parse_polygon_text(raw_text: str) -> list[Ring]:
+    """Rings from the portal's coordinates text (``polygon_coords.txt``).
+
+    WKT (``POLYGON``/``MULTIPOLYGON``) gives one ring per innermost pair of
+    parentheses, in text order (exteriors and holes). A plain list of
+    ``X Y`` pairs is split into rings where a point returns to the first
+    point of its ring; the F001 parser before this module wrote such a list
+    as a single ring.
+    """
+    text = (raw_text or "").strip()
+    if not text:
+        return []
+    if "POLYGON" in text.upper():
+        rings = [ring for ring in map(_wkt_ring, _WKT_RING.findall(text)) if ring]
+        if rings:
+            return rings
+    numbers = [_to_float(token) for token in _NUMBER.findall(text)]
+    points = [[numbers[i], numbers[i + 1]] for i in range(0, len(numbers) - 1, 2)]
+    return _split_closed(points)
+
+
+def parse_xy_lines(raw_text: str) -> list[Ring]:
+    """Rings from ``GK_*_poligon.txt`` files: the first two numbers of a line are ``X Y``.
+
+    An empty line or a return to the first point ends a ring.
+    """
+    rings: list[Ring] = []
+    current: Ring = []
+    for line in (raw_text or "").splitlines():
+        numbers = _NUMBER.findall(line)
+        if len(numbers) < 2:
+            if not line.strip() and current:
+                rings.extend(_split_closed(current))
+                current = []
+            continue
+        current.append([_to_float(numbers[0]), _to_float(numbers[1])])
+    if current:
+        rings.extend(_split_closed(current))
+    return rings
+
+
+def _valid_rings(payload: Any) -> Optional[list[Ring]]:
+    if not isinstance(payload, list):
+        return None
+    rings: list[Ring] = []
+    for ring in payload:
+        if not isinstance(ring, list):
+            return None
+        points: Ring = []
+        for point in ring:
+            if not isinstance(point, (list, tuple)) or len(point) < 2:
+                return None
+            points.append([float(point[0]), float(point[1])])
+        if points:
+            rings.append(points)
+    return rings
+
+
+def load_polygon_json(path: Path) -> Optional[list[Ring]]:
+    """Rings already saved by F001; ``None`` when the file cannot be used."""
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return _valid_rings(json.load(handle))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def write_polygon_json(path: str | Path, rings: Sequence[Ring]) -> None:
+    with Path(path).open("w", encoding="utf-8") as handle:
+        json.dump([list(ring) for ring in rings], handle, ensure_ascii=False, indent=2)
+
+
+def load_case_polygon(case_dir: Path) -> tuple[list[Ring], str]:
+    """Polygon rings of a case and the file they come from.
+
+    Order: ``GK_*_poligon.txt``, then ``polygon_coords.json`` (already parsed
+    by F001, unless older than ``polygon_coords.txt``), and finally parsing
+    ``polygon_coords.txt``.
+    """
+    case_dir = Path(case_dir)
+    gk_files = sorted(case_dir.glob(GK_POLYGON_GLOB))
+    if gk_files:
+        text = gk_files[0].read_text(encoding="utf-8")
+        return parse_xy_lines(text), os.fspath(gk_files[0])
+    text_path = case_dir / POLYGON_TEXT
+    json_path = case_dir / POLYGON_JSON
+    if json_path.exists():
+        fresh = not text_path.exists() or json_path.stat().st_mtime >= text_path.stat().st_mtime
+        rings = load_polygon_json(json_path) if fresh else None
+        if rings:
+            return rings, os.fspath(json_path)
+    if text_path.exists():
+        return parse_polygon_text(text_path.read_text(encoding="utf-8")), os.fspath(text_path)
+    return [], ""
+
+
+def close_ring(ring: Ring) -> Ring:
+    if not ring:
+        return []
+    closed = [point[:] for point in ring]
+    if closed[0] != closed[-1]:
+        closed.append(closed[0][:])
+    return closed
+
+
+def ring_array(ring: Ring) -> Any:
+    """Ring as a NumPy ``(n, 2)`` array; the list itself without NumPy."""
+    if np is None:
+        return ring
+    return np.asarray(ring, dtype=float).reshape(-1, 2)
+
+
+def points_in_rings(points: Sequence[Point], rings: Sequence[Ring]) -> list[bool]:
+    """Even-odd rule over closed rings (holes and multipolygons included).
+
+    With NumPy all points are tested at once for each edge.
+    """
+    if not points:
+        return []
+    if np is not None:
+        xy = np.asarray(points, dtype=float).reshape(-1, 2)
+        x, y = xy[:, 0], xy[:, 1]
+        inside = np.zeros(len(xy), dtype=bool)
+        for ring in rings:
+            edges = ring_array(ring)
+            if len(edges) < 2:
+                continue
+            x0, y0 = edges[:-1, 0, None], edges[:-1, 1, None]
+            x1, y1 = edges[1:, 0, None], edges[1:, 1, None]
+            crosses = (y0 > y) != (y1 > y)
+            x_intersect = (x1 - x0) * (y - y0) / (y1 - y0 + 1e-9) + x0
+            inside ^= np.logical_xor.reduce(crosses & (x < x_intersect), axis=0)
+        return inside.tolist()
+    result: list[bool] = []
+    for x, y in points:
+        inside = False
+        for ring in rings:
+            for i in range(len(ring) - 1):
+                x0, y0 = ring[i]
+                x1, y1 = ring[i + 1]
+                if (y0 > y) != (y1 > y):
+                    if x < (x1 - x0) * (y - y0) / (y1 - y0 + 1e-9) + x0:
+                        inside = not inside
+        result.append(inside)
+    return result